@@ -11,7 +11,21 @@ a = Analysis(
         ('api_client.py', '.'),
         ('processador_placas.py', '.'),
         ('selenium_bot.py', '.'),
-        ('atualizacao_ssw.py', '.')
+        ('atualizacao_ssw.py', '.'),
+        ('esperas.py', '.'),
+        ('cache_geocodificacao.py', '.'),
+        ('geocodificador_offline.py', '.'),
+        ('dados/municipios.csv', 'dados'),
+        ('cliente_http.py', '.'),
+        ('navegador.py', '.'),
+        ('estado_veiculos.py', '.'),
+        ('diario_execucao.py', '.'),
+        ('metricas.py', '.'),
+        ('agendador.py', '.'),
+        ('servico.py', '.'),
+        ('configuracao_log.py', '.'),
+        ('eventos_execucao.py', '.'),
+        ('consultar_eventos.py', '.')
     ],
     hiddenimports=[
         'queue',
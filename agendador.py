@@ -0,0 +1,332 @@
+import re
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from config import (
+    AGENDAMENTOS_ARQUIVO, AGENDADOR_TOLERANCIA_MIN, AGENDADOR_SOBREPOSICAO, AGENDADOR_ESTADO_ARQUIVO,
+)
+
+# Tempo máximo dormindo sem reavaliar a agenda (ajustes no relógio, suspensão do PC)
+ESPERA_MAXIMA_SEGUNDOS = 300
+
+POLITICAS_SOBREPOSICAO = ("fila", "agrupar", "ignorar")
+
+_UNIDADES_INTERVALO = {"s": 1, "seg": 1, "m": 60, "min": 60, "h": 3600}
+
+
+class ExpressaoInvalida(ValueError):
+    pass
+
+
+def _campo_cron(texto, minimo, maximo):
+    """Converte um campo cron (*, */n, a-b, a-b/n, listas) no conjunto de valores."""
+    valores = set()
+    for parte in texto.split(","):
+        intervalo, _, passo = parte.partition("/")
+        passo = int(passo) if passo else 1
+        if intervalo == "*":
+            inicio, fim = minimo, maximo
+        elif "-" in intervalo:
+            inicio, fim = (int(v) for v in intervalo.split("-", 1))
+        else:
+            inicio = int(intervalo)
+            fim = maximo if passo > 1 else inicio
+        if inicio < minimo or fim > maximo or inicio > fim or passo < 1:
+            raise ExpressaoInvalida(f"Campo cron fora do intervalo {minimo}-{maximo}: {parte}")
+        valores.update(range(inicio, fim + 1, passo))
+    return valores
+
+
+class Agenda:
+    """
+    Uma expressão de agendamento:
+
+        "08:30"             todos os dias às 08:30
+        "a cada 30min"      a cada 30 minutos, contados a partir da meia-noite (s, min ou h)
+        "*/15 6-18 * * 1-5" cron de 5 campos (minuto hora dia mês dia-da-semana, 0 = domingo)
+    """
+
+    def __init__(self, expressao):
+        self.expressao = expressao.strip()
+        texto = self.expressao.lower()
+        self._intervalo = None
+        self._cron = None
+        try:
+            if re.fullmatch(r"\d{1,2}:\d{2}", texto):
+                hora, minuto = (int(v) for v in texto.split(":"))
+                if hora > 23 or minuto > 59:
+                    raise ExpressaoInvalida(f"Horário inválido: {expressao}")
+                self._cron = ({minuto}, {hora}, None, None, None)
+            elif texto.startswith("a cada"):
+                encontrado = re.fullmatch(r"a cada\s+(\d+)\s*(s|seg|m|min|h)", texto)
+                if not encontrado or int(encontrado.group(1)) == 0:
+                    raise ExpressaoInvalida(f"Intervalo inválido: {expressao}")
+                self._intervalo = int(encontrado.group(1)) * _UNIDADES_INTERVALO[encontrado.group(2)]
+            else:
+                campos = texto.split()
+                if len(campos) != 5:
+                    raise ExpressaoInvalida(f"Expressão não reconhecida: {expressao}")
+                minutos, horas, dias, meses, semana = campos
+                self._cron = (
+                    _campo_cron(minutos, 0, 59),
+                    _campo_cron(horas, 0, 23),
+                    None if dias == "*" else _campo_cron(dias, 1, 31),
+                    None if meses == "*" else _campo_cron(meses, 1, 12),
+                    None if semana == "*" else {d % 7 for d in _campo_cron(semana, 0, 7)},
+                )
+        except ValueError as e:
+            if isinstance(e, ExpressaoInvalida):
+                raise
+            raise ExpressaoInvalida(f"Expressão inválida '{expressao}': {e}")
+
+    def _dia_confere(self, dia):
+        _, _, dias, meses, semana = self._cron
+        if meses is not None and dia.month not in meses:
+            return False
+        dia_semana = (dia.weekday() + 1) % 7  # cron: 0 = domingo
+        if dias is not None and semana is not None:
+            # Como no cron: com os dois campos restritos, basta um deles conferir
+            return dia.day in dias or dia_semana in semana
+        if dias is not None:
+            return dia.day in dias
+        if semana is not None:
+            return dia_semana in semana
+        return True
+
+    def proximo(self, apos):
+        """Primeiro disparo estritamente depois de apos (datetime sem fuso)."""
+        if self._intervalo:
+            meia_noite = apos.replace(hour=0, minute=0, second=0, microsecond=0)
+            decorrido = (apos - meia_noite).total_seconds()
+            passos = int(decorrido // self._intervalo) + 1
+            candidato = meia_noite + timedelta(seconds=passos * self._intervalo)
+            # O intervalo recomeça a cada meia-noite
+            return min(candidato, meia_noite + timedelta(days=1))
+
+        minutos, horas, _, _, _ = self._cron
+        base = apos.replace(second=0, microsecond=0)
+        for deslocamento in range(0, 366 * 5):
+            dia = (base + timedelta(days=deslocamento)).date()
+            if not self._dia_confere(dia):
+                continue
+            for hora in sorted(horas):
+                for minuto in sorted(minutos):
+                    candidato = datetime(dia.year, dia.month, dia.day, hora, minuto)
+                    if candidato > apos:
+                        return candidato
+        return None
+
+    def __repr__(self):
+        return f"Agenda({self.expressao!r})"
+
+
+def carregar_agendamentos(caminho=AGENDAMENTOS_ARQUIVO):
+    """Lê a lista de expressões do arquivo de agendamentos (lista vazia se não existir)."""
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def salvar_agendamentos(expressoes, caminho=AGENDAMENTOS_ARQUIVO):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(list(expressoes), f)
+
+
+class Agendador:
+    """
+    Dispara a tarefa nos horários das expressões, dormindo até o próximo
+    disparo (threading.Event) em vez de verificar o relógio a cada minuto.
+
+    - Um disparo perdido (PC suspenso, programa fechado) é executado se ainda
+      estiver dentro de tolerancia_min; vários perdidos viram uma única execução.
+    - Se a tarefa ainda estiver rodando (ou ocupado() retornar True), o disparo
+      segue a política de sobreposição: "fila" (executa cada um depois),
+      "agrupar" (no máximo uma execução pendente) ou "ignorar".
+    - tarefa(horario) roda em uma thread própria; o disparo seguinte só
+      acontece depois que ela retorna.
+
+    Não depende do Qt: serve tanto à interface quanto ao modo serviço.
+    """
+
+    def __init__(self, expressoes, tarefa, ocupado=None, tolerancia_min=AGENDADOR_TOLERANCIA_MIN,
+                 sobreposicao=AGENDADOR_SOBREPOSICAO, arquivo_estado=AGENDADOR_ESTADO_ARQUIVO):
+        if sobreposicao not in POLITICAS_SOBREPOSICAO:
+            raise ValueError(f"Política de sobreposição inválida: {sobreposicao}")
+        self.tarefa = tarefa
+        self.ocupado_externo = ocupado or (lambda: False)
+        self.tolerancia = timedelta(minutes=tolerancia_min)
+        self.sobreposicao = sobreposicao
+        self.arquivo_estado = arquivo_estado
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._execucao = None
+        self._pendentes = []
+        self.agendas = []
+        self.atualizar_expressoes(expressoes)
+        # Ponto a partir do qual os disparos ainda não foram tratados. Sem estado salvo
+        # (primeira execução) começa de agora, sem recuperar disparos anteriores
+        agora = datetime.now()
+        verificado_ate = self._carregar_estado()
+        self._verificado_ate = max(verificado_ate, agora - self.tolerancia) if verificado_ate else agora
+
+    # ---- estado persistido ----
+
+    def _carregar_estado(self):
+        if not self.arquivo_estado:
+            return None
+        try:
+            with open(self.arquivo_estado, "r", encoding="utf-8") as f:
+                return datetime.fromisoformat(json.load(f)["verificado_ate"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Estado do agendador inválido, ignorado: {e}")
+            return None
+
+    def _salvar_estado(self):
+        if not self.arquivo_estado:
+            return
+        try:
+            with open(self.arquivo_estado, "w", encoding="utf-8") as f:
+                json.dump({"verificado_ate": self._verificado_ate.isoformat(timespec="seconds")}, f)
+        except Exception as e:
+            logging.warning(f"Não foi possível salvar o estado do agendador: {e}")
+
+    # ---- configuração e consulta ----
+
+    def atualizar_expressoes(self, expressoes):
+        """Troca as expressões; as inválidas são registradas no log e ignoradas."""
+        agendas = []
+        for expressao in expressoes:
+            try:
+                agendas.append(Agenda(expressao))
+            except ExpressaoInvalida as e:
+                logging.error(f"Agendamento ignorado: {e}")
+        with self._lock:
+            self.agendas = agendas
+        self._acordar.set()
+
+    def proximas_execucoes(self, quantidade=5, apos=None):
+        """Linha do tempo dos próximos disparos: [(datetime, expressão)] em ordem."""
+        with self._lock:
+            agendas = list(self.agendas)
+        apos = apos or datetime.now()
+        linha_do_tempo = []
+        for agenda in agendas:
+            momento = apos
+            for _ in range(quantidade):
+                momento = agenda.proximo(momento)
+                if momento is None:
+                    break
+                linha_do_tempo.append((momento, agenda.expressao))
+        return sorted(linha_do_tempo)[:quantidade]
+
+    def ocupado(self):
+        return (self._execucao is not None and self._execucao.is_alive()) or self.ocupado_externo()
+
+    # ---- ciclo de execução ----
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._ciclo, name="agendador", daemon=True)
+        self._thread.start()
+        proximas = self.proximas_execucoes(1)
+        if proximas:
+            logging.info(f"Agendador iniciado. Próxima execução: {proximas[0][0]:%d/%m %H:%M} ({proximas[0][1]})")
+        else:
+            logging.info("Agendador iniciado sem agendamentos.")
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def acordar(self):
+        """Reavalia a agenda agora (ex.: uma execução manual terminou e há disparo pendente)."""
+        self._acordar.set()
+
+    def aguardar(self):
+        """Bloqueia até parar() ser chamado (modo serviço)."""
+        while self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+
+    def aguardar_execucao(self, timeout=None):
+        """Espera a execução agendada em andamento (se houver) terminar."""
+        execucao = self._execucao
+        if execucao is not None:
+            execucao.join(timeout)
+
+    def _ciclo(self):
+        while not self._parar.is_set():
+            self._acordar.clear()
+            self._tratar_disparos(datetime.now())
+            self._executar_pendente()
+
+            proximas = self.proximas_execucoes(1, apos=self._verificado_ate)
+            espera = ESPERA_MAXIMA_SEGUNDOS
+            if proximas:
+                espera = min(espera, max(0.0, (proximas[0][0] - datetime.now()).total_seconds()))
+            self._acordar.wait(timeout=espera)
+
+    def _tratar_disparos(self, agora):
+        """Procura os disparos entre a última verificação e agora."""
+        with self._lock:
+            agendas = list(self.agendas)
+        devidos = []
+        perdidos = 0
+        for agenda in agendas:
+            momento = agenda.proximo(self._verificado_ate)
+            while momento is not None and momento <= agora:
+                if agora - momento <= self.tolerancia:
+                    devidos.append((momento, agenda.expressao))
+                else:
+                    perdidos += 1
+                momento = agenda.proximo(momento)
+        if perdidos:
+            logging.warning(f"{perdidos} disparo(s) agendado(s) fora da tolerância de "
+                            f"{int(self.tolerancia.total_seconds() // 60)} min foram descartados.")
+        self._verificado_ate = agora
+        self._salvar_estado()
+        if not devidos:
+            return
+        # Disparos acumulados (ex.: após suspensão) viram uma única execução
+        momento, expressao = max(devidos)
+        if len(devidos) > 1:
+            logging.info(f"{len(devidos)} disparos atrasados agrupados em uma execução.")
+        self._enfileirar(f"{momento:%H:%M} ({expressao})")
+
+    def _enfileirar(self, horario):
+        if self.ocupado() or self._pendentes:
+            if self.sobreposicao == "ignorar":
+                logging.warning(f"Agendamento {horario} ignorado: uma atualização já está em andamento.")
+                return
+            if self.sobreposicao == "agrupar" and self._pendentes:
+                logging.info(f"Agendamento {horario} agrupado com a execução já pendente.")
+                return
+            logging.info(f"Agendamento {horario} aguardando o fim da atualização em andamento.")
+        self._pendentes.append(horario)
+
+    def _executar_pendente(self):
+        if not self._pendentes or self.ocupado():
+            return
+        horario = self._pendentes.pop(0)
+
+        def executar():
+            try:
+                self.tarefa(horario)
+            except Exception as e:
+                logging.error(f"Erro na execução agendada ({horario}): {e}", exc_info=True)
+            finally:
+                # Libera o próximo disparo pendente
+                self._acordar.set()
+
+        logging.info(f"Iniciando execução agendada: {horario}")
+        self._execucao = threading.Thread(target=executar, name="execucao-agendada", daemon=True)
+        self._execucao.start()
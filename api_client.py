@@ -1,62 +1,255 @@
-import requests
+import json
 import logging
-from config import API_BASE_URL, API_USER, API_PASSWORD, API2_BASE_URL, LOCATIONIQ_API_KEY
+import threading
+import time
+from config import (
+    API_BASE_URL, API_USER, API_PASSWORD, API2_BASE_URL, LOCATIONIQ_API_KEY, API_TIMEOUT,
+    LOCATIONIQ_INTERVALO, GEOCODE_CACHE_ARQUIVO, GEOCODE_CACHE_PRECISAO,
+    GEOCODE_CACHE_TTL_DIAS, GEOCODE_CACHE_MAX_ENTRADAS,
+    GEOCODE_OFFLINE, MUNICIPIOS_CSV, GEOCODE_OFFLINE_MAX_KM, GEOCODE_LOCATIONIQ_FALLBACK,
+    TOKEN_CACHE_ARQUIVO, TOKEN_MARGEM_RENOVACAO, TOKEN_VALIDADE_PADRAO,
+    API_FROTA_ENDPOINT, API_FROTA_PARAM_PAGINA, API_FROTA_PARAM_TAMANHO, API_FROTA_TAMANHO_PAGINA,
+)
+from cache_geocodificacao import CacheGeocodificacao
+from cliente_http import obter_sessao
+from geocodificador_offline import obter_geocodificador
+import metricas
+
+_cache_geocodificacao = CacheGeocodificacao(
+    GEOCODE_CACHE_ARQUIVO,
+    precisao=GEOCODE_CACHE_PRECISAO,
+    ttl_dias=GEOCODE_CACHE_TTL_DIAS,
+    max_entradas=GEOCODE_CACHE_MAX_ENTRADAS,
+)
+
+# Controle do intervalo mínimo entre chamadas à LocationIQ
+_ultima_chamada_locationiq = 0.0
+_locationiq_lock = threading.Lock()
+
+def _respeitar_limite_locationiq():
+    global _ultima_chamada_locationiq
+    with _locationiq_lock:
+        espera = LOCATIONIQ_INTERVALO - (time.monotonic() - _ultima_chamada_locationiq)
+        if espera > 0:
+            time.sleep(espera)
+        _ultima_chamada_locationiq = time.monotonic()
+
+def estatisticas_cache_geocodificacao():
+    """Retorna os acertos, falhas e o número de células no cache de geocodificação."""
+    return _cache_geocodificacao.estatisticas()
+
+class GerenciadorToken:
+    """
+    Mantém o token OAuth da API de rastreamento em memória (e opcionalmente em
+    disco) e só pede um novo quando faltam margem_segundos para expirar.
+    Chamadas concorrentes compartilham a mesma renovação.
+    """
+
+    def __init__(self, arquivo_cache=None, margem_segundos=60, validade_padrao=3600):
+        self.arquivo_cache = arquivo_cache
+        self.margem_segundos = margem_segundos
+        self.validade_padrao = validade_padrao
+        self._token = None
+        self._expira_em = 0.0
+        self._lock = threading.Lock()
+        self._carregar_do_disco()
+
+    def _valido(self):
+        return self._token is not None and time.time() < self._expira_em - self.margem_segundos
+
+    def _carregar_do_disco(self):
+        if not self.arquivo_cache:
+            return
+        try:
+            with open(self.arquivo_cache, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            self._token = dados['access_token']
+            self._expira_em = float(dados['expira_em'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Cache de token inválido, será ignorado: {e}")
+
+    def _salvar_no_disco(self):
+        if not self.arquivo_cache:
+            return
+        try:
+            with open(self.arquivo_cache, 'w', encoding='utf-8') as f:
+                json.dump({'access_token': self._token, 'expira_em': self._expira_em}, f)
+        except Exception as e:
+            logging.warning(f"Não foi possível salvar o cache de token: {e}")
+
+    @metricas.cronometrado("api: token")
+    def _solicitar(self):
+        data = {
+            'grant_type': 'password',
+            'username': API_USER,
+            'Password': API_PASSWORD # P maiúsculo conforme pede a documentação da API
+        }
+        base_url = API_BASE_URL if API_BASE_URL.endswith('/') else API_BASE_URL + '/'
+        
+        response = obter_sessao().post(base_url + "Token", data=data, verify=False)
+        response.raise_for_status() # Levanta exceção para status HTTP 4xx/5xx
+        dados = response.json()
+        self._token = dados['access_token']
+        # Sem expires_in na resposta, assume a validade padrão; um 401 antes disso ainda renova o token
+        self._expira_em = time.time() + float(dados.get('expires_in') or self.validade_padrao)
+        self._salvar_no_disco()
+        logging.info(f"Novo token da API obtido (expira em {int(self._expira_em - time.time())}s).")
+
+    def obter(self):
+        """Retorna um token válido, renovando-o se estiver perto de expirar."""
+        with self._lock:
+            if not self._valido():
+                self._solicitar()
+            return self._token
+
+    def renovar(self, token_rejeitado):
+        """
+        Chamado após um 401. Se outra thread já trocou o token rejeitado,
+        reaproveita o novo em vez de pedir outro.
+        """
+        with self._lock:
+            if self._token == token_rejeitado or not self._valido():
+                self._solicitar()
+            return self._token
+
+_gerenciador_token = GerenciadorToken(TOKEN_CACHE_ARQUIVO or None, TOKEN_MARGEM_RENOVACAO, TOKEN_VALIDADE_PADRAO)
 
 def get_token():
-    data = {
-        'grant_type': 'password',
-        'username': API_USER,
-        'Password': API_PASSWORD # P maiúsculo conforme pede a documentação da API
-    }
-    base_url = API_BASE_URL if API_BASE_URL.endswith('/') else API_BASE_URL + '/'
-    
-    response = requests.post(base_url + "Token", data=data, verify=False)
-    response.raise_for_status() # Levanta exceção para status HTTP 4xx/5xx
-    return response.json()['access_token']
+    return _gerenciador_token.obter()
 
-def get_ultima_posicao_por_placa(token, placa):
+def _get_autenticado(endpoint_url, params, timeout, descricao):
+    """
+    GET na API de rastreamento com o token atual do gerenciador, que é
+    renovado pouco antes de expirar mesmo no meio de uma execução. Um 401
+    ainda é tratado, repetindo uma única vez com token novo.
+    """
+    token = _gerenciador_token.obter()
     headers = {"Authorization": f"Bearer {token}"}
+    response = obter_sessao().get(endpoint_url, headers=headers, params=params, verify=False, timeout=timeout)
+    if response.status_code == 401:
+        # Token revogado antes do prazo: tenta uma única vez com um token novo
+        logging.info(f"Token recusado ao consultar {descricao}. Renovando e tentando novamente...")
+        headers = {"Authorization": f"Bearer {_gerenciador_token.renovar(token)}"}
+        response = obter_sessao().get(endpoint_url, headers=headers, params=params, verify=False, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+def get_ultima_posicao_por_placa(token, placa, timeout=API_TIMEOUT):
+    # token é mantido por compatibilidade; cada requisição usa o token atual do gerenciador
     base_url = API_BASE_URL if API_BASE_URL.endswith('/') else API_BASE_URL + '/'
     endpoint_url = base_url + f"api/v1/UltimaPosicaoVeiculo/ListaUltimaPosicaoPorPlaca"
     
     params = {"placa": placa} # Adicionando o parâmetro placa na URL
 
-    response = requests.get(endpoint_url, headers=headers, params=params, verify=False)
+    with metricas.cronometro("api: posição por placa", placa):
+        return _get_autenticado(endpoint_url, params, timeout, f"a placa {placa}") # Retorna o JSON completo da resposta da API
+
+def normalizar_placa(placa):
+    return (placa or "").replace("-", "").replace(" ", "").upper()
+
+@metricas.cronometrado("api: posições da frota")
+def get_ultimas_posicoes_frota(token, timeout=API_TIMEOUT):
+    """
+    Busca a última posição de todos os veículos da frota em poucas chamadas
+    paginadas e retorna um dicionário {placa sem traço: posição}.
+    O token é mantido por compatibilidade; cada página usa o token atual do gerenciador.
+    """
+    base_url = API_BASE_URL if API_BASE_URL.endswith('/') else API_BASE_URL + '/'
+    endpoint_url = base_url + API_FROTA_ENDPOINT
+
+    posicoes_por_placa = {}
+    pagina = 1
+    while True:
+        params = {API_FROTA_PARAM_PAGINA: pagina, API_FROTA_PARAM_TAMANHO: API_FROTA_TAMANHO_PAGINA}
+        dados = _get_autenticado(endpoint_url, params, timeout, f"a frota (página {pagina})")
+        posicoes = dados.get('Posicoes') if isinstance(dados, dict) else dados
+        if not isinstance(posicoes, list):
+            raise ValueError(f"Resposta inesperada da consulta da frota: {dados}")
+
+        novas = 0
+        for posicao in posicoes:
+            if not isinstance(posicao, dict):
+                continue
+            placa = normalizar_placa(posicao.get('Placa'))
+            # A API ordena da posição mais recente para a mais antiga, como em Posicoes[0]
+            if placa and placa not in posicoes_por_placa:
+                posicoes_por_placa[placa] = posicao
+                novas += 1
+
+        logging.info(f"Frota: página {pagina} com {len(posicoes)} posições ({novas} placas novas)")
+        # Última página, ou a API ignorou a paginação e repetiu os mesmos veículos
+        if len(posicoes) < API_FROTA_TAMANHO_PAGINA or novas == 0:
+            break
+        pagina += 1
+
+    return posicoes_por_placa
+
+def _ajustar_cidade_estado(city, state):
+    """Normaliza os nomes de cidade e estado, qualquer que seja a origem."""
+    # Trata o texto da cidade após receber da API
+    if "Região Geográfica" in city:
+        city = city.replace("Região Geográfica Imediata de", "").strip()
+        logging.info(f"Nome da cidade ajustado para: {city}")
+    
+    # Traduz Federal District para Distrito Federal
+    if state == "Federal District":
+        state = "Distrito Federal"
+        logging.info("Estado 'Federal District' traduzido para 'Distrito Federal'")
+    
+    return {'cidade': city, 'estado': state}
+
+@metricas.cronometrado("locationiq")
+def _consultar_locationiq(latitude, longitude):
+    _respeitar_limite_locationiq()
+    params = {
+        'key': LOCATIONIQ_API_KEY,
+        'lat': latitude,
+        'lon': longitude,
+        'format': 'json'
+    }
+    
+    response = obter_sessao().get(API2_BASE_URL, params=params)
     response.raise_for_status()
-    return response.json() # Retorna o JSON completo da resposta da API
+    
+    data = response.json()
+    if 'address' in data:
+        city = data['address'].get('city') or data['address'].get('town') or data['address'].get('municipality')
+        state = data['address'].get('state')
+        
+        if city and state:
+            localizacao = _ajustar_cidade_estado(city, state)
+            _cache_geocodificacao.guardar(latitude, longitude, localizacao)
+            return localizacao
+    return None
 
 def get_cidade_estado_por_coordenadas(latitude, longitude):
     """
-    Converte coordenadas em cidade e estado usando a API LocationIQ.
+    Converte coordenadas em cidade e estado.
+    Ordem de consulta: cache local, base offline de municípios (IBGE) e, se
+    habilitada, a API LocationIQ. Só a LocationIQ paga chamada HTTP e o
+    intervalo mínimo entre requisições.
     """
     try:
-        params = {
-            'key': LOCATIONIQ_API_KEY,
-            'lat': latitude,
-            'lon': longitude,
-            'format': 'json'
-        }
-        
-        response = requests.get(API2_BASE_URL, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        if 'address' in data:
-            city = data['address'].get('city') or data['address'].get('town') or data['address'].get('municipality')
-            state = data['address'].get('state')
-            
-            if city and state:
-                # Trata o texto da cidade após receber da API
-                if "Região Geográfica" in city:
-                    city = city.replace("Região Geográfica Imediata de", "").strip()
-                    logging.info(f"Nome da cidade ajustado para: {city}")
-                
-                # Traduz Federal District para Distrito Federal
-                if state == "Federal District":
-                    state = "Distrito Federal"
-                    logging.info("Estado 'Federal District' traduzido para 'Distrito Federal'")
-                
-                return {'cidade': city, 'estado': state}
+        localizacao = _cache_geocodificacao.obter(latitude, longitude)
+        if localizacao:
+            logging.info(f"Localização em cache para {latitude}, {longitude}: {localizacao['cidade']}/{localizacao['estado']}")
+            return localizacao
+
+        if GEOCODE_OFFLINE:
+            geocodificador = obter_geocodificador(MUNICIPIOS_CSV, GEOCODE_OFFLINE_MAX_KM)
+            if geocodificador:
+                with metricas.cronometro("geocodificação offline"):
+                    localizacao = geocodificador.localizar(latitude, longitude)
+                if localizacao:
+                    return _ajustar_cidade_estado(localizacao['cidade'], localizacao['estado'])
+                logging.info(f"Nenhum município da base offline próximo de {latitude}, {longitude}")
+
+        if GEOCODE_LOCATIONIQ_FALLBACK:
+            localizacao = _consultar_locationiq(latitude, longitude)
+            if localizacao:
+                return localizacao
                 
         logging.warning(f"Dados de endereço incompletos para coordenadas {latitude}, {longitude}")
         return None
@@ -64,4 +257,3 @@ def get_cidade_estado_por_coordenadas(latitude, longitude):
     except Exception as e:
         logging.error(f"Erro ao converter coordenadas em endereço: {e}")
         return None
-
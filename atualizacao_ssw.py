@@ -1,13 +1,10 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from datetime import datetime
 import logging
-from pathlib import Path
+import queue
+import threading
+import time
 import requests
 import re  # Adicione este import no topo do arquivo
 import os
@@ -18,22 +15,34 @@ load_dotenv("credenciais.env")
 
 # Importa o processador_placas para obter os dados
 import processador_placas 
+import esperas
+import metricas
+import eventos_execucao
+import configuracao_log
+import diario_execucao
+from diario_execucao import DiarioExecucao
+from estado_veiculos import EstadoVeiculos
+from navegador import criar_navegador, snapshot_tabela
+from config import SSW_URL, SSW_MAX_WORKERS, NAVEGADOR_HEADLESS, SSW_FILA_MAX
 
-# Configuração de diretórios
-BASE_DIR = Path(__file__).resolve().parent
-LOGS_DIR = BASE_DIR / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
-
-# Configuração de logging
-LOG_FILE = LOGS_DIR / "atualizacao_ssw_v3.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Identificação do worker atual, usada para marcar as mensagens de log
+_contexto_worker = threading.local()
+
+class FiltroTagWorker(logging.Filter):
+    """Prefixa as mensagens emitidas por um worker com a sua tag (ex.: [W2])."""
+
+    def filter(self, record):
+        tag = getattr(_contexto_worker, 'tag', None)
+        if tag and not getattr(record, 'tag_worker', None):
+            record.msg = f"[{tag}] {record.msg}"
+            record.tag_worker = tag
+        return True
+
+logging.getLogger().addFilter(FiltroTagWorker())
+
+# Sessões abertas pelos workers, para permitir o encerramento forçado pela interface
+_sessoes_ativas = set()
+_sessoes_lock = threading.Lock()
 
 def verificar_conexao(url="https://www.google.com/"):
     try:
@@ -46,135 +55,387 @@ def verificar_conexao(url="https://www.google.com/"):
         logging.error(f"Erro ao verificar conexão: {e}")
         return False
 
-def setup_edge_options():
-    edge_options = Options()
-    edge_options.add_argument("--log-level=OFF")
-    edge_options.add_argument("--silent")
-    edge_options.add_argument("--disable-logging")
-    edge_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
-    edge_options.add_experimental_option('useAutomationExtension', False)
-    edge_options.add_experimental_option('prefs', {
-        "credentials_enable_service": False,
-        "profile.password_manager_enabled": False,
-        "logging": {
-            "browser": "OFF",
-            "performance": "OFF"
-        }
-    })
-    return edge_options
-
-def atualizar_sistema_para_placa(placa_atual, cidade, estado):
+class SessaoSSW:
     """
-    Atualiza o sistema SSW para uma placa específica usando cidade e estado.
+    Mantém um navegador Edge logado no SSW para ser reutilizado entre placas.
+    O login só é refeito quando a sessão expira ou o navegador cai.
+
+    As janelas abertas pela sessão ficam registradas por papel ("opcao23",
+    "manifestos", "opcao33"): as opções 23 e 33 são reaproveitadas de uma placa
+    para a outra e só as janelas registradas são fechadas.
     """
-    logging.info(f"Iniciando atualização no SSW para a placa: {placa_atual} - {cidade}/{estado}")
 
-    edge_options = setup_edge_options()
-        
-    driver = None
-    try:
-        driver = webdriver.Edge(options=edge_options)
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                })
-            """
-        })
-        logging.info(f"WebDriver iniciado para placa {placa_atual}.")
-        
+    def __init__(self, headless=NAVEGADOR_HEADLESS, perfil=None):
+        self.headless = headless
+        self.perfil = perfil
+        self.driver = None
+        self.janela_principal = None
+        self.janelas = {}
+
+    def __enter__(self):
+        self.garantir_sessao()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fechar()
+
+    def iniciar(self):
+        """Abre o navegador e faz o login no SSW."""
+        self.fechar()
+        self.driver = criar_navegador(headless=self.headless, perfil=self.perfil)
+        logging.info("WebDriver iniciado para a sessão SSW.")
+        self._login()
+
+    @metricas.cronometrado("ssw: login")
+    def _login(self):
+        driver = self.driver
+
         # Obter credenciais do SSW das variáveis de ambiente
         ssw_empresa = os.getenv("SSW_EMPRESA", "")
         ssw_cnpj = os.getenv("SSW_CNPJ", "")
         ssw_usuario = os.getenv("SSW_USUARIO", "")
         ssw_senha = os.getenv("SSW_SENHA", "")
-        
+
         # Processo de login (sem loop de tentativas)
-        driver.get("https://sistema.ssw.inf.br/bin/ssw0422")
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "f1")))
-        
+        driver.get(SSW_URL)
+        esperas.aguardar_elemento(driver, By.NAME, "f1", 20, "login: formulário")
+
         driver.find_element(By.NAME, "f1").send_keys(ssw_empresa)
-        time.sleep(0.5)
         driver.find_element(By.NAME, "f2").send_keys(ssw_cnpj)
-        time.sleep(0.5)
         driver.find_element(By.NAME, "f3").send_keys(ssw_usuario)
-        time.sleep(0.5)
         driver.find_element(By.NAME, "f4").send_keys(ssw_senha)
-        time.sleep(1)
-        login_button = driver.find_element(By.ID, "5")
+        esperas.aguardar_valor_campo(driver, By.NAME, "f4", ssw_senha, 10, "login: senha preenchida",
+                                     comparar=esperas.nao_vazio)
+        login_button = esperas.aguardar_clicavel(driver, By.ID, "5", 10, "login: botão")
         driver.execute_script("arguments[0].click();", login_button)
-        time.sleep(3)
-        
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "f2")))
+
+        # A tela de login também tem um campo f2: espera ela ser substituída pelo menu
+        esperas.aguardar_obsoleto(driver, login_button, 20, "login: troca de página")
+        esperas.aguardar_elemento(driver, By.NAME, "f2", 20, "login: menu principal")
+        self.janela_principal = driver.current_window_handle
+        logging.info("Login no SSW realizado.")
+
+    def sessao_ativa(self):
+        """Verifica se o navegador responde e se o menu principal continua logado."""
+        if not self.driver or not self.janela_principal:
+            return False
+        try:
+            if self.janela_principal not in self.driver.window_handles:
+                return False
+            self.driver.switch_to.window(self.janela_principal)
+            # A tela de login é a única com campo de senha; se ela voltou, a sessão expirou
+            if self.driver.find_elements(By.CSS_SELECTOR, "input[type='password']"):
+                logging.info("Sessão SSW expirada.")
+                return False
+            return bool(self.driver.find_elements(By.NAME, "f3"))
+        except WebDriverException as e:
+            logging.warning(f"Navegador da sessão SSW não responde: {e}")
+            return False
+
+    def garantir_sessao(self):
+        """Reaproveita a sessão atual ou refaz o login se necessário."""
+        if not self.sessao_ativa():
+            logging.info("Iniciando nova sessão no SSW...")
+            self.iniciar()
+
+    def _janela_aberta(self, papel):
+        handle = self.janelas.get(papel)
+        if handle and handle in self.driver.window_handles:
+            return handle
+        self.janelas.pop(papel, None)
+        return None
+
+    def registrar_janela(self, papel, handle):
+        """Registra uma janela aberta pela sessão para ela ser fechada depois."""
+        self.janelas[papel] = handle
+
+    def fechar_janela(self, papel):
+        """Fecha a janela registrada com o papel, se ainda estiver aberta."""
+        handle = self._janela_aberta(papel)
+        self.janelas.pop(papel, None)
+        if handle:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+            self.driver.switch_to.window(self.janela_principal)
+
+    def _abrir_opcao(self, papel, opcao, descricao):
+        """Digita a opção no menu principal e registra a janela aberta por ela."""
+        driver = self.driver
+        driver.switch_to.window(self.janela_principal)
+        handles_antes = driver.window_handles
         driver.find_element(By.NAME, "f2").clear()
         driver.find_element(By.NAME, "f2").send_keys("CTA")
-        driver.find_element(By.NAME, "f3").send_keys("23+")
-        time.sleep(3)
+        driver.find_element(By.NAME, "f3").clear()
+        driver.find_element(By.NAME, "f3").send_keys(f"{opcao}+")
+        self.registrar_janela(papel, esperas.aguardar_nova_janela(driver, handles_antes, 20, descricao))
+
+    @metricas.cronometrado("ssw: abrir opção 23")
+    def preparar_para_placa(self):
+        """
+        Deixa o navegador pronto para a próxima placa: fecha a janela de
+        manifestos da placa anterior e volta à opção 23, reaproveitando a
+        janela já aberta quando o campo da placa continua disponível.
+        """
+        self.garantir_sessao()
+        driver = self.driver
+        self.fechar_janela("manifestos")
+
+        handle = self._janela_aberta("opcao23")
+        if handle:
+            driver.switch_to.window(handle)
+            campos = driver.find_elements(By.NAME, "t_placa_cavalo")
+            if campos:
+                campos[0].clear()
+                return driver
+            logging.info("Janela da opção 23 não está mais na tela da placa. Reabrindo...")
+            self.fechar_janela("opcao23")
+
+        self._abrir_opcao("opcao23", 23, "opção 23: janela")
+        esperas.aguardar_elemento(driver, By.NAME, "t_placa_cavalo", 20, "opção 23: campo placa")
+        return driver
+
+    @metricas.cronometrado("ssw: abrir opção 33")
+    def abrir_opcao_33(self):
+        """
+        Fecha a janela de manifestos e vai para a opção 33, reaproveitando a
+        janela da placa anterior. Se ela ficou na confirmação da última
+        ocorrência, confirma o OK antes de continuar.
+        """
+        driver = self.driver
+        self.fechar_janela("manifestos")
+        handle = self._janela_aberta("opcao33")
+        if not handle:
+            self._abrir_opcao("opcao33", 33, "opção 33: janela")
+            return driver
+
+        driver.switch_to.window(handle)
+        confirmacao = driver.find_elements(By.ID, "0")
+        if confirmacao:
+            driver.execute_script("arguments[0].click();", confirmacao[0])
+            esperas.aguardar_obsoleto(driver, confirmacao[0], 10, "opção 33: retorno após confirmação")
+        return driver
 
-        # Troca a página para a última aberta
-        driver.switch_to.window(driver.window_handles[-1])
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, "t_placa_cavalo")))
+    def invalidar(self):
+        """Descarta a sessão atual; o próximo uso fará um novo login."""
+        self.janela_principal = None
+        self.janelas = {}
+
+    def fechar(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+                logging.info("WebDriver da sessão SSW finalizado.")
+            except Exception as e:
+                logging.warning(f"Erro ao finalizar o WebDriver da sessão SSW: {e}")
+        self.driver = None
+        self.janela_principal = None
+        self.janelas = {}
+
+def _autorizado_em_vermelho(linha):
+    """Equivale ao XPath .//font[@color='red' and normalize-space(text())='AUTORIZADO']."""
+    return any(
+        fonte["cor"] == "red" and " ".join(fonte["texto"].split()) == "AUTORIZADO"
+        for celula in linha["celulas"] for fonte in celula["fontes"]
+    )
+
+def _manifestos_autorizados(linhas):
+    """
+    Percorre o snapshot da tabela tblsr e retorna [(cta, número sem traço)] dos
+    manifestos com AUTORIZADO em vermelho e a antepenúltima coluna vazia.
+    """
+    manifestos = []
+    for linha in linhas:
+        try:
+            celulas = linha["celulas"]
+            if len(celulas) >= 2:
+                logging.debug(f"Analisando linha com {len(celulas)} células")
+                
+                # Verifica se a penúltima coluna tem valor
+                if len(celulas) > 1 and celulas[-3]["texto"]:
+                    logging.info(f"Pulando linha - penúltima coluna preenchida: {celulas[-3]['texto']}")
+                    continue
+        
+                # Pega o manifesto primeiro (primeira coluna)
+                manifesto = celulas[0]["texto"]
+                logging.debug(f"Manifesto encontrado: {manifesto}")
+                
+                # Procura especificamente por AUTORIZADO em vermelho nesta linha
+                if _autorizado_em_vermelho(linha):
+                    logging.info(f"AUTORIZADO encontrado para manifesto: {manifesto}")
+                    # Modifica o regex para capturar corretamente e juntar os números
+                    match = re.match(r'([A-Z]{3})\s*(\d+)-?(\d+)?', manifesto)
+                    if match:
+                        cta = match.group(1)  # Pega CTA
+                        numero_principal = match.group(2)  # Pega números antes do traço
+                        numero_sufixo = match.group(3) or ''  # Pega números depois do traço
+                        
+                        # Junta os números sem o traço
+                        numero_completo = f"{numero_principal}{numero_sufixo}"
+                        
+                        manifestos.append((cta, numero_completo))
+                        logging.info(f"Manifesto processado e armazenado: CTA={cta}, Número={numero_completo}")
+                    else:
+                        logging.warning(f"Formato de manifesto não reconhecido: {manifesto}")
+        except Exception as e:
+            logging.error(f"Erro ao processar linha: {str(e)}")
+            continue
+    return manifestos
+
+@metricas.cronometrado("ssw: lançamento de ocorrência")
+def _lancar_ocorrencia(driver, cta, numero, observacao, data, hora):
+    """
+    Na tela da opção 33, abre o manifesto informado e grava a ocorrência 41
+    com a observação, data (ddmmaa) e hora (hhmm) informadas. Retorna quando o
+    botão de confirmação (id 0) aparece na janela da opção 33; a janela da
+    ocorrência é fechada se o SSW não a fechar sozinho, inclusive quando o
+    lançamento falha.
+    """
+    esperas.aguardar_elemento(driver, By.ID, "11", 20, "opção 33: campo manifesto")
+    # A janela da opção 33 é reaproveitada: limpa o manifesto anterior antes de digitar
+    driver.find_element(By.ID, "11").clear()
+    driver.find_element(By.ID, "11").send_keys(cta)
+    driver.find_element(By.ID, "12").clear()
+    driver.find_element(By.ID, "12").send_keys(numero)
+    esperas.aguardar_valor_campo(driver, By.ID, "12", numero, 10, "opção 33: número preenchido")
+    janela_atual = driver.current_window_handle
+    handles_antes = driver.window_handles
+    driver.find_element(By.ID, "13").click()
+
+    janela_ocorrencia = None
+    try:
+        janela_ocorrencia = esperas.aguardar_nova_janela(driver, handles_antes, 20, "ocorrência: janela")
+        esperas.aguardar_elemento(driver, By.NAME, "f3", 20, "ocorrência: formulário")
+
+        driver.find_element(By.NAME, "f3").send_keys("41")
+        esperas.aguardar_valor_campo(driver, By.NAME, "f3", "41", 10, "ocorrência: código preenchido",
+                                     comparar=esperas.mesmos_digitos)
+        driver.find_element(By.NAME, "f4").send_keys(data)
+        esperas.aguardar_valor_campo(driver, By.NAME, "f4", data, 10, "ocorrência: data preenchida",
+                                     comparar=esperas.mesma_data)
+        # O SSW já traz a hora preenchida: limpa antes de digitar
+        driver.find_element(By.NAME, "f5").clear()
+        driver.find_element(By.NAME, "f5").send_keys(hora)
+        esperas.aguardar_valor_campo(driver, By.NAME, "f5", hora, 10, "ocorrência: hora preenchida",
+                                     comparar=esperas.mesmos_digitos)
+        driver.find_element(By.NAME, "f6").send_keys(observacao)
+        esperas.aguardar_valor_campo(driver, By.NAME, "f6", observacao, 10, "ocorrência: observação preenchida",
+                                     comparar=esperas.prefixo)
+        enviar_button = esperas.aguardar_clicavel(driver, By.ID, "9", 10, "ocorrência: botão enviar")
+        driver.execute_script("arguments[0].click();", enviar_button)
+        driver.switch_to.window(janela_atual)
+        esperas.aguardar_elemento(driver, By.ID, "0", 80, "ocorrência: confirmação do SSW")
+    finally:
+        # Fecha a janela da ocorrência mesmo se o envio ou a confirmação falharem
+        try:
+            if janela_ocorrencia and janela_ocorrencia in driver.window_handles:
+                driver.switch_to.window(janela_ocorrencia)
+                driver.close()
+            driver.switch_to.window(janela_atual)
+        except WebDriverException:
+            pass  # O SSW fechou a janela enquanto isso, ou o navegador caiu
+
+def _lancar_ocorrencias_em_lote(sessao, placa, manifestos, cidade, estado, estado_veiculos=None, diario=None):
+    """
+    Vai para a opção 33 uma única vez e lança a ocorrência de todos os
+    manifestos [(cta, número)] em sequência, com a data/hora calculada uma vez
+    para a placa. Entre um manifesto e o próximo apenas confirma o OK e aguarda
+    a tela voltar; o OK do último fica para quando a janela for reaproveitada.
+    Cada manifesto é registrado assim que o SSW confirma a ocorrência.
+    """
+    agora = datetime.now()
+    data, hora = agora.strftime("%d%m%y"), agora.strftime("%H%M")
+    observacao = f"em transf: {cidade} - {estado}"
+
+    driver = sessao.abrir_opcao_33()
+    for i, (cta, numero) in enumerate(manifestos, 1):
+        logging.info(f"Processando manifesto {i}/{len(manifestos)}: {cta} - {numero}")
+        _lancar_ocorrencia(driver, cta, numero, observacao, data, hora)
+        _registrar_manifesto_lancado(placa, cta, numero, cidade, estado, estado_veiculos, diario)
+        if i < len(manifestos):
+            ok_button = driver.find_element(By.ID, "0")
+            driver.execute_script("arguments[0].click();", ok_button)
+            # Aguarda o SSW voltar para a tela de manifesto antes do próximo
+            esperas.aguardar_obsoleto(driver, ok_button, 10, "opção 33: retorno após confirmação")
+
+def _filtrar_manifestos_pendentes(manifestos, placa, cidade, estado, estado_veiculos, forcar, diario=None):
+    """
+    Remove os manifestos que já receberam a ocorrência desta cidade/estado e,
+    ao retomar uma execução, os que já foram concluídos nela (mesmo com forcar).
+    """
+    pendentes = []
+    for cta, numero in manifestos:
+        if diario and diario.manifesto_concluido(placa, f"{cta}{numero}"):
+            logging.info(f"Manifesto {cta} {numero} já concluído na execução retomada. Pulando.")
+        elif estado_veiculos and not forcar and estado_veiculos.manifesto_atualizado(
+                placa, f"{cta}{numero}", cidade, estado):
+            logging.info(f"Manifesto {cta} {numero} já informado em {cidade}/{estado}. Pulando.")
+        else:
+            pendentes.append((cta, numero))
+    return pendentes
+
+def _registrar_manifesto_lancado(placa, cta, numero, cidade, estado, estado_veiculos, diario):
+    manifesto = f"{cta}{numero}"
+    if estado_veiculos:
+        estado_veiculos.registrar_manifesto(placa, manifesto, cidade, estado)
+    if diario:
+        diario.registrar_manifesto(placa, manifesto, diario_execucao.CONCLUIDO)
+
+def atualizar_sistema_para_placa(placa_atual, cidade, estado, sessao=None, estado_veiculos=None, forcar=False,
+                                 diario=None):
+    """
+    Atualiza o sistema SSW para uma placa específica usando cidade e estado.
+    Se uma SessaoSSW for informada, o navegador e o login são reaproveitados;
+    caso contrário uma sessão temporária é aberta e fechada ao final.
+    Com estado_veiculos, os manifestos já informados nesta cidade/estado são
+    pulados (a menos que forcar=True) e cada ocorrência lançada é registrada.
+    A placa só é registrada quando algum manifesto autorizado foi encontrado e
+    todos já estão atualizados; sem manifestos, ela volta a ser verificada na
+    próxima execução (um manifesto pode ser autorizado depois).
+    Com um DiarioExecucao, cada manifesto concluído é gravado no diário.
+    Retorna True se o fluxo foi concluído sem erros.
+    """
+    logging.info(f"Iniciando atualização no SSW para a placa: {placa_atual} - {cidade}/{estado}")
+
+    inicio = time.perf_counter()
+    sessao_propria = sessao is None
+    if sessao_propria:
+        sessao = SessaoSSW()
+
+    sucesso = False
+    # Manifestos autorizados encontrados e todos lançados ou já atualizados
+    manifestos_em_dia = False
+    try:
+        driver = sessao.preparar_para_placa()
+        sucesso = True
         driver.find_element(By.NAME, "t_placa_cavalo").send_keys(placa_atual)
+        handles_antes = driver.window_handles
         manifesto_button = driver.find_element(By.ID, "12")
         driver.execute_script("arguments[0].click();", manifesto_button)
-        time.sleep(3)
 
-        # Troca a página para a última aberta novamente
-        driver.switch_to.window(driver.window_handles[-1])
+        # Troca para a janela com os manifestos da placa
+        sessao.registrar_janela(
+            "manifestos", esperas.aguardar_nova_janela(driver, handles_antes, 20, "opção 23: janela de manifestos")
+        )
 
         try:
             # Tenta encontrar a tabela
-            WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.ID, "tblsr")))
-            
+            esperas.aguardar_elemento(driver, By.ID, "tblsr", 5, "opção 23: tabela de manifestos")
+            tabela_encontrada = True
+        except (NoSuchElementException, TimeoutException):
+            tabela_encontrada = False
+
+        # Erros no lançamento não caem aqui: vão para o except geral e a placa falha
+        if tabela_encontrada:
             # Se a tabela existir, executa este bloco
             logging.info("Tabela encontrada, processando manifestos...")
-            manifesto_cta = []  # Lista para armazenar apenas o CTA
-            manifesto_numero = []  # Lista para armazenar apenas os números
-            tabela = driver.find_element(By.ID, "tblsr")
-            linhas = tabela.find_elements(By.TAG_NAME, "tr")
-
-            # Primeiro coleta todos os manifestos autorizados
-            for linha in linhas:
-                try:
-                    celulas = linha.find_elements(By.TAG_NAME, "td")
-                    if len(celulas) >= 2:
-                        logging.debug(f"Analisando linha com {len(celulas)} células")
-                        
-                        # Verifica se a penúltima coluna tem valor
-                        if len(celulas) > 1 and celulas[-3].text.strip():
-                            logging.info(f"Pulando linha - penúltima coluna preenchida: {celulas[-3].text}")
-                            continue
-                
-                        # Pega o manifesto primeiro (primeira coluna)
-                        manifesto = celulas[0].text.strip()
-                        logging.debug(f"Manifesto encontrado: {manifesto}")
-                        
-                        # Procura especificamente por AUTORIZADO em vermelho nesta linha
-                        autorizado_elements = linha.find_elements(
-                            By.XPATH, 
-                            ".//font[@color='red' and normalize-space(text())='AUTORIZADO']"
-                        )
-                        
-                        if autorizado_elements:
-                            logging.info(f"AUTORIZADO encontrado para manifesto: {manifesto}")
-                            # Modifica o regex para capturar corretamente e juntar os números
-                            match = re.match(r'([A-Z]{3})\s*(\d+)-?(\d+)?', manifesto)
-                            if match:
-                                cta = match.group(1)  # Pega CTA
-                                numero_principal = match.group(2)  # Pega números antes do traço
-                                numero_sufixo = match.group(3) or ''  # Pega números de'pois do traço
-                                
-                                # Junta os números sem o traço
-                                numero_completo = f"{numero_principal}{numero_sufixo}"
-                                
-                                manifesto_cta.append(cta)
-                                manifesto_numero.append(numero_completo)
-                                logging.info(f"Manifesto processado e armazenado: CTA={cta}, Número={numero_completo}")
-                            else:
-                                logging.warning(f"Formato de manifesto não reconhecido: {manifesto}")
-                except Exception as e:
-                    logging.error(f"Erro ao processar linha: {str(e)}")
-                    continue
+            # Lê a tabela inteira com uma única chamada ao navegador
+            with metricas.cronometro("ssw: leitura de manifestos"):
+                autorizados = _manifestos_autorizados(snapshot_tabela(driver, "tblsr") or [])
+            manifestos = _filtrar_manifestos_pendentes(
+                autorizados, placa_atual, cidade, estado, estado_veiculos, forcar, diario
+            )
+            manifesto_cta = [cta for cta, _ in manifestos]  # Lista para armazenar apenas o CTA
+            manifesto_numero = [numero for _, numero in manifestos]  # Lista para armazenar apenas os números
 
             # Verificação após processamento
             if manifesto_cta and manifesto_numero:
@@ -188,59 +449,20 @@ def atualizar_sistema_para_placa(placa_atual, cidade, estado):
             if manifesto_cta and manifesto_numero:
                 logging.info(f"Total de manifestos autorizados encontrados: {len(manifesto_cta)}")
                 
-                # Fecha as duas últimas janelas abertas
-                driver.close()
-                driver.switch_to.window(driver.window_handles[-1])
-                driver.close()
-                driver.switch_to.window(driver.window_handles[-1])
-                time.sleep(1)
-                
-                # Continua com o processamento usando os valores separados
-                driver.find_element(By.NAME, "f3").send_keys("33+")
-                time.sleep(1)
-                driver.switch_to.window(driver.window_handles[-1])
-
-                # Itera sobre cada manifesto encontrado
-                for i in range(len(manifesto_cta)):
-                    logging.info(f"Processando manifesto {i+1}/{len(manifesto_cta)}: {manifesto_cta[i]} - {manifesto_numero[i]}")
-                    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, "11")))
-                    driver.find_element(By.ID, "11").send_keys(manifesto_cta[i])  # Usa o índice i
-                    driver.find_element(By.ID, "12").send_keys(manifesto_numero[i])  # Usa o índice i
-                    time.sleep(1)
-                    janela_atual = driver.current_window_handle
-                    driver.find_element(By.ID, "13").click()
-                    time.sleep(1)
-
-                    driver.switch_to.window(driver.window_handles[-1])
-                    time.sleep(1)
-
-                    driver.find_element(By.NAME, "f3").send_keys("41")
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f4").send_keys(datetime.now().strftime("%d%m%y"))
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f5").clear()
-                    time.sleep(0.5)
-                    driver.find_element(By.NAME, "f5").send_keys(datetime.now().strftime("%H%M"))
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f6").send_keys(f"em transf: {cidade} - {estado}")
-                    time.sleep(0.5)
-                    enviar_button = driver.find_element(By.ID, "9")
-                    driver.execute_script("arguments[0].click();", enviar_button)
-                    time.sleep(1)
-                    driver.switch_to.window(janela_atual)
-                    WebDriverWait(driver, 80).until(EC.presence_of_element_located((By.ID, "0")))
-                    ok_button = driver.find_element(By.ID, "0")
-                    driver.execute_script("arguments[0].click();", ok_button)
-                    
-                    time.sleep(1)
+                # Todos os manifestos são lançados na mesma tela da opção 33
+                _lancar_ocorrencias_em_lote(sessao, placa_atual, manifestos, cidade, estado,
+                                            estado_veiculos, diario)
                     
                 logging.info(f"Todos os {len(manifesto_cta)} manifestos foram processados")
             else:
                 logging.warning("Nenhum manifesto autorizado encontrado na tabela")
+            manifestos_em_dia = bool(autorizados)
 
-        except (NoSuchElementException, TimeoutException):
+        else:
             # Se a tabela não existir, executa este bloco
             logging.info("Tabela não encontrada, executando fluxo alternativo...")
+            manifesto_cta = None
+            manifesto_numero = None
             try:
                 # Busca todos os elementos <b> da página
                 elementos_b = driver.find_elements(By.TAG_NAME, "b")
@@ -258,9 +480,6 @@ def atualizar_sistema_para_placa(placa_atual, cidade, estado):
                 form = driver.find_element(By.NAME, "frm")
                 elementos_b = form.find_elements(By.TAG_NAME, "b")
                 
-                manifesto_cta = None
-                manifesto_numero = None
-                
                 for elemento in elementos_b:
                     texto = elemento.text
                     if texto.startswith("CTA"):
@@ -271,104 +490,270 @@ def atualizar_sistema_para_placa(placa_atual, cidade, estado):
                             # Remove o traço e quaisquer caracteres não numéricos
                             manifesto_numero = re.sub(r'[^0-9]', '', match.group(2))
                         break
-                
-                if manifesto_cta and manifesto_numero:
-                    logging.info(f"Manifesto encontrado - CTA: {manifesto_cta}, Número: {manifesto_numero}")
-                    # Fecha as duas últimas janelas abertas
-                    driver.close()
-                    driver.switch_to.window(driver.window_handles[-1])
-                    driver.close()
-                    driver.switch_to.window(driver.window_handles[-1])
-                    time.sleep(1)
-                    
-                    # Continua com o processamento usando os valores separados
-                    driver.find_element(By.NAME, "f3").send_keys("33+")
-                    time.sleep(1)
-                    driver.switch_to.window(driver.window_handles[-1])
-                    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, "11")))
-                    driver.find_element(By.ID, "11").send_keys(manifesto_cta)
-                    driver.find_element(By.ID, "12").send_keys(manifesto_numero)
-                    time.sleep(1)
-                    janela_atual = driver.current_window_handle
-                    driver.find_element(By.ID, "13").click()
-                    time.sleep(1)
-
-                    driver.switch_to.window(driver.window_handles[-1])
-                    time.sleep(1)
-
-                    driver.find_element(By.NAME, "f3").send_keys("41")
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f4").send_keys(datetime.now().strftime("%d%m%y"))
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f5").clear()
-                    time.sleep(0.5)
-                    driver.find_element(By.NAME, "f5").send_keys(datetime.now().strftime("%H%M"))
-                    time.sleep(1)
-                    driver.find_element(By.NAME, "f6").send_keys(f"em transf: {cidade} - {estado}")
-                    time.sleep(0.5)
-                    enviar_button = driver.find_element(By.ID, "9")
-                    driver.execute_script("arguments[0].click();", enviar_button)
-                    time.sleep(1)
-                    driver.switch_to.window(janela_atual)
-                    WebDriverWait(driver, 80).until(EC.presence_of_element_located((By.ID, "0")))
-
-                else:
-                    logging.warning("Nenhum manifesto válido encontrado no formulário")
                     
             except NoSuchElementException:
                 logging.error("Formulário 'frm' não encontrado na página")
+                sucesso = False
             except Exception as e:
                 logging.error(f"Erro ao buscar manifesto: {e}")
+                sucesso = False
+
+            # Assim como na tabela, erros no lançamento vão para o except geral com a causa real
+            if sucesso and manifesto_cta and manifesto_numero:
+                logging.info(f"Manifesto encontrado - CTA: {manifesto_cta}, Número: {manifesto_numero}")
+                pendentes = _filtrar_manifestos_pendentes([(manifesto_cta, manifesto_numero)], placa_atual,
+                                                          cidade, estado, estado_veiculos, forcar, diario)
+                if pendentes:
+                    _lancar_ocorrencias_em_lote(sessao, placa_atual, pendentes, cidade, estado,
+                                                estado_veiculos, diario)
+                manifestos_em_dia = True
+            elif sucesso:
+                logging.warning("Nenhum manifesto válido encontrado no formulário")
 
 
     except Exception as e_geral:
         erro_msg = f"Erro crítico na função atualizar_sistema_para_placa ({placa_atual}): {e_geral}"
         logging.error(erro_msg, exc_info=True)
+        sucesso = False
     finally:
-        if driver:
-            driver.quit()
-            logging.info(f"WebDriver finalizado para placa {placa_atual}.")
+        if sucesso and manifestos_em_dia and estado_veiculos:
+            estado_veiculos.registrar_veiculo(placa_atual, cidade, estado)
+        if not sucesso:
+            # Estado das janelas desconhecido: força novo login na próxima placa
+            # em vez de reaproveitar as opções 23/33 com um formulário pela metade
+            sessao.invalidar()
+        if sessao_propria:
+            sessao.fechar()
+        metricas.registrar("ssw: placa", time.perf_counter() - inicio, placa_atual,
+                           eventos_execucao.OK if sucesso else eventos_execucao.FALHA)
         logging.info(f"Função atualizar_sistema_para_placa ({placa_atual}) concluída.")
+    return sucesso
+
+# Avisa os workers que não haverá mais veículos na fila
+_FIM_DA_FILA = None
 
-def main():
+def _worker_ssw(numero, fila, stop_event, headless, registrar_resultado, estado_veiculos, forcar, diario):
+    """
+    Consome veículos da fila usando uma sessão SSW própria até receber o
+    marcador de fim ou o stop_event ser acionado. O navegador só é aberto
+    quando chega o primeiro veículo.
+    """
+    _contexto_worker.tag = f"W{numero}"
+    # Cada worker tem o seu perfil, caso os perfis persistentes estejam habilitados
+    sessao = SessaoSSW(headless=headless, perfil=f"ssw-{numero}")
+    with _sessoes_lock:
+        _sessoes_ativas.add(sessao)
+    try:
+        while not stop_event.is_set():
+            try:
+                veiculo_info = fila.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if veiculo_info is _FIM_DA_FILA:
+                break
+            placa = veiculo_info['placa']
+            logging.info(f"Atualizando placa {placa} - {veiculo_info['cidade']}/{veiculo_info['estado']}")
+            try:
+                sucesso = atualizar_sistema_para_placa(
+                    placa, veiculo_info['cidade'], veiculo_info['estado'], sessao,
+                    estado_veiculos=estado_veiculos, forcar=forcar, diario=diario,
+                )
+            except Exception as e:
+                logging.error(f"Erro ao atualizar veículo {placa}: {e}")
+                sucesso = False
+            registrar_resultado(veiculo_info, sucesso)
+    finally:
+        sessao.fechar()
+        with _sessoes_lock:
+            _sessoes_ativas.discard(sessao)
+        _contexto_worker.tag = None
+
+def _enfileirar(fila, item, stop_event):
+    """Coloca o item na fila limitada, aguardando vaga; desiste se o stop_event for acionado."""
+    while not stop_event.is_set():
+        try:
+            fila.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def atualizar_veiculos_em_paralelo(veiculos, max_workers=None, stop_event=None,
+                                   ao_concluir_veiculo=None, headless=None,
+                                   forcar_todos=False, estado_veiculos=None, diario=None):
+    """
+    Distribui os veículos entre até max_workers navegadores independentes,
+    cada um com a sua sessão SSW.
+
+    veiculos pode ser uma lista ou um gerador (ex.: iterar_localizacao_veiculos):
+    cada veículo vai para os workers assim que é produzido. A fila entre os dois
+    lados é limitada, então o produtor espera quando os navegadores estão ocupados.
+
+    Veículos cuja cidade/estado não mudou desde a última atualização são
+    pulados, a menos que forcar_todos=True.
+
+    Com um DiarioExecucao, cada placa é registrada como pendente ao entrar na
+    fila e como concluída ou com falha ao terminar; numa execução retomada, as
+    placas já concluídas são puladas.
+
+    ao_concluir_veiculo(concluidos, total, veiculo_info, sucesso) é chamado a
+    cada veículo finalizado; total é o número de veículos enfileirados até o
+    momento. Retorna um resumo com as listas de placas atualizadas, com falha,
+    sem alteração, ignoradas (dados incompletos), já concluídas na execução
+    retomada e não processadas.
+    """
+    max_workers = max(1, max_workers or SSW_MAX_WORKERS)
+    headless = NAVEGADOR_HEADLESS if headless is None else headless
+    stop_event = stop_event or threading.Event()
+
+    esperas.limpar_registro_esperas()
+    estado_veiculos = estado_veiculos or EstadoVeiculos()
+    resumo = {'total': 0, 'atualizados': [], 'falhas': [], 'sem_alteracao': [],
+              'ignorados': [], 'ja_concluidos': [], 'nao_processados': []}
+
+    if hasattr(veiculos, '__len__'):
+        max_workers = min(max_workers, max(1, len(veiculos)))
+    fila = queue.Queue(maxsize=SSW_FILA_MAX or 2 * max_workers)
+
+    lock = threading.Lock()
+    contagem = {'enfileirados': 0, 'concluidos': 0}
+
+    def registrar_resultado(veiculo_info, sucesso):
+        with lock:
+            contagem['concluidos'] += 1
+            resumo['atualizados' if sucesso else 'falhas'].append(veiculo_info['placa'])
+            atual, total = contagem['concluidos'], contagem['enfileirados']
+        if diario:
+            diario.registrar_placa(veiculo_info['placa'],
+                                   diario_execucao.CONCLUIDO if sucesso else diario_execucao.FALHA)
+        if ao_concluir_veiculo:
+            ao_concluir_veiculo(atual, total, veiculo_info, sucesso)
+
+    logging.info(f"Iniciando {max_workers} worker(s) do SSW.")
+    workers = [
+        threading.Thread(
+            target=_worker_ssw,
+            args=(n, fila, stop_event, headless, registrar_resultado, estado_veiculos, forcar_todos, diario),
+            name=f"ssw-worker-{n}",
+            daemon=True,
+        )
+        for n in range(1, max_workers + 1)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for i, veiculo_info in enumerate(veiculos):
+            resumo['total'] += 1
+            if not all([veiculo_info.get('placa'), veiculo_info.get('cidade'), veiculo_info.get('estado')]):
+                logging.warning(f"Veículo {i+1} com dados incompletos. Pulando: {veiculo_info}")
+                resumo['ignorados'].append(veiculo_info.get('placa'))
+                continue
+            if diario and diario.placa_concluida(veiculo_info['placa']):
+                logging.info(f"Veículo {veiculo_info['placa']} já concluído na execução retomada. Pulando.")
+                resumo['ja_concluidos'].append(veiculo_info['placa'])
+                continue
+            if not forcar_todos and estado_veiculos.inalterado(
+                    veiculo_info['placa'], veiculo_info['cidade'], veiculo_info['estado']):
+                logging.info(f"Veículo {veiculo_info['placa']} continua em "
+                             f"{veiculo_info['cidade']}/{veiculo_info['estado']}. Pulando.")
+                resumo['sem_alteracao'].append(veiculo_info['placa'])
+                continue
+            with lock:
+                contagem['enfileirados'] += 1
+            if diario:
+                diario.registrar_placa(veiculo_info['placa'], diario_execucao.PENDENTE,
+                                       cidade=veiculo_info['cidade'], estado=veiculo_info['estado'])
+            if not _enfileirar(fila, veiculo_info, stop_event):
+                resumo['nao_processados'].append(veiculo_info['placa'])
+                break
+    finally:
+        # Interrompido: encerra o produtor (um gerador grava o que já tiver processado)
+        if stop_event.is_set() and hasattr(veiculos, 'close'):
+            veiculos.close()
+        for _ in workers:
+            _enfileirar(fila, _FIM_DA_FILA, stop_event)
+        for worker in workers:
+            worker.join()
+
+    # Veículos que ficaram na fila por causa de uma interrupção
+    while True:
+        try:
+            veiculo_info = fila.get_nowait()
+        except queue.Empty:
+            break
+        if veiculo_info is not _FIM_DA_FILA:
+            resumo['nao_processados'].append(veiculo_info['placa'])
+
+    logging.info(f"Resumo da atualização: {len(resumo['atualizados'])} atualizados, "
+                 f"{len(resumo['falhas'])} com falha, {len(resumo['sem_alteracao'])} sem alteração, "
+                 f"{len(resumo['ignorados'])} ignorados, "
+                 f"{len(resumo['ja_concluidos'])} já concluídos, "
+                 f"{len(resumo['nao_processados'])} não processados.")
+    esperas.registrar_resumo_esperas()
+    return resumo
+
+def executar_pipeline(stop_event=None, ao_concluir_veiculo=None, forcar_todos=False, max_workers=None,
+                      retomar=False):
+    """
+    Consulta as localizações e atualiza o SSW ao mesmo tempo: cada veículo
+    resolvido pelo processador_placas segue direto para os workers do SSW.
+
+    O andamento é gravado no diário da execução. Com retomar=True, a última
+    execução interrompida é continuada, pulando o que já foi concluído nela e
+    repetindo as placas que ficaram pendentes ou com falha.
+
+    Os tempos de cada etapa são gravados em um relatório de métricas
+    (resumo['arquivo_metricas']) e, como eventos com o id da execução, no
+    histórico consultado pelo consultar_eventos.py.
+    """
+    stop_event = stop_event or threading.Event()
+    metricas.limpar()
+    diario = DiarioExecucao.abrir(retomar=retomar)
+    eventos_execucao.iniciar(diario.execucao_id)
+    resumo = None
+    try:
+        veiculos = processador_placas.iterar_localizacao_veiculos(stop_event=stop_event)
+        resumo = atualizar_veiculos_em_paralelo(
+            veiculos, max_workers=max_workers, stop_event=stop_event,
+            ao_concluir_veiculo=ao_concluir_veiculo, forcar_todos=forcar_todos,
+            diario=diario,
+        )
+        metricas.registrar_resumo()
+        resumo['arquivo_metricas'] = metricas.salvar_relatorio()
+        return resumo
+    finally:
+        # Sem o registro de fim, a execução pode ser retomada depois
+        interrompida = resumo is None or stop_event.is_set() or bool(resumo['nao_processados'])
+        diario.finalizar(resumo, interrompida=interrompida)
+        eventos_execucao.finalizar(eventos_execucao.INTERROMPIDA if interrompida else eventos_execucao.CONCLUIDA)
+
+def fechar_sessoes_ativas():
+    """Fecha todos os navegadores abertos pelos workers (usado no encerramento forçado)."""
+    with _sessoes_lock:
+        sessoes = list(_sessoes_ativas)
+    for sessao in sessoes:
+        sessao.fechar()
+
+def main(forcar_todos=False, retomar=False):
     try:
         logging.info("Iniciando script principal...")
         
-        # Obter placas e localizações
-        logging.info("Consultando placas e localizações via processador_placas.py...")
-        _, veiculos_com_localizacao = processador_placas.processar_localizacao_veiculos()
+        def ao_concluir_veiculo(concluidos, total, veiculo_info, sucesso):
+            situacao = "atualizado com sucesso" if sucesso else "com falha na atualização"
+            logging.info(f"Veículo {concluidos}/{total} ({veiculo_info['placa']}) {situacao}.")
+        
+        # Placas e localizações são consultadas enquanto o SSW já é atualizado
+        logging.info("Consultando placas e localizações via processador_placas.py e atualizando o SSW...")
+        resumo = executar_pipeline(ao_concluir_veiculo=ao_concluir_veiculo, forcar_todos=forcar_todos,
+                                   retomar=retomar)
 
-        if not veiculos_com_localizacao:
+        if not resumo['total']:
             logging.warning("Nenhum veículo com localização encontrado. Encerrando processamento.")
             return
         
-        total_veiculos = len(veiculos_com_localizacao)
-        logging.info(f"Total de {total_veiculos} veículos com localização obtidos.")
-        
-        # Iterar sobre cada veículo
-        for i, veiculo_info in enumerate(veiculos_com_localizacao):
-            placa = veiculo_info.get('placa')
-            cidade = veiculo_info.get('cidade')
-            estado = veiculo_info.get('estado')
-            
-            if not all([placa, cidade, estado]):
-                logging.warning(f"Veículo {i+1} com dados incompletos. Pulando: {veiculo_info}")
-                continue
-            
-            logging.info(f"Processando veículo {i+1}/{total_veiculos}: "
-                        f"Placa {placa} - {cidade}/{estado}")
-            
-            try:
-                atualizar_sistema_para_placa(placa, cidade, estado)
-                logging.info(f"Veículo {placa} atualizado com sucesso no sistema.")
-            except Exception as e:
-                logging.error(f"Erro ao atualizar veículo {placa}: {e}")
-            
-            # Aguarda intervalo entre veículos
-            if i < total_veiculos - 1:
-                logging.info("Aguardando intervalo de 5 segundos antes do próximo veículo...")
-                time.sleep(5)
-        
+        if resumo['falhas']:
+            logging.warning(f"Veículos com falha: {resumo['falhas']}")
         logging.info("Atualização de todos os veículos concluída com sucesso!")
         
     except Exception as e:
@@ -377,4 +762,12 @@ def main():
         logging.info("Script principal finalizado.")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Atualiza o SSW com a localização dos veículos.")
+    parser.add_argument("--forcar", action="store_true",
+                        help="atualiza todos os veículos, mesmo os que não mudaram de cidade")
+    parser.add_argument("--retomar", action="store_true",
+                        help="continua a última execução interrompida, pulando o que já foi concluído")
+    args = parser.parse_args()
+    configuracao_log.configurar_log()
+    main(forcar_todos=args.forcar, retomar=args.retomar)
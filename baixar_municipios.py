@@ -0,0 +1,60 @@
+"""
+Baixa a base pública de municípios (código IBGE, nome, centroide e UF) usada
+pela geocodificação offline e grava em MUNICIPIOS_CSV só as colunas que o
+geocodificador_offline lê: nome, latitude, longitude e codigo_uf.
+
+    python baixar_municipios.py
+    python baixar_municipios.py --url https://.../municipios.csv --destino dados/municipios.csv
+
+Rode antes de gerar o executável: o SSW_Updater.spec empacota o arquivo gerado.
+"""
+import io
+import csv
+import argparse
+from pathlib import Path
+
+from cliente_http import obter_sessao
+from config import MUNICIPIOS_CSV
+from geocodificador_offline import ESTADOS_POR_CODIGO_UF
+
+URL_MUNICIPIOS = "https://raw.githubusercontent.com/kelvins/municipios-brasileiros/main/csv/municipios.csv"
+COLUNAS = ("nome", "latitude", "longitude", "codigo_uf")
+
+
+def baixar(url=URL_MUNICIPIOS, destino=MUNICIPIOS_CSV):
+    """Baixa a base, confere as colunas e as UFs e grava o CSV reduzido. Retorna o número de municípios."""
+    response = obter_sessao().get(url, timeout=60)
+    response.raise_for_status()
+    response.encoding = "utf-8"
+    leitor = csv.DictReader(io.StringIO(response.text))
+    faltando = [coluna for coluna in COLUNAS if coluna not in (leitor.fieldnames or ())]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na base de municípios: {', '.join(faltando)}")
+
+    municipios = []
+    for linha in leitor:
+        if int(linha["codigo_uf"]) not in ESTADOS_POR_CODIGO_UF:
+            raise ValueError(f"UF desconhecida na base de municípios: {linha['codigo_uf']} ({linha['nome']})")
+        float(linha["latitude"]), float(linha["longitude"])  # valida as coordenadas
+        municipios.append([linha[coluna] for coluna in COLUNAS])
+
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUNAS)
+        escritor.writerows(sorted(municipios, key=lambda m: (int(m[3]), m[0])))
+    return len(municipios)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Baixa a base de municípios da geocodificação offline.")
+    parser.add_argument("--url", default=URL_MUNICIPIOS, help="CSV com nome, latitude, longitude e codigo_uf")
+    parser.add_argument("--destino", default=MUNICIPIOS_CSV, help=f"arquivo gerado (padrão: {MUNICIPIOS_CSV})")
+    args = parser.parse_args(argv)
+    total = baixar(args.url, args.destino)
+    print(f"{total} municípios gravados em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark offline do robô: executa o código real de consultar_placas,
+processar_localizacao_veiculos e atualizar_sistema_para_placa contra os
+servidores simulados de servidores_simulados.py e mostra a vazão (veículos por
+minuto) e a latência de cada etapa (p50/p95/máx, do módulo metricas).
+
+Uso:
+    python benchmark/executar_benchmark.py
+    python benchmark/executar_benchmark.py --frotas 10 100 --latencia-api 50 150 --erro-api 0.05
+    python benchmark/executar_benchmark.py --frotas 10 --ssw --ssw-workers 3
+
+A etapa do SSW precisa do Edge e do msedgedriver instalados e só roda com --ssw.
+Nenhum sistema de produção é acessado: todas as URLs apontam para 127.0.0.1.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from servidores_simulados import ConfiguracaoSimulacao, iniciar_servidor, SERVICOS
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Benchmark offline do robô com servidores simulados.")
+    parser.add_argument("--frotas", type=int, nargs="+", default=[10, 100, 1000],
+                        help="tamanhos de frota simulados (padrão: 10 100 1000)")
+    for servico in SERVICOS:
+        parser.add_argument(f"--latencia-{servico}", type=float, nargs=2, default=[0, 0],
+                            metavar=("MIN_MS", "MAX_MS"), help=f"latência simulada do {servico}")
+        if servico != "ssw":
+            parser.add_argument(f"--erro-{servico}", type=float, default=0.0, metavar="TAXA",
+                                help=f"fração de respostas 503 do {servico} (0 a 1)")
+    parser.add_argument("--vstrack-ajax", action="store_true",
+                        help="lê o vstrack pelo endpoint AJAX do DataTables em vez do HTML")
+    parser.add_argument("--intervalo-locationiq", type=float, default=0.0,
+                        help="intervalo mínimo entre chamadas à LocationIQ (produção usa 1s)")
+    parser.add_argument("--ssw", action="store_true", help="inclui a atualização do SSW (requer Edge)")
+    parser.add_argument("--ssw-workers", type=int, default=3)
+    parser.add_argument("--manifestos", type=int, default=2, help="manifestos autorizados por placa no SSW")
+    parser.add_argument("--saida", help="grava os resultados em um arquivo JSON")
+    parser.add_argument("--verbose", action="store_true", help="mostra o log do robô")
+    return parser.parse_args()
+
+
+def _configurar_ambiente(url_base, args, diretorio):
+    """
+    Aponta o robô para os servidores simulados. Precisa rodar antes de importar
+    os módulos do projeto, pois o config.py lê as variáveis na importação.
+    """
+    os.environ.update({
+        "VSTRACK_URL": f"{url_base}/vstrack/",
+        "VSTRACK_URL_DADOS": "dados" if args.vstrack_ajax else "",
+        "VSTRACK_MODO_HTTP": "1",
+        "API_BASE_URL": f"{url_base}/api/",
+        "API2_BASE_URL": f"{url_base}/locationiq/reverse",
+        "LOCATIONIQ_API_KEY": "chave-simulada",
+        "LOCATIONIQ_INTERVALO": str(args.intervalo_locationiq),
+        "SSW_URL": f"{url_base}/ssw/",
+        "GEOCODE_OFFLINE": "0",
+        "TOKEN_CACHE_ARQUIVO": "",
+        "GEOCODE_CACHE_ARQUIVO": str(Path(diretorio) / "cache_geocodificacao.json"),
+        "ESTADO_VEICULOS_ARQUIVO": str(Path(diretorio) / "estado_veiculos.json"),
+        "DIARIO_DIR": str(Path(diretorio) / "diarios"),
+        "METRICAS_DIR": str(Path(diretorio) / "metricas"),
+    })
+
+
+def _etapas(metricas):
+    return metricas.relatorio()["etapas"]
+
+
+def _executar_frota(tamanho, configuracao, args, diretorio, modulos):
+    api_client, processador_placas, atualizacao_ssw, metricas, CacheGeocodificacao, EstadoVeiculos = modulos
+    configuracao.veiculos = tamanho
+    configuracao.zerar_contadores()
+    # Cada frota começa com cache de geocodificação e token vazios
+    api_client._cache_geocodificacao = CacheGeocodificacao(str(Path(diretorio) / f"cache_{tamanho}.json"))
+    api_client._gerenciador_token = api_client.GerenciadorToken(
+        None, api_client.TOKEN_MARGEM_RENOVACAO, api_client.TOKEN_VALIDADE_PADRAO)
+    metricas.limpar()
+
+    resultado = {"veiculos": tamanho}
+    inicio = time.perf_counter()
+    _, veiculos = processador_placas.processar_localizacao_veiculos()
+    duracao = time.perf_counter() - inicio
+    localizados = [v for v in veiculos if v.get("cidade") and v.get("estado")]
+    resultado["consulta"] = {
+        "segundos": round(duracao, 2),
+        "localizados": len(localizados),
+        "veiculos_por_minuto": round(len(localizados) / duracao * 60, 1) if duracao else None,
+        "requisicoes": dict(configuracao.requisicoes),
+        "erros_simulados": dict(configuracao.erros),
+    }
+
+    if args.ssw:
+        inicio = time.perf_counter()
+        resumo = atualizacao_ssw.atualizar_veiculos_em_paralelo(
+            localizados, max_workers=args.ssw_workers, headless=True, forcar_todos=True,
+            estado_veiculos=EstadoVeiculos(str(Path(diretorio) / f"estado_{tamanho}.json")),
+        )
+        duracao = time.perf_counter() - inicio
+        resultado["ssw"] = {
+            "segundos": round(duracao, 2),
+            "atualizados": len(resumo["atualizados"]),
+            "falhas": len(resumo["falhas"]),
+            "veiculos_por_minuto": round(len(resumo["atualizados"]) / duracao * 60, 1) if duracao else None,
+        }
+
+    resultado["etapas"] = _etapas(metricas)
+    return resultado
+
+
+def _imprimir(resultado):
+    print(f"\n=== Frota de {resultado['veiculos']} veículos ===")
+    consulta = resultado["consulta"]
+    print(f"Consulta de localização: {consulta['localizados']} localizados em {consulta['segundos']:.2f}s "
+          f"({consulta['veiculos_por_minuto']} veículos/min)")
+    print("Requisições por serviço: " + ", ".join(
+        f"{servico} {qtd} ({consulta['erros_simulados'][servico]} com erro)"
+        for servico, qtd in consulta["requisicoes"].items() if qtd
+    ))
+    if "ssw" in resultado:
+        ssw = resultado["ssw"]
+        print(f"Atualização do SSW: {ssw['atualizados']} atualizados, {ssw['falhas']} com falha "
+              f"em {ssw['segundos']:.2f}s ({ssw['veiculos_por_minuto']} veículos/min)")
+    print(f"{'Etapa':<36}{'qtd':>6}{'p50 (s)':>10}{'p95 (s)':>10}{'máx (s)':>10}")
+    for etapa, est in sorted(resultado["etapas"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"{etapa:<36}{est['quantidade']:>6}{est['p50_s']:>10.3f}{est['p95_s']:>10.3f}{est['max_s']:>10.3f}")
+
+
+def main():
+    args = _argumentos()
+    saida = os.path.abspath(args.saida) if args.saida else None
+    configuracao = ConfiguracaoSimulacao(
+        manifestos_por_placa=args.manifestos,
+        latencia_ms={servico: tuple(getattr(args, f"latencia_{servico}")) for servico in SERVICOS},
+        taxa_erro={servico: getattr(args, f"erro_{servico}") for servico in SERVICOS if servico != "ssw"},
+    )
+    servidor, url_base = iniciar_servidor(configuracao)
+    diretorio = tempfile.mkdtemp(prefix="benchmark_rastreador_")
+    _configurar_ambiente(url_base, args, diretorio)
+
+    sys.path.insert(0, str(RAIZ))
+    import api_client
+    import processador_placas
+    import atualizacao_ssw
+    import metricas
+    import configuracao_log
+    from cache_geocodificacao import CacheGeocodificacao
+    from estado_veiculos import EstadoVeiculos
+    modulos = (api_client, processador_placas, atualizacao_ssw, metricas, CacheGeocodificacao, EstadoVeiculos)
+
+    configuracao_log.configurar_log(arquivo=None, nivel=logging.INFO if args.verbose else logging.WARNING)
+    # O processador grava localizacao_veiculos.json no diretório atual
+    os.chdir(diretorio)
+    print(f"Servidores simulados em {url_base} (arquivos temporários em {diretorio})")
+
+    resultados = []
+    try:
+        for tamanho in args.frotas:
+            resultado = _executar_frota(tamanho, configuracao, args, diretorio, modulos)
+            _imprimir(resultado)
+            resultados.append(resultado)
+    finally:
+        servidor.shutdown()
+
+    if saida:
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
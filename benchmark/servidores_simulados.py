@@ -0,0 +1,297 @@
+"""
+Servidor HTTP local que imita os sistemas externos usados pelo robô, para
+medir desempenho sem tocar em produção:
+
+    /vstrack/     login e tabela datatablesRastreamentosAtivos (HTML ou AJAX do DataTables)
+    /api/         Token, ListaUltimaPosicaoPorPlaca e ListaUltimaPosicao (Posicoes)
+    /locationiq/  reverse com o campo address
+    /ssw/         login, menu, opções 23 e 33, tabela tblsr e formulário de ocorrência
+
+Latência e taxa de erro são configuráveis por serviço. Os erros são respostas
+503, que o cliente HTTP do projeto repete com backoff; no SSW só a latência é
+aplicada, pois uma falha lá custa o timeout de 80s do robô.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SERVICOS = ("vstrack", "api", "locationiq", "ssw")
+
+ESTADOS = ["São Paulo", "Minas Gerais", "Paraná", "Goiás", "Bahia", "Santa Catarina",
+           "Rio Grande do Sul", "Mato Grosso", "Pernambuco", "Federal District"]
+
+
+def placa_do_veiculo(indice):
+    """Placa única por veículo, com traço como aparece no vstrack (ex.: BAA-0042)."""
+    letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    grupo = indice // 10000
+    return f"B{letras[(grupo // 26) % 26]}{letras[grupo % 26]}-{indice % 10000:04d}"
+
+
+def coordenadas_do_veiculo(indice):
+    """Coordenadas determinísticas espalhadas pelo território, uma por veículo."""
+    aleatorio = random.Random(indice)
+    return round(aleatorio.uniform(-30.0, -5.0), 6), round(aleatorio.uniform(-55.0, -35.0), 6)
+
+
+class ConfiguracaoSimulacao:
+    def __init__(self, veiculos=10, manifestos_por_placa=2, latencia_ms=None, taxa_erro=None):
+        self.veiculos = veiculos
+        self.manifestos_por_placa = manifestos_por_placa
+        # {serviço: (mínimo, máximo)} em milissegundos
+        self.latencia_ms = {servico: (0, 0) for servico in SERVICOS}
+        self.latencia_ms.update(latencia_ms or {})
+        self.taxa_erro = {servico: 0.0 for servico in SERVICOS}
+        self.taxa_erro.update(taxa_erro or {})
+        self.requisicoes = {servico: 0 for servico in SERVICOS}
+        self.erros = {servico: 0 for servico in SERVICOS}
+        self._lock = threading.Lock()
+
+    def contar(self, servico, erro):
+        with self._lock:
+            self.requisicoes[servico] += 1
+            if erro:
+                self.erros[servico] += 1
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.requisicoes = {servico: 0 for servico in SERVICOS}
+            self.erros = {servico: 0 for servico in SERVICOS}
+
+    def placas(self):
+        return [placa_do_veiculo(i) for i in range(self.veiculos)]
+
+
+# ==== PÁGINAS DO VSTRACK ====
+
+_VSTRACK_LOGIN = """<html><body>
+<form action="/vstrack/login" method="post">
+  <input type="hidden" name="__RequestVerificationToken" value="token-simulado">
+  <input type="text" name="Email">
+  <input type="password" name="Password">
+  <button id="botaoLogin" type="submit">Entrar</button>
+</form></body></html>"""
+
+
+def _linha_vstrack(indice, placa):
+    return [str(indice + 1), placa, "Motorista", "Cliente", "Origem", "Destino",
+            "Em viagem", "<span>Ativo</span>", "Detalhes"]
+
+
+def _pagina_tabela_vstrack(placas):
+    linhas = "".join(
+        "<tr>" + "".join(f"<td>{c}</td>" for c in _linha_vstrack(i, placa)) + "</tr>"
+        for i, placa in enumerate(placas)
+    )
+    return f"""<html><body>
+<table id="datatablesRastreamentosAtivos"><thead><tr><th>#</th><th>Placa</th></tr></thead>
+<tbody>{linhas}</tbody></table></body></html>"""
+
+
+# ==== PÁGINAS DO SSW ====
+
+_SSW_LOGIN = """<html><body>
+<input name="f1"><input name="f2"><input name="f3"><input name="f4" type="password">
+<button id="5" onclick="location.href='/ssw/menu'">Entrar</button>
+</body></html>"""
+
+# Digitar "NN+" no campo f3 abre a opção NN em uma nova janela, como no SSW
+_SSW_MENU = """<html><body>
+<input name="f2"><input name="f3">
+<script>
+document.getElementsByName('f3')[0].addEventListener('input', function () {
+    const opcao = this.value.match(/^(\\d+)\\+$/);
+    if (opcao) { window.open('/ssw/opcao' + opcao[1], '_blank'); this.value = ''; }
+});
+</script></body></html>"""
+
+_SSW_OPCAO_23 = """<html><body>
+<input name="t_placa_cavalo">
+<button id="12" onclick="window.open('/ssw/manifestos?placa=' +
+    encodeURIComponent(document.getElementsByName('t_placa_cavalo')[0].value), '_blank')">Manifestos</button>
+</body></html>"""
+
+_SSW_OPCAO_33 = """<html><body>
+<input id="11"><input id="12">
+<button id="13" onclick="window.open('/ssw/ocorrencia?manifesto=' +
+    encodeURIComponent(document.getElementById('11').value + document.getElementById('12').value), '_blank')">Abrir</button>
+<div id="confirmacao"></div>
+<script>
+function confirmar() {
+    document.getElementById('confirmacao').innerHTML =
+        '<button id="0" onclick="location.reload()">OK</button>';
+}
+</script></body></html>"""
+
+_SSW_OCORRENCIA = """<html><body>
+<input name="f3"><input name="f4"><input name="f5" value="0000"><input name="f6">
+<button id="9" onclick="enviar()">Enviar</button>
+<script>
+function enviar() {
+    const dados = ['f3', 'f4', 'f5', 'f6'].map((n) => document.getElementsByName(n)[0].value);
+    fetch('/ssw/ocorrencia', {method: 'POST', body: JSON.stringify(dados)}).then(() => {
+        window.opener.confirmar();
+        window.close();
+    });
+}
+</script></body></html>"""
+
+
+def _pagina_manifestos(placa, quantidade):
+    semente = sum(ord(c) for c in placa)
+    linhas = "".join(
+        f"<tr><td>CTA {semente:05d}{n}-{n}</td><td>Origem</td><td>Destino</td><td></td>"
+        f"<td><font color=\"red\">AUTORIZADO</font></td><td>-</td></tr>"
+        for n in range(quantidade)
+    )
+    return f"""<html><body>
+<table id="tblsr"><tr><th>Manifesto</th><th>Origem</th><th>Destino</th><th>Chegada</th>
+<th>Situação</th><th>Obs</th></tr>{linhas}</table></body></html>"""
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    configuracao = None  # ConfiguracaoSimulacao, definida por iniciar_servidor
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo, tipo="text/html; charset=utf-8", cabecalhos=None):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _json(self, dados):
+        self._responder(200, json.dumps(dados, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def _corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(tamanho).decode("utf-8") if tamanho else ""
+
+    def _simular_rede(self, servico):
+        """Aplica a latência do serviço e retorna True se a requisição deve falhar."""
+        config = self.configuracao
+        minimo, maximo = config.latencia_ms[servico]
+        if maximo:
+            time.sleep(random.uniform(minimo, maximo) / 1000)
+        erro = servico != "ssw" and random.random() < config.taxa_erro[servico]
+        config.contar(servico, erro)
+        if erro:
+            self._responder(503, "Serviço indisponível (simulado)")
+        return erro
+
+    def do_GET(self):
+        self._rotear("GET")
+
+    def do_POST(self):
+        self._rotear("POST")
+
+    def _rotear(self, metodo):
+        url = urlparse(self.path)
+        partes = url.path.strip("/").split("/", 1)
+        servico, caminho = partes[0], (partes[1] if len(partes) > 1 else "")
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        corpo = self._corpo() if metodo == "POST" else ""
+        if servico not in SERVICOS:
+            self._responder(404, "Não encontrado")
+            return
+        if self._simular_rede(servico):
+            return
+        getattr(self, f"_{servico}")(metodo, caminho, parametros, corpo)
+
+    def _vstrack(self, metodo, caminho, parametros, corpo):
+        config = self.configuracao
+        if caminho == "login" and metodo == "POST":
+            self._responder(302, "", cabecalhos={"Location": "/vstrack/",
+                                                 "Set-Cookie": "sessao=simulada; Path=/"})
+        elif caminho == "dados" and metodo == "POST":
+            # Endpoint server-side do DataTables: start/length
+            formulario = {chave: valores[-1] for chave, valores in parse_qs(corpo).items()}
+            inicio = int(formulario.get("start", 0))
+            tamanho = int(formulario.get("length", 10))
+            placas = config.placas()
+            pagina = placas[inicio:inicio + tamanho] if tamanho > 0 else placas[inicio:]
+            self._json({
+                "draw": int(formulario.get("draw", 1)),
+                "recordsTotal": len(placas),
+                "recordsFiltered": len(placas),
+                "data": [_linha_vstrack(inicio + i, placa) for i, placa in enumerate(pagina)],
+            })
+        elif "sessao=simulada" in (self.headers.get("Cookie") or ""):
+            self._responder(200, _pagina_tabela_vstrack(config.placas()))
+        else:
+            self._responder(200, _VSTRACK_LOGIN)
+
+    def _api(self, metodo, caminho, parametros, corpo):
+        config = self.configuracao
+        if caminho == "Token":
+            self._json({"access_token": "token-simulado", "expires_in": 3600})
+            return
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            self._responder(401, "Não autorizado")
+            return
+        placas = config.placas()
+        if caminho.endswith("ListaUltimaPosicaoPorPlaca"):
+            placa = parametros.get("placa", "")
+            indices = [i for i, p in enumerate(placas) if p.replace("-", "") == placa.replace("-", "")]
+            self._json({"Posicoes": [self._posicao(i, placas[i]) for i in indices]})
+        elif caminho.endswith("ListaUltimaPosicao"):
+            pagina = int(parametros.get("pagina", 1))
+            tamanho = int(parametros.get("quantidade", 500))
+            inicio = (pagina - 1) * tamanho
+            self._json({"Posicoes": [self._posicao(inicio + i, placa)
+                                     for i, placa in enumerate(placas[inicio:inicio + tamanho])]})
+        else:
+            self._responder(404, "Endpoint não encontrado")
+
+    @staticmethod
+    def _posicao(indice, placa):
+        latitude, longitude = coordenadas_do_veiculo(indice)
+        return {"Placa": placa, "Latitude": latitude, "Longitude": longitude,
+                "DataPosicao": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    def _locationiq(self, metodo, caminho, parametros, corpo):
+        latitude = float(parametros.get("lat", 0))
+        longitude = float(parametros.get("lon", 0))
+        celula = int(abs(latitude) * 10) * 1000 + int(abs(longitude) * 10)
+        self._json({
+            "lat": str(latitude), "lon": str(longitude),
+            "address": {"city": f"Cidade {celula}", "state": ESTADOS[celula % len(ESTADOS)],
+                        "country": "Brasil"},
+        })
+
+    def _ssw(self, metodo, caminho, parametros, corpo):
+        paginas = {"": _SSW_LOGIN, "menu": _SSW_MENU, "opcao23": _SSW_OPCAO_23,
+                   "opcao33": _SSW_OPCAO_33}
+        if caminho == "ocorrencia":
+            if metodo == "POST":
+                self._json({"ok": True})
+            else:
+                self._responder(200, _SSW_OCORRENCIA)
+        elif caminho == "manifestos":
+            self._responder(200, _pagina_manifestos(parametros.get("placa", ""),
+                                                    self.configuracao.manifestos_por_placa))
+        elif caminho in paginas:
+            self._responder(200, paginas[caminho])
+        else:
+            self._responder(404, "Opção não simulada")
+
+
+def iniciar_servidor(configuracao, porta=0):
+    """
+    Sobe o servidor em uma thread e retorna (servidor, url_base). Com porta=0
+    o sistema escolhe uma porta livre.
+    """
+    manipulador = type("ManipuladorSimulado", (_Manipulador,), {"configuracao": configuracao})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="servidor-simulado", daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import logging
+import threading
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude, longitude, precisao=6):
+    """
+    Codifica as coordenadas em geohash. Com precisão 6 cada célula tem cerca
+    de 1,2 km x 0,6 km; pontos na mesma célula compartilham o resultado.
+    """
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    resultado = []
+    bits = 0
+    valor = 0
+    usar_longitude = True
+    while len(resultado) < precisao:
+        if usar_longitude:
+            meio = (lon_min + lon_max) / 2
+            if longitude >= meio:
+                valor = (valor << 1) | 1
+                lon_min = meio
+            else:
+                valor <<= 1
+                lon_max = meio
+        else:
+            meio = (lat_min + lat_max) / 2
+            if latitude >= meio:
+                valor = (valor << 1) | 1
+                lat_min = meio
+            else:
+                valor <<= 1
+                lat_max = meio
+        usar_longitude = not usar_longitude
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32[valor])
+            bits = 0
+            valor = 0
+    return "".join(resultado)
+
+
+class CacheGeocodificacao:
+    """
+    Cache em disco de cidade/estado por célula de geohash, com validade (TTL)
+    e limite de entradas (descarta as menos usadas recentemente).
+    """
+
+    def __init__(self, caminho, precisao=6, ttl_dias=30, max_entradas=5000):
+        self.caminho = caminho
+        self.precisao = precisao
+        self.ttl_segundos = ttl_dias * 86400
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+        self._entradas = self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                entradas = json.load(f)
+            logging.info(f"Cache de geocodificação carregado: {len(entradas)} células")
+            return entradas
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Cache de geocodificação inválido, iniciando vazio: {e}")
+            return {}
+
+    def _salvar(self):
+        # Grava em arquivo temporário e substitui, para não corromper o cache em caso de queda
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self._entradas, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def _expirada(self, entrada, agora):
+        return agora - entrada["criado_em"] > self.ttl_segundos
+
+    def obter(self, latitude, longitude):
+        """Retorna {'cidade', 'estado'} da célula ou None se não houver entrada válida."""
+        chave = geohash(float(latitude), float(longitude), self.precisao)
+        agora = time.time()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and not self._expirada(entrada, agora):
+                entrada["acessado_em"] = agora
+                self.acertos += 1
+                return {"cidade": entrada["cidade"], "estado": entrada["estado"]}
+            if entrada:
+                del self._entradas[chave]
+            self.falhas += 1
+            return None
+
+    def guardar(self, latitude, longitude, localizacao):
+        chave = geohash(float(latitude), float(longitude), self.precisao)
+        agora = time.time()
+        with self._lock:
+            self._entradas[chave] = {
+                "cidade": localizacao["cidade"],
+                "estado": localizacao["estado"],
+                "criado_em": agora,
+                "acessado_em": agora,
+            }
+            self._remover_excedentes(agora)
+            try:
+                self._salvar()
+            except Exception as e:
+                logging.warning(f"Não foi possível salvar o cache de geocodificação: {e}")
+
+    def _remover_excedentes(self, agora):
+        for chave in [c for c, e in self._entradas.items() if self._expirada(e, agora)]:
+            del self._entradas[chave]
+        excedente = len(self._entradas) - self.max_entradas
+        if excedente > 0:
+            menos_usadas = sorted(self._entradas, key=lambda c: self._entradas[c]["acessado_em"])
+            for chave in menos_usadas[:excedente]:
+                del self._entradas[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "entradas": len(self._entradas)}
@@ -0,0 +1,75 @@
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    HTTP_TIMEOUT_CONEXAO, API_TIMEOUT, HTTP_TENTATIVAS, HTTP_BACKOFF,
+    HTTP_BACKOFF_MAX, HTTP_POOL_CONEXOES,
+)
+
+# Status que indicam sobrecarga ou falha temporária do servidor
+STATUS_PARA_REPETIR = (429, 500, 502, 503, 504)
+
+
+class RetryComJitter(Retry):
+    """Backoff exponencial com jitter aleatório, para os workers não repetirem em sincronia."""
+
+    def get_backoff_time(self):
+        espera = super().get_backoff_time()
+        if espera <= 0:
+            return espera
+        return min(HTTP_BACKOFF_MAX, espera + random.uniform(0, espera))
+
+
+class SessaoHTTP(requests.Session):
+    """
+    Sessão com keep-alive e pool de conexões compartilhada pelas chamadas às
+    APIs. Aplica timeout de conexão/leitura padrão quando o chamador não informa;
+    um timeout numérico vale como tempo de leitura.
+    """
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get("timeout")
+        if timeout is None:
+            kwargs["timeout"] = (HTTP_TIMEOUT_CONEXAO, API_TIMEOUT)
+        elif isinstance(timeout, (int, float)):
+            kwargs["timeout"] = (HTTP_TIMEOUT_CONEXAO, timeout)
+        return super().request(method, url, **kwargs)
+
+
+def criar_sessao():
+    retry = RetryComJitter(
+        total=HTTP_TENTATIVAS,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=STATUS_PARA_REPETIR,
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        # Após a última tentativa devolve a resposta para o raise_for_status() do chamador
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONEXOES,
+        pool_maxsize=HTTP_POOL_CONEXOES,
+        max_retries=retry,
+    )
+    sessao = SessaoHTTP()
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+
+_sessao = None
+_sessao_lock = threading.Lock()
+
+
+def obter_sessao():
+    """Retorna a sessão HTTP compartilhada do processo."""
+    global _sessao
+    if _sessao is None:
+        with _sessao_lock:
+            if _sessao is None:
+                _sessao = criar_sessao()
+    return _sessao
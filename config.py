@@ -8,6 +8,101 @@ load_dotenv("credenciais.env")
 API_BASE_URL = os.getenv("API_BASE_URL", "http://vstrack.ddns.net/komando/integracao/")
 API_USER = os.getenv("API_USER", "")
 API_PASSWORD = os.getenv("API_PASSWORD", "")
+# Consultas simultâneas de posição e tempo limite (segundos) de cada requisição
+API_MAX_CONCORRENCIA = int(os.getenv("API_MAX_CONCORRENCIA", "8"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "15"))
+# Token da API: renovado quando faltam N segundos para expirar; cache em disco opcional
+TOKEN_MARGEM_RENOVACAO = float(os.getenv("TOKEN_MARGEM_RENOVACAO", "60"))
+TOKEN_CACHE_ARQUIVO = os.getenv("TOKEN_CACHE_ARQUIVO", "")
+# Validade (segundos) assumida quando o /Token não informa expires_in
+TOKEN_VALIDADE_PADRAO = float(os.getenv("TOKEN_VALIDADE_PADRAO", "3600"))
+# Consulta da frota inteira em uma chamada paginada (com consulta por placa como alternativa).
+# Desativada por padrão: o endpoint e os parâmetros de paginação ainda não foram confirmados na API
+API_MODO_FROTA = os.getenv("API_MODO_FROTA", "0").lower() in ("1", "true", "sim")
+API_FROTA_ENDPOINT = os.getenv("API_FROTA_ENDPOINT", "api/v1/UltimaPosicaoVeiculo/ListaUltimaPosicao")
+API_FROTA_PARAM_PAGINA = os.getenv("API_FROTA_PARAM_PAGINA", "pagina")
+API_FROTA_PARAM_TAMANHO = os.getenv("API_FROTA_PARAM_TAMANHO", "quantidade")
+API_FROTA_TAMANHO_PAGINA = int(os.getenv("API_FROTA_TAMANHO_PAGINA", "500"))
+
+# Cliente HTTP compartilhado (pool de conexões, timeouts e novas tentativas)
+HTTP_TIMEOUT_CONEXAO = float(os.getenv("HTTP_TIMEOUT_CONEXAO", "5"))
+HTTP_TENTATIVAS = int(os.getenv("HTTP_TENTATIVAS", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_CONEXOES = int(os.getenv("HTTP_POOL_CONEXOES", "10"))
 
 API2_BASE_URL = os.getenv("API2_BASE_URL", "https://us1.locationiq.com/v1/reverse")
+# vstrack (lista de rastreadores ativos)
+VSTRACK_URL = os.getenv("VSTRACK_URL", "http://vstrack.ddns.net/komando/PosicaoVeiculoRastreamento/Index")
+# Endpoint AJAX do DataTables; vazio = ler a tabela do HTML da página
+VSTRACK_URL_DADOS = os.getenv("VSTRACK_URL_DADOS", "")
+VSTRACK_MODO_HTTP = os.getenv("VSTRACK_MODO_HTTP", "1").lower() in ("1", "true", "sim")
+VSTRACK_TAMANHO_PAGINA = int(os.getenv("VSTRACK_TAMANHO_PAGINA", "500"))
+
 LOCATIONIQ_API_KEY = os.getenv("LOCATIONIQ_API_KEY", "")  # Chave da LocationIQ
+LOCATIONIQ_INTERVALO = float(os.getenv("LOCATIONIQ_INTERVALO", "1"))  # Segundos entre chamadas
+
+# Cache de geocodificação reversa (células de geohash)
+GEOCODE_CACHE_ARQUIVO = os.getenv("GEOCODE_CACHE_ARQUIVO", "cache_geocodificacao.json")
+GEOCODE_CACHE_PRECISAO = int(os.getenv("GEOCODE_CACHE_PRECISAO", "6"))
+GEOCODE_CACHE_TTL_DIAS = float(os.getenv("GEOCODE_CACHE_TTL_DIAS", "30"))
+GEOCODE_CACHE_MAX_ENTRADAS = int(os.getenv("GEOCODE_CACHE_MAX_ENTRADAS", "5000"))
+
+# Geocodificação offline pela base de municípios do IBGE (centroides), gerada por
+# baixar_municipios.py; sem o CSV, ou longe de qualquer município, a LocationIQ é consultada
+GEOCODE_OFFLINE = os.getenv("GEOCODE_OFFLINE", "1").lower() in ("1", "true", "sim")
+MUNICIPIOS_CSV = os.getenv("MUNICIPIOS_CSV", "dados/municipios.csv")
+GEOCODE_OFFLINE_MAX_KM = float(os.getenv("GEOCODE_OFFLINE_MAX_KM", "30"))
+GEOCODE_LOCATIONIQ_FALLBACK = os.getenv("GEOCODE_LOCATIONIQ_FALLBACK", "1").lower() in ("1", "true", "sim")
+
+# Navegador (Edge) usado pelo Selenium, no vstrack e no SSW (SSW_HEADLESS é o nome antigo da opção)
+NAVEGADOR_HEADLESS = os.getenv("NAVEGADOR_HEADLESS", os.getenv("SSW_HEADLESS", "1")).lower() in ("1", "true", "sim")
+# Não carrega imagens e fontes e bloqueia as URLs abaixo (separadas por vírgula)
+NAVEGADOR_BLOQUEAR_RECURSOS = os.getenv("NAVEGADOR_BLOQUEAR_RECURSOS", "1").lower() in ("1", "true", "sim")
+NAVEGADOR_URLS_BLOQUEADAS = [
+    padrao.strip() for padrao in os.getenv(
+        "NAVEGADOR_URLS_BLOQUEADAS",
+        "*.png,*.jpg,*.jpeg,*.gif,*.webp,*.svg,*.ico,*.woff,*.woff2,*.ttf,*.otf,*.css",
+    ).split(",") if padrao.strip()
+]
+# normal, eager (não espera imagens/CSS) ou none
+NAVEGADOR_CARREGAMENTO = os.getenv("NAVEGADOR_CARREGAMENTO", "eager")
+# Diretório base dos perfis persistentes do navegador (vazio = perfil temporário)
+NAVEGADOR_PERFIL_DIR = os.getenv("NAVEGADOR_PERFIL_DIR", "")
+
+# Agendamento das execuções
+AGENDAMENTOS_ARQUIVO = os.getenv("AGENDAMENTOS_ARQUIVO", "schedules.json")
+# Disparo perdido (PC suspenso, programa fechado) ainda é executado dentro desta tolerância
+AGENDADOR_TOLERANCIA_MIN = float(os.getenv("AGENDADOR_TOLERANCIA_MIN", "15"))
+# Disparo durante uma execução: fila, agrupar (no máximo uma pendente) ou ignorar
+AGENDADOR_SOBREPOSICAO = os.getenv("AGENDADOR_SOBREPOSICAO", "agrupar")
+AGENDADOR_ESTADO_ARQUIVO = os.getenv("AGENDADOR_ESTADO_ARQUIVO", "agendador_estado.json")
+
+# Arquivo de log (em logs/): rotacionado por tamanho e diariamente, compactado em .gz
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_ARQUIVO = os.getenv("LOG_ARQUIVO", "rastreador.log")
+LOG_TAMANHO_MAX_MB = float(os.getenv("LOG_TAMANHO_MAX_MB", "10"))
+LOG_ARQUIVOS_MANTIDOS = int(os.getenv("LOG_ARQUIVOS_MANTIDOS", "14"))
+# Log na interface: só as N últimas linhas ficam na tela, atualizada a cada T ms
+LOG_INTERFACE_NIVEL = os.getenv("LOG_INTERFACE_NIVEL", "INFO").upper()
+LOG_INTERFACE_MAX_LINHAS = int(os.getenv("LOG_INTERFACE_MAX_LINHAS", "5000"))
+LOG_INTERFACE_INTERVALO_MS = int(os.getenv("LOG_INTERFACE_INTERVALO_MS", "100"))
+
+# SSW settings
+SSW_URL = os.getenv("SSW_URL", "https://sistema.ssw.inf.br/bin/ssw0422")
+# Quantidade máxima de navegadores atualizando o SSW ao mesmo tempo
+SSW_MAX_WORKERS = int(os.getenv("SSW_MAX_WORKERS", "3"))
+# Veículos aguardando na fila entre a consulta de localização e o SSW (0 = 2x workers)
+SSW_FILA_MAX = int(os.getenv("SSW_FILA_MAX", "0"))
+# Última cidade/estado informada por placa e manifesto (execuções incrementais)
+ESTADO_VEICULOS_ARQUIVO = os.getenv("ESTADO_VEICULOS_ARQUIVO", "estado_veiculos.json")
+ESTADO_VEICULOS_VALIDADE_HORAS = float(os.getenv("ESTADO_VEICULOS_VALIDADE_HORAS", "24"))
+# Diário de cada execução (retomada após uma queda); fsync a cada N registros ou T segundos
+DIARIO_DIR = os.getenv("DIARIO_DIR", "logs/diarios")
+DIARIO_FSYNC_LOTE = int(os.getenv("DIARIO_FSYNC_LOTE", "20"))
+DIARIO_FSYNC_SEGUNDOS = float(os.getenv("DIARIO_FSYNC_SEGUNDOS", "2"))
+# Relatórios com o tempo de cada etapa da execução
+METRICAS_DIR = os.getenv("METRICAS_DIR", "logs/metricas")
+# Eventos estruturados de cada etapa (JSONL, um arquivo por dia) para o consultar_eventos.py
+EVENTOS_DIR = os.getenv("EVENTOS_DIR", "logs/eventos")
+EVENTOS_FLUSH_SEGUNDOS = float(os.getenv("EVENTOS_FLUSH_SEGUNDOS", "2"))
@@ -0,0 +1,112 @@
+import os
+import sys
+import gzip
+import atexit
+import shutil
+import logging
+import logging.handlers
+import queue
+from datetime import date
+from pathlib import Path
+
+from config import LOG_NIVEL, LOG_ARQUIVO, LOG_TAMANHO_MAX_MB, LOG_ARQUIVOS_MANTIDOS
+
+LOGS_DIR = Path(__file__).resolve().parent / "logs"
+FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Bibliotecas que ficam em INFO mesmo com o log do robô em DEBUG
+_LOGGERS_RUIDOSOS = ("selenium", "urllib3")
+
+_listener = None
+
+
+class ArquivoLogRotativo(logging.handlers.RotatingFileHandler):
+    """
+    Arquivo de log em UTF-8 que é rotacionado ao passar de max_bytes ou na
+    virada do dia. Os arquivos antigos são compactados (arquivo.log.1.gz,
+    .2.gz, ...) e só os backup_count mais recentes são mantidos.
+    """
+
+    def __init__(self, caminho, max_bytes, backup_count):
+        super().__init__(caminho, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.namer = lambda nome: nome + ".gz"
+        self.rotator = self._compactar
+        self._dia = self._dia_do_arquivo()
+
+    def _dia_do_arquivo(self):
+        try:
+            return date.fromtimestamp(os.path.getmtime(self.baseFilename))
+        except OSError:
+            return date.today()
+
+    @staticmethod
+    def _compactar(origem, destino):
+        with open(origem, "rb") as entrada, gzip.open(destino, "wb") as saida:
+            shutil.copyfileobj(entrada, saida)
+        os.remove(origem)
+
+    def shouldRollover(self, record):
+        if date.today() != self._dia and os.path.exists(self.baseFilename) \
+                and os.path.getsize(self.baseFilename) > 0:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._dia = date.today()
+
+
+def configurar_log(arquivo=LOG_ARQUIVO, nivel=LOG_NIVEL, console=sys.stdout, handlers_extras=()):
+    """
+    Configura o log do processo: os módulos só enfileiram os registros
+    (QueueHandler) e uma thread própria (QueueListener) os escreve no arquivo
+    logs/<arquivo>, no console e nos handlers_extras. Assim a escrita em disco,
+    a rotação e a compactação nunca seguram o Selenium ou as chamadas à API.
+
+    arquivo=None ou console=None desativam a saída correspondente. Chamadas
+    seguintes substituem a configuração anterior.
+    """
+    global _listener
+    encerrar_log()
+
+    handlers = []
+    if arquivo:
+        LOGS_DIR.mkdir(exist_ok=True)
+        handlers.append(ArquivoLogRotativo(
+            LOGS_DIR / arquivo, int(LOG_TAMANHO_MAX_MB * 1024 * 1024), LOG_ARQUIVOS_MANTIDOS,
+        ))
+    if console is not None:
+        handlers.append(logging.StreamHandler(console))
+    formatador = logging.Formatter(FORMATO)
+    for handler in handlers:
+        handler.setFormatter(formatador)
+    handlers.extend(handlers_extras)
+
+    fila = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+        handler.close()
+    raiz.addHandler(logging.handlers.QueueHandler(fila))
+    # O nível da raiz vale para todos os handlers: abaixo dele o registro nem é criado
+    raiz.setLevel(nivel)
+    for nome in _LOGGERS_RUIDOSOS:
+        logging.getLogger(nome).setLevel(max(logging.INFO, raiz.level))
+
+    _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def encerrar_log():
+    """Escreve o que ainda está na fila e fecha os arquivos de log."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(encerrar_log)
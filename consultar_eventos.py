@@ -0,0 +1,137 @@
+"""
+Consultas ao histórico de eventos das execuções (logs/eventos/eventos_AAAAMMDD.jsonl).
+Os arquivos são lidos linha a linha e só os dias pedidos são abertos.
+
+    python consultar_eventos.py vazao --dias 7
+    python consultar_eventos.py etapas --desde 2026-10-01 --ate 2026-10-15
+    python consultar_eventos.py lentas --etapa "ssw: placa" --limite 20
+    python consultar_eventos.py falhas --dias 30
+"""
+import heapq
+import argparse
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+import metricas
+import eventos_execucao
+from config import EVENTOS_DIR
+
+ETAPA_PLACA_SSW = "ssw: placa"
+
+
+def _data(texto):
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {texto}")
+
+
+def _eventos(args):
+    desde = args.desde
+    if args.dias:
+        desde = max(desde or date.min, date.today() - timedelta(days=args.dias - 1))
+    return eventos_execucao.ler(args.diretorio, desde, args.ate)
+
+
+def vazao(eventos):
+    """Por dia: execuções, placas atualizadas no SSW, falhas e placas por minuto de execução."""
+    dias = defaultdict(lambda: {"execucoes": set(), "interrompidas": 0, "ok": 0, "falhas": 0, "tempo_ms": 0.0})
+    for evento in eventos:
+        dia = dias[evento["ts"][:10]]
+        dia["execucoes"].add(evento["execucao"])
+        if evento["etapa"] == ETAPA_PLACA_SSW:
+            dia["ok" if evento["resultado"] == eventos_execucao.OK else "falhas"] += 1
+        elif evento["etapa"] == eventos_execucao.ETAPA_EXECUCAO:
+            dia["tempo_ms"] += evento["duracao_ms"]
+            if evento["resultado"] == eventos_execucao.INTERROMPIDA:
+                dia["interrompidas"] += 1
+
+    print(f"{'Dia':<12}{'execuções':>10}{'interromp.':>11}{'placas ok':>11}{'falhas':>8}"
+          f"{'tempo (min)':>13}{'placas/min':>12}")
+    for dia, dados in sorted(dias.items()):
+        minutos = dados["tempo_ms"] / 60000
+        por_minuto = f"{dados['ok'] / minutos:.1f}" if minutos else "-"
+        print(f"{dia:<12}{len(dados['execucoes']):>10}{dados['interrompidas']:>11}{dados['ok']:>11}"
+              f"{dados['falhas']:>8}{minutos:>13.1f}{por_minuto:>12}")
+
+
+def etapas(eventos, etapa=None):
+    """Por etapa: quantidade, falhas e p50/p95/máx da duração."""
+    duracoes = defaultdict(list)
+    falhas = Counter()
+    for evento in eventos:
+        if etapa and evento["etapa"] != etapa:
+            continue
+        duracoes[evento["etapa"]].append(evento["duracao_ms"] / 1000)
+        if evento["resultado"] in (eventos_execucao.FALHA, eventos_execucao.ERRO):
+            falhas[evento["etapa"]] += 1
+
+    print(f"{'Etapa':<36}{'qtd':>8}{'falhas':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'máx (s)':>10}")
+    for nome, valores in sorted(duracoes.items(), key=lambda item: -sum(item[1])):
+        valores.sort()
+        print(f"{nome:<36}{len(valores):>8}{falhas[nome]:>8}{metricas.percentil(valores, 50):>10.2f}"
+              f"{metricas.percentil(valores, 95):>10.2f}{valores[-1]:>10.2f}")
+
+
+def lentas(eventos, etapa=ETAPA_PLACA_SSW, limite=10):
+    """As medições mais demoradas da etapa, com a placa e a execução."""
+    selecionados = (evento for evento in eventos if evento["etapa"] == etapa)
+    print(f"{'Quando':<21}{'Placa':<10}{'duração (s)':>12}  {'resultado':<10}Execução")
+    for evento in heapq.nlargest(limite, selecionados, key=lambda evento: evento["duracao_ms"]):
+        print(f"{evento['ts'][:19]:<21}{evento['placa'] or '-':<10}{evento['duracao_ms'] / 1000:>12.2f}  "
+              f"{evento['resultado']:<10}{evento['execucao']}")
+
+
+def falhas(eventos, limite=10):
+    """Taxa de falha por etapa e as placas que mais falharam."""
+    total = Counter()
+    falhas_etapa = Counter()
+    erros_etapa = Counter()
+    falhas_placa = Counter()
+    for evento in eventos:
+        total[evento["etapa"]] += 1
+        if evento["resultado"] == eventos_execucao.FALHA:
+            falhas_etapa[evento["etapa"]] += 1
+        elif evento["resultado"] == eventos_execucao.ERRO:
+            erros_etapa[evento["etapa"]] += 1
+        else:
+            continue
+        if evento["placa"]:
+            falhas_placa[(evento["placa"], evento["etapa"])] += 1
+
+    print(f"{'Etapa':<36}{'qtd':>8}{'falhas':>8}{'erros':>8}{'taxa':>8}")
+    for nome, quantidade in total.most_common():
+        if nome == eventos_execucao.ETAPA_EXECUCAO:
+            continue
+        taxa = (falhas_etapa[nome] + erros_etapa[nome]) / quantidade
+        print(f"{nome:<36}{quantidade:>8}{falhas_etapa[nome]:>8}{erros_etapa[nome]:>8}{taxa:>8.1%}")
+    if falhas_placa:
+        print("\nPlacas com mais falhas:")
+        for (placa, nome), quantidade in falhas_placa.most_common(limite):
+            print(f"  {placa:<10}{nome:<36}{quantidade:>5}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta o histórico de eventos das execuções.")
+    parser.add_argument("consulta", choices=("vazao", "etapas", "lentas", "falhas"))
+    parser.add_argument("--desde", type=_data, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=_data, help="último dia (AAAA-MM-DD)")
+    parser.add_argument("--dias", type=int, help="só os últimos N dias (incluindo hoje)")
+    parser.add_argument("--etapa", help=f"etapa consultada (lentas: padrão '{ETAPA_PLACA_SSW}')")
+    parser.add_argument("--limite", type=int, default=10, help="linhas em lentas/falhas (padrão: 10)")
+    parser.add_argument("--diretorio", default=EVENTOS_DIR, help=f"diretório dos eventos (padrão: {EVENTOS_DIR})")
+    args = parser.parse_args(argv)
+
+    eventos = _eventos(args)
+    if args.consulta == "vazao":
+        vazao(eventos)
+    elif args.consulta == "etapas":
+        etapas(eventos, args.etapa)
+    elif args.consulta == "lentas":
+        lentas(eventos, args.etapa or ETAPA_PLACA_SSW, args.limite)
+    else:
+        falhas(eventos, args.limite)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from config import DIARIO_DIR, DIARIO_FSYNC_LOTE, DIARIO_FSYNC_SEGUNDOS
+
+# Situações registradas para placas e manifestos
+PENDENTE = "pendente"
+CONCLUIDO = "concluido"
+FALHA = "falha"
+
+
+class DiarioExecucao:
+    """
+    Diário append-only (JSONL, um arquivo por execução) com o resultado de cada
+    placa e manifesto enviado ao SSW. Cada linha é gravada imediatamente no
+    arquivo; o fsync é feito em lotes (a cada N registros ou T segundos) e no
+    encerramento.
+
+    Uma execução sem o registro "fim" foi interrompida e pode ser retomada:
+    as placas e manifestos já concluídos nela são pulados.
+    """
+
+    def __init__(self, caminho, execucao_id, retomada=False):
+        self.caminho = Path(caminho)
+        self.execucao_id = execucao_id
+        self.retomada = retomada
+        self._placas = {}
+        self._manifestos = set()
+        self._lock = threading.Lock()
+        self._pendentes_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+        if retomada:
+            self._carregar()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._gravar({"tipo": "retomada" if retomada else "inicio"})
+
+    @classmethod
+    def abrir(cls, retomar=False, diretorio=DIARIO_DIR):
+        """
+        Abre um diário novo ou, com retomar=True, continua a última execução
+        interrompida (se não houver nenhuma, começa uma nova).
+        """
+        diretorio = Path(diretorio)
+        if retomar:
+            interrompida = cls._ultima_interrompida(diretorio)
+            if interrompida:
+                execucao_id = interrompida.stem.replace("diario_", "", 1)
+                logging.info(f"Retomando a execução interrompida {execucao_id}")
+                return cls(interrompida, execucao_id, retomada=True)
+            logging.info("Nenhuma execução interrompida encontrada. Iniciando uma nova.")
+        execucao_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return cls(diretorio / f"diario_{execucao_id}.jsonl", execucao_id)
+
+    @staticmethod
+    def _ultima_interrompida(diretorio):
+        arquivos = sorted(diretorio.glob("diario_*.jsonl"))
+        if not arquivos:
+            return None
+        ultimo = arquivos[-1]
+        with open(ultimo, "r", encoding="utf-8") as f:
+            for linha in f:
+                if '"tipo": "fim"' in linha:
+                    return None
+        return ultimo
+
+    def _carregar(self):
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for numero, linha in enumerate(f, 1):
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    # Última linha cortada por uma queda: ignora
+                    logging.warning(f"Linha {numero} do diário {self.caminho.name} inválida, ignorada")
+                    continue
+                if registro.get("tipo") == "placa":
+                    self._placas[registro["placa"]] = registro["status"]
+                elif registro.get("tipo") == "manifesto" and registro.get("status") == CONCLUIDO:
+                    self._manifestos.add((registro["placa"], registro["manifesto"]))
+        concluidas = sum(1 for status in self._placas.values() if status == CONCLUIDO)
+        logging.info(f"Diário carregado: {concluidas} placas e {len(self._manifestos)} manifestos já concluídos")
+
+    def _gravar(self, registro):
+        registro = {"ts": datetime.now().isoformat(timespec="seconds"),
+                    "execucao": self.execucao_id, **registro}
+        with self._lock:
+            if self._arquivo is None:
+                return
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            self._arquivo.flush()
+            self._pendentes_fsync += 1
+            if (self._pendentes_fsync >= DIARIO_FSYNC_LOTE
+                    or time.monotonic() - self._ultimo_fsync >= DIARIO_FSYNC_SEGUNDOS):
+                self._sincronizar()
+
+    def _sincronizar(self):
+        os.fsync(self._arquivo.fileno())
+        self._pendentes_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def registrar_placa(self, placa, status, **extra):
+        with self._lock:
+            self._placas[placa] = status
+        self._gravar({"tipo": "placa", "placa": placa, "status": status, **extra})
+
+    def registrar_manifesto(self, placa, manifesto, status):
+        if status == CONCLUIDO:
+            with self._lock:
+                self._manifestos.add((placa, manifesto))
+        self._gravar({"tipo": "manifesto", "placa": placa, "manifesto": manifesto, "status": status})
+
+    def placa_concluida(self, placa):
+        with self._lock:
+            return self._placas.get(placa) == CONCLUIDO
+
+    def manifesto_concluido(self, placa, manifesto):
+        with self._lock:
+            return (placa, manifesto) in self._manifestos
+
+    def finalizar(self, resumo=None, interrompida=False):
+        """
+        Fecha o diário. Uma execução interrompida não recebe o registro "fim"
+        e poderá ser retomada.
+        """
+        if not interrompida:
+            contagens = {chave: len(valor) for chave, valor in (resumo or {}).items() if isinstance(valor, list)}
+            self._gravar({"tipo": "fim", "resumo": contagens})
+        with self._lock:
+            if self._arquivo is not None:
+                self._sincronizar()
+                self._arquivo.close()
+                self._arquivo = None
@@ -0,0 +1,139 @@
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+# Intervalo entre verificações das condições (o padrão do Selenium é 0.5s)
+INTERVALO_VERIFICACAO = 0.1
+
+# Duração real de cada espera, agrupada pela descrição
+_duracoes = defaultdict(list)
+_duracoes_lock = threading.Lock()
+
+
+def _registrar(descricao, inicio):
+    duracao = time.perf_counter() - inicio
+    with _duracoes_lock:
+        _duracoes[descricao].append(duracao)
+    logging.debug(f"Espera '{descricao}' concluída em {duracao:.2f}s")
+    return duracao
+
+
+def _aguardar(driver, condicao, timeout, descricao):
+    inicio = time.perf_counter()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=INTERVALO_VERIFICACAO).until(condicao)
+    finally:
+        _registrar(descricao, inicio)
+
+
+def aguardar_elemento(driver, by, valor, timeout=20, descricao=None):
+    """Aguarda o elemento existir na página e o retorna."""
+    return _aguardar(driver, EC.presence_of_element_located((by, valor)), timeout,
+                     descricao or f"elemento {valor}")
+
+
+def aguardar_clicavel(driver, by, valor, timeout=20, descricao=None):
+    """Aguarda o elemento estar visível e habilitado e o retorna."""
+    return _aguardar(driver, EC.element_to_be_clickable((by, valor)), timeout,
+                     descricao or f"clicável {valor}")
+
+
+def aguardar_nova_janela(driver, handles_antes, timeout=20, descricao="nova janela"):
+    """
+    Aguarda surgir uma janela que não estava em handles_antes, troca para ela
+    e retorna o seu handle.
+    """
+    handles_antes = set(handles_antes)
+
+    def nova_janela(d):
+        novas = [h for h in d.window_handles if h not in handles_antes]
+        return novas[-1] if novas else False
+
+    handle = _aguardar(driver, nova_janela, timeout, descricao)
+    driver.switch_to.window(handle)
+    return handle
+
+
+def valor_igual(lido, esperado):
+    return lido == str(esperado).strip()
+
+
+def nao_vazio(lido, esperado):
+    """Só confere que o campo recebeu algo (ex.: senha, que não se compara)."""
+    return bool(lido) or not str(esperado).strip()
+
+
+def mesmos_digitos(lido, esperado):
+    """Compara só os dígitos, ignorando a máscara do campo (hora 1430 = 14:30)."""
+    return bool(lido) and re.sub(r"\D", "", lido) == re.sub(r"\D", "", str(esperado))
+
+
+def mesma_data(lido, esperado):
+    """Data digitada como ddmmaa; o campo pode exibi-la como dd/mm/aa ou dd/mm/aaaa."""
+    digitos = re.sub(r"\D", "", lido)
+    if len(digitos) == 8:
+        digitos = digitos[:4] + digitos[6:]
+    return bool(lido) and digitos == re.sub(r"\D", "", str(esperado))
+
+
+def _normalizar_texto(texto):
+    return " ".join(texto.split()).casefold()
+
+
+def prefixo(lido, esperado):
+    """Aceita o texto cortado pelo maxlength do campo (sem diferenciar maiúsculas e espaços)."""
+    return bool(lido) and _normalizar_texto(str(esperado)).startswith(_normalizar_texto(lido))
+
+
+def aguardar_valor_campo(driver, by, valor, esperado, timeout=10, descricao=None, comparar=valor_igual):
+    """
+    Aguarda o campo de formulário conter o valor esperado, segundo
+    comparar(valor_lido, esperado) (valor_lido já sem espaços nas pontas).
+    """
+    def campo_preenchido(d):
+        try:
+            return comparar((d.find_element(by, valor).get_attribute("value") or "").strip(), esperado)
+        except StaleElementReferenceException:
+            return False
+
+    return _aguardar(driver, campo_preenchido, timeout, descricao or f"campo {valor} preenchido")
+
+
+def aguardar_obsoleto(driver, elemento, timeout=10, descricao="recarga da página"):
+    """
+    Aguarda o elemento sair do DOM (página recarregada). Retorna False em vez
+    de levantar exceção se a página não recarregar dentro do tempo.
+    """
+    try:
+        _aguardar(driver, EC.staleness_of(elemento), timeout, descricao)
+        return True
+    except TimeoutException:
+        return False
+
+
+def resumo_esperas():
+    """Retorna {descrição: (quantidade, total_s, media_s, max_s)} das esperas registradas."""
+    with _duracoes_lock:
+        return {
+            descricao: (len(valores), sum(valores), sum(valores) / len(valores), max(valores))
+            for descricao, valores in _duracoes.items() if valores
+        }
+
+
+def limpar_registro_esperas():
+    with _duracoes_lock:
+        _duracoes.clear()
+
+
+def registrar_resumo_esperas():
+    """Escreve no log o tempo gasto em cada tipo de espera."""
+    for descricao, (qtd, total, media, maximo) in sorted(resumo_esperas().items(),
+                                                         key=lambda item: -item[1][1]):
+        logging.info(f"Espera '{descricao}': {qtd}x, total {total:.1f}s, "
+                     f"média {media:.2f}s, máx {maximo:.2f}s")
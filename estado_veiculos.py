@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from config import ESTADO_VEICULOS_ARQUIVO, ESTADO_VEICULOS_VALIDADE_HORAS
+
+
+class EstadoVeiculos:
+    """
+    Última cidade/estado informada ao SSW para cada placa e cada manifesto,
+    persistida em JSON entre execuções:
+
+        {placa: {cidade, estado, atualizado_em,
+                 manifestos: {manifesto: {cidade, estado, atualizado_em}}}}
+
+    Um registro mais antigo que validade_horas deixa de valer (0 = sem validade).
+    """
+
+    def __init__(self, caminho=ESTADO_VEICULOS_ARQUIVO, validade_horas=ESTADO_VEICULOS_VALIDADE_HORAS):
+        self.caminho = caminho
+        self.validade_segundos = validade_horas * 3600
+        self._lock = threading.Lock()
+        self._veiculos = self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Arquivo de estado dos veículos inválido, iniciando vazio: {e}")
+            return {}
+
+    def _salvar(self):
+        temporario = f"{self.caminho}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self._veiculos, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except Exception as e:
+            logging.warning(f"Não foi possível salvar o estado dos veículos: {e}")
+
+    def _mesmo_local(self, registro, cidade, estado):
+        if not registro or registro.get("cidade") != cidade or registro.get("estado") != estado:
+            return False
+        if self.validade_segundos and time.time() - registro.get("atualizado_em", 0) > self.validade_segundos:
+            return False
+        return True
+
+    def inalterado(self, placa, cidade, estado):
+        """True se a última atualização da placa já informou esta cidade/estado."""
+        with self._lock:
+            return self._mesmo_local(self._veiculos.get(placa), cidade, estado)
+
+    def manifesto_atualizado(self, placa, manifesto, cidade, estado):
+        """True se a ocorrência desta cidade/estado já foi lançada para o manifesto."""
+        with self._lock:
+            manifestos = self._veiculos.get(placa, {}).get("manifestos", {})
+            return self._mesmo_local(manifestos.get(manifesto), cidade, estado)
+
+    def registrar_manifesto(self, placa, manifesto, cidade, estado):
+        with self._lock:
+            veiculo = self._veiculos.setdefault(placa, {"manifestos": {}})
+            veiculo.setdefault("manifestos", {})[manifesto] = {
+                "cidade": cidade, "estado": estado, "atualizado_em": time.time()
+            }
+            self._salvar()
+
+    def registrar_veiculo(self, placa, cidade, estado):
+        with self._lock:
+            veiculo = self._veiculos.setdefault(placa, {"manifestos": {}})
+            veiculo.update({"cidade": cidade, "estado": estado, "atualizado_em": time.time()})
+            self._salvar()
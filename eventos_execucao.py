@@ -0,0 +1,143 @@
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from config import EVENTOS_DIR, EVENTOS_FLUSH_SEGUNDOS
+
+# Resultado de cada etapa medida
+OK = "ok"
+FALHA = "falha"  # a etapa terminou, mas sem o resultado esperado
+ERRO = "erro"    # a etapa terminou com exceção
+
+# Etapa que registra a execução inteira (duração total e se foi concluída ou interrompida)
+ETAPA_EXECUCAO = "execucao"
+CONCLUIDA = "concluida"
+INTERROMPIDA = "interrompida"
+
+
+class RegistroEventos:
+    """
+    Grava um evento por etapa medida (o que o metricas registra) em
+    diretorio/eventos_AAAAMMDD.jsonl, um arquivo append-only por dia:
+
+        {"ts": "...", "execucao": "...", "placa": "ABC1D23", "etapa": "ssw: placa",
+         "duracao_ms": 8123.4, "resultado": "ok"}
+
+    As linhas vão para o buffer do arquivo; uma thread própria o descarrega a
+    cada EVENTOS_FLUSH_SEGUNDOS (mesmo sem eventos novos, para uma execução
+    travada ou derrubada não perder o final) e o encerramento descarrega o resto.
+    """
+
+    def __init__(self, execucao_id, diretorio=EVENTOS_DIR):
+        self.execucao_id = execucao_id
+        self.diretorio = Path(diretorio)
+        self._lock = threading.Lock()
+        self._arquivo = None
+        self._dia = None
+        self._desativado = False
+        self._inicio = time.perf_counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._descarregar_periodicamente, name="eventos-flush", daemon=True)
+        self._thread.start()
+
+    def _descarregar_periodicamente(self):
+        while not self._parar.wait(EVENTOS_FLUSH_SEGUNDOS):
+            with self._lock:
+                if self._arquivo is None or self._desativado:
+                    continue
+                try:
+                    self._arquivo.flush()
+                except OSError as e:
+                    logging.warning(f"Não foi possível gravar os eventos da execução: {e}")
+                    self._desativado = True
+
+    def _arquivo_do_dia(self, dia):
+        if dia != self._dia:
+            if self._arquivo is not None:
+                self._arquivo.close()
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.diretorio / f"eventos_{dia:%Y%m%d}.jsonl", "a", encoding="utf-8")
+            self._dia = dia
+        return self._arquivo
+
+    def registrar(self, etapa, duracao, placa=None, resultado=OK):
+        agora = datetime.now()
+        linha = json.dumps({
+            "ts": agora.isoformat(timespec="milliseconds"),
+            "execucao": self.execucao_id,
+            "placa": placa,
+            "etapa": etapa,
+            "duracao_ms": round(duracao * 1000, 1),
+            "resultado": resultado,
+        }, ensure_ascii=False)
+        with self._lock:
+            if self._desativado:
+                return
+            try:
+                arquivo = self._arquivo_do_dia(agora.date())
+                arquivo.write(linha + "\n")
+            except OSError as e:
+                # Sem os eventos a execução continua; só o histórico fica incompleto
+                logging.warning(f"Não foi possível gravar os eventos da execução: {e}")
+                self._desativado = True
+
+    def fechar(self, resultado=None):
+        """Registra a duração total da execução (se resultado for informado) e fecha o arquivo."""
+        if resultado:
+            self.registrar(ETAPA_EXECUCAO, time.perf_counter() - self._inicio, resultado=resultado)
+        self._parar.set()
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+            self._arquivo = None
+            self._desativado = True
+
+
+# Registro da execução em andamento (None = eventos desativados)
+_registro = None
+
+
+def iniciar(execucao_id, diretorio=EVENTOS_DIR):
+    global _registro
+    finalizar()
+    _registro = RegistroEventos(execucao_id, diretorio)
+    return _registro
+
+
+def registrar(etapa, duracao, placa=None, resultado=OK):
+    registro = _registro
+    if registro is not None:
+        registro.registrar(etapa, duracao, placa, resultado)
+
+
+def finalizar(resultado=None):
+    global _registro
+    registro, _registro = _registro, None
+    if registro is not None:
+        registro.fechar(resultado)
+
+
+def arquivos(diretorio=EVENTOS_DIR, desde=None, ate=None):
+    """Arquivos de eventos em ordem cronológica, filtrados pelo dia no nome (date ou None)."""
+    for caminho in sorted(Path(diretorio).glob("eventos_*.jsonl")):
+        try:
+            dia = datetime.strptime(caminho.stem.replace("eventos_", "", 1), "%Y%m%d").date()
+        except ValueError:
+            continue
+        if (desde and dia < desde) or (ate and dia > ate):
+            continue
+        yield dia, caminho
+
+
+def ler(diretorio=EVENTOS_DIR, desde=None, ate=None):
+    """Lê os eventos linha a linha, sem carregar os arquivos inteiros (linhas inválidas são ignoradas)."""
+    for _, caminho in arquivos(diretorio, desde, ate):
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
@@ -0,0 +1,134 @@
+import csv
+import math
+import logging
+import threading
+
+# Código IBGE da UF -> nome do estado, no mesmo formato devolvido pela LocationIQ
+ESTADOS_POR_CODIGO_UF = {
+    11: "Rondônia", 12: "Acre", 13: "Amazonas", 14: "Roraima", 15: "Pará",
+    16: "Amapá", 17: "Tocantins", 21: "Maranhão", 22: "Piauí", 23: "Ceará",
+    24: "Rio Grande do Norte", 25: "Paraíba", 26: "Pernambuco", 27: "Alagoas",
+    28: "Sergipe", 29: "Bahia", 31: "Minas Gerais", 32: "Espírito Santo",
+    33: "Rio de Janeiro", 35: "São Paulo", 41: "Paraná", 42: "Santa Catarina",
+    43: "Rio Grande do Sul", 50: "Mato Grosso do Sul", 51: "Mato Grosso",
+    52: "Goiás", 53: "Distrito Federal",
+}
+
+RAIO_TERRA_KM = 6371.0
+
+
+def _para_xyz(latitude, longitude):
+    """Converte lat/lon em um ponto da esfera unitária (distância euclidiana ~ distância real)."""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+class _NoKD:
+    __slots__ = ("ponto", "indice", "eixo", "esquerda", "direita")
+
+    def __init__(self, ponto, indice, eixo, esquerda, direita):
+        self.ponto = ponto
+        self.indice = indice
+        self.eixo = eixo
+        self.esquerda = esquerda
+        self.direita = direita
+
+
+def _construir_arvore(pontos, profundidade=0):
+    if not pontos:
+        return None
+    eixo = profundidade % 3
+    pontos.sort(key=lambda p: p[0][eixo])
+    meio = len(pontos) // 2
+    return _NoKD(
+        pontos[meio][0], pontos[meio][1], eixo,
+        _construir_arvore(pontos[:meio], profundidade + 1),
+        _construir_arvore(pontos[meio + 1:], profundidade + 1),
+    )
+
+
+def _mais_proximo(no, alvo, melhor):
+    """
+    Busca o vizinho mais próximo; melhor = [distância², índice]. Desce primeiro
+    pelo lado do alvo e só visita o outro lado se o plano de corte estiver mais
+    perto que o melhor encontrado até agora.
+    """
+    if no is None:
+        return melhor
+    ponto = no.ponto
+    distancia = (ponto[0] - alvo[0]) ** 2 + (ponto[1] - alvo[1]) ** 2 + (ponto[2] - alvo[2]) ** 2
+    if distancia < melhor[0]:
+        melhor[0] = distancia
+        melhor[1] = no.indice
+    diferenca = alvo[no.eixo] - ponto[no.eixo]
+    proximo, oposto = (no.esquerda, no.direita) if diferenca < 0 else (no.direita, no.esquerda)
+    _mais_proximo(proximo, alvo, melhor)
+    if diferenca * diferenca < melhor[0]:
+        _mais_proximo(oposto, alvo, melhor)
+    return melhor
+
+
+class GeocodificadorOffline:
+    """
+    Geocodificação reversa sem rede: devolve o município cujo centroide (IBGE)
+    é o mais próximo das coordenadas, desde que esteja a no máximo distancia_max_km.
+
+    O CSV precisa das colunas nome, latitude, longitude e codigo_uf (formato da
+    base pública de municípios do IBGE).
+    """
+
+    def __init__(self, caminho_csv, distancia_max_km=30):
+        self.municipios = []
+        with open(caminho_csv, "r", encoding="utf-8") as f:
+            for linha in csv.DictReader(f):
+                estado = ESTADOS_POR_CODIGO_UF.get(int(linha["codigo_uf"]))
+                if estado:
+                    self.municipios.append(
+                        (linha["nome"], estado, float(linha["latitude"]), float(linha["longitude"]))
+                    )
+        pontos = [(_para_xyz(lat, lon), i) for i, (_, _, lat, lon) in enumerate(self.municipios)]
+        self._arvore = _construir_arvore(pontos)
+        # Distância máxima convertida para corda na esfera unitária
+        self._corda_max2 = (2 * math.sin(min(distancia_max_km / RAIO_TERRA_KM, math.pi) / 2)) ** 2
+        logging.info(f"Geocodificador offline carregado com {len(self.municipios)} municípios")
+
+    def localizar(self, latitude, longitude):
+        """Retorna {'cidade', 'estado'} ou None se nenhum município estiver perto o bastante."""
+        if self._arvore is None:
+            return None
+        # Começa pela distância máxima: galhos mais distantes que ela nem são visitados
+        _, indice = _mais_proximo(
+            self._arvore, _para_xyz(float(latitude), float(longitude)), [self._corda_max2, None]
+        )
+        if indice is None:
+            return None
+        nome, estado, _, _ = self.municipios[indice]
+        return {"cidade": nome, "estado": estado}
+
+
+_instancia = None
+_instancia_lock = threading.Lock()
+_indisponivel = False
+
+
+def obter_geocodificador(caminho_csv, distancia_max_km=30):
+    """
+    Carrega o índice de municípios na primeira chamada e o reaproveita depois.
+    Retorna None (e avisa uma única vez) se a base não estiver disponível.
+    """
+    global _instancia, _indisponivel
+    if _instancia is not None or _indisponivel:
+        return _instancia
+    with _instancia_lock:
+        if _instancia is None and not _indisponivel:
+            try:
+                _instancia = GeocodificadorOffline(caminho_csv, distancia_max_km)
+            except FileNotFoundError:
+                logging.warning(f"Base de municípios '{caminho_csv}' não encontrada. "
+                                f"Geocodificação offline desativada.")
+                _indisponivel = True
+            except Exception as e:
+                logging.error(f"Erro ao carregar a base de municípios '{caminho_csv}': {e}")
+                _indisponivel = True
+    return _instancia
@@ -2,8 +2,7 @@ import sys
 import threading
 import logging
 from pathlib import Path
-import json
-import time  # Import específico para time.sleep()
+from collections import deque
 
 from datetime import datetime  # Import específico para datetime
 
@@ -12,57 +11,116 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QWidget, QLabel, 
     QProgressBar, QMessageBox, QFrame,
     QTimeEdit, QDialog, QDialogButtonBox, 
-    QListWidget, QListWidgetItem
+    QListWidget, QListWidgetItem, QCheckBox, QLineEdit
 )
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, pyqtSlot, QTimer
-from PyQt5.QtGui import QIcon, QFont, QColor, QPalette
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QTimer
+from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QTextCursor, QTextCharFormat
 
 # Importar o código original
 import atualizacao_ssw as ssw_updater
+import metricas
+import agendador
+import configuracao_log
+from config import LOG_INTERFACE_NIVEL, LOG_INTERFACE_MAX_LINHAS, LOG_INTERFACE_INTERVALO_MS
 
 # Configuração de diretóriosc
 BASE_DIR = Path(__file__).resolve().parent
 LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
-# Handler personalizado para capturar logs e enviá-los para a interface
-class QTextEditLogger(logging.Handler, QObject):
-    log_signal = pyqtSignal(str, int)
-
-    def __init__(self):
-        logging.Handler.__init__(self)
-        QObject.__init__(self)
+# Handler personalizado para capturar logs e enviá-los para a interface.
+# emit pode ser chamado de qualquer thread e só guarda a linha formatada; um
+# QTimer na thread da interface descarrega as linhas pendentes em lote, e a
+# área de log mantém apenas as últimas max_linhas linhas.
+class QTextEditLogger(logging.Handler):
+    def __init__(self, log_area, nivel=LOG_INTERFACE_NIVEL, max_linhas=LOG_INTERFACE_MAX_LINHAS,
+                 intervalo_ms=LOG_INTERFACE_INTERVALO_MS):
+        # O nível do handler é verificado antes de emit, então o que fica abaixo dele nem é formatado
+        logging.Handler.__init__(self, nivel)
+        self.log_area = log_area
         # Formato mais detalhado para incluir todos os logs
         self.setFormatter(
             logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
                             datefmt='%H:%M:%S')
         )
+        # append/popleft do deque não precisam de lock; com maxlen, uma rajada
+        # entre dois descarregamentos não guarda mais do que cabe na tela
+        self._pendentes = deque(maxlen=max_linhas)
+        self.log_area.document().setMaximumBlockCount(max_linhas)
+        self._timer = QTimer(log_area)
+        self._timer.timeout.connect(self.descarregar)
+        self._timer.start(intervalo_ms)
 
     def emit(self, record):
-        msg = self.format(record)
-        # Emite o sinal com a mensagem formatada e o nível do log
-        self.log_signal.emit(msg, record.levelno)
+        try:
+            self._pendentes.append((self.format(record), record.levelno))
+        except Exception:
+            self.handleError(record)
+
+    def adicionar(self, mensagem, nivel=logging.INFO):
+        """Coloca uma linha já pronta na área de log (qualquer thread)."""
+        self._pendentes.append((mensagem, nivel))
+
+    @staticmethod
+    def _cor(nivel):
+        if nivel >= logging.ERROR:
+            return QColor(255, 0, 0)  # Vermelho para ERROR
+        if nivel >= logging.WARNING:
+            return QColor(255, 165, 0)  # Laranja para WARNING
+        if nivel >= logging.INFO:
+            return QColor(0, 70, 140)  # Azul para INFO
+        return QColor(0, 0, 0)  # Preto para DEBUG
+
+    def descarregar(self):
+        if not self._pendentes:
+            return
+        linhas = []
+        while True:
+            try:
+                linhas.append(self._pendentes.popleft())
+            except IndexError:
+                break
+
+        # Uma única edição do documento (e um único reposicionamento da rolagem) por lote
+        documento = self.log_area.document()
+        cursor = QTextCursor(documento)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        formato = QTextCharFormat()
+        primeira_linha = documento.isEmpty()
+        for mensagem, nivel in linhas:
+            if not primeira_linha:
+                cursor.insertBlock()
+            primeira_linha = False
+            formato.setForeground(self._cor(nivel))
+            cursor.insertText(mensagem, formato)
+        cursor.endEditBlock()
+
+        barra = self.log_area.verticalScrollBar()
+        barra.setValue(barra.maximum())
 
 class SSWUpdaterApp(QMainWindow):
+    # Emitido pela thread do agendador para iniciar a atualização na thread da interface
+    agendamento_disparado = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.running = False
         self.thread = None
         self.stop_event = threading.Event()
+        self.fim_execucao = threading.Event()
         self.schedules = []
         self.initUI()
         self.setupLogging()
-        self.setup_schedule_timer()
+        self.setup_scheduler()
         
         # Mensagem inicial de log para informar que o sistema está pronto
         logging.info("Sistema iniciado e pronto para uso.")
 
     def log_direto(self, msg):
-        # Define cor azul para destacar mensagens importantes
-        self.log_area.setTextColor(QColor(0, 70, 140))
-        self.log_area.append(f"{datetime.now().strftime('%H:%M:%S')} - {msg}")
-        # Rolagem automática para a última linha
-        self.log_area.verticalScrollBar().setValue(self.log_area.verticalScrollBar().maximum())
+        # Mensagens de destaque em azul; podem vir da thread de atualização,
+        # por isso passam pela mesma fila do log
+        self.log_handler.adicionar(f"{datetime.now().strftime('%H:%M:%S')} - {msg}")
         
     def initUI(self):
         self.setWindowTitle('Atualizador de Sistema SSW')
@@ -150,6 +208,16 @@ class SSWUpdaterApp(QMainWindow):
 
         main_layout.addLayout(button_layout)
         
+        # Por padrão só são atualizados os veículos que mudaram de cidade
+        self.force_all_checkbox = QCheckBox("Atualizar todos os veículos (mesmo sem mudança de cidade)")
+        self.force_all_checkbox.setFont(QFont('Arial', 9))
+        main_layout.addWidget(self.force_all_checkbox)
+        
+        # Continua a última execução interrompida (queda ou encerramento forçado)
+        self.resume_checkbox = QCheckBox("Retomar a última execução interrompida")
+        self.resume_checkbox.setFont(QFont('Arial', 9))
+        main_layout.addWidget(self.resume_checkbox)
+        
         # Estilizando a interface
         self.apply_style()
         
@@ -240,45 +308,14 @@ class SSWUpdaterApp(QMainWindow):
         """)
         
     def setupLogging(self):
-        # Remover handlers existentes
-        logging.getLogger().handlers = []
-        
         # Configurar novo handler para a interface
-        self.log_handler = QTextEditLogger()
-        self.log_handler.log_signal.connect(self.update_log)
-        
-        # Configurar logging com nível DEBUG para capturar todos os logs
-        logging.basicConfig(
-            level=logging.DEBUG,
-            handlers=[
-                self.log_handler,
-                logging.StreamHandler()  # Mantém os logs no terminal também
-            ]
-        )
+        self.log_handler = QTextEditLogger(self.log_area)
         
-        # Define o nível de log para módulos específicos
-        logging.getLogger('selenium').setLevel(logging.INFO)
-        logging.getLogger('urllib3').setLevel(logging.INFO)
+        # Arquivo em logs/, terminal e interface, todos atrás da fila do configuracao_log
+        configuracao_log.configurar_log(handlers_extras=[self.log_handler])
         
         logging.info("Sistema de logging inicializado")
         
-    @pyqtSlot(str, int)
-    def update_log(self, message, level):
-        # Mostrar todos os logs, não apenas warnings e errors
-        color = QColor(0, 0, 0)  # Preto para INFO
-        if level >= logging.ERROR:
-            color = QColor(255, 0, 0)  # Vermelho para ERROR
-        elif level >= logging.WARNING:
-            color = QColor(255, 165, 0)  # Laranja para WARNING
-        elif level >= logging.INFO:
-            color = QColor(0, 70, 140)  # Azul para INFO
-
-        self.log_area.setTextColor(color)
-        self.log_area.append(message)
-        self.log_area.verticalScrollBar().setValue(
-            self.log_area.verticalScrollBar().maximum()
-        )
-    
     def start_update(self):
         if self.running:
             return
@@ -289,6 +326,9 @@ class SSWUpdaterApp(QMainWindow):
         self.progress_bar.setVisible(True)
         self.status_label.setText("Atualizando o sistema SSW...")
         
+        forcar_todos = self.force_all_checkbox.isChecked()
+        retomar = self.resume_checkbox.isChecked()
+        
         # Log no arquivo e na interface
         logging.info("Iniciando processo de atualização do sistema SSW...")
         self.log_direto("INICIANDO ATUALIZAÇÃO DO SISTEMA")
@@ -307,59 +347,51 @@ class SSWUpdaterApp(QMainWindow):
                 # Obter placas e localizações
                 logging.info("Consultando placas e localizações dos veículos...")
                 try:
-                    _, veiculos_com_localizacao = ssw_updater.processador_placas.processar_localizacao_veiculos()
-                    
-                    if not veiculos_com_localizacao:
-                        logging.warning("Nenhum veículo com localização encontrado. Encerrando processamento.")
-                        self.update_status("Nenhum veículo encontrado", warning=True)
-                        self.log_direto("ALERTA: Nenhum veículo com localização foi encontrado!")
-                        return
-                    
-                    total_veiculos = len(veiculos_com_localizacao)
-                    logging.info(f"Total de {total_veiculos} veículos com localização obtidos.")
-                    self.log_direto(f"CONSULTA: {total_veiculos} veículos encontrados para atualização")
-                    
-                    # Iterar sobre cada veículo
-                    self.update_progress_range(0, total_veiculos)
+                    # Cada veículo localizado segue direto para os navegadores do SSW
+                    self.update_progress_range(0, 0)  # Indeterminado até o primeiro veículo
                     
-                    for i, veiculo_info in enumerate(veiculos_com_localizacao):
-                        if self.stop_event.is_set():
-                            logging.info("Processo interrompido pelo usuário.")
-                            break
-                            
-                        placa = veiculo_info.get('placa')
-                        cidade = veiculo_info.get('cidade')
-                        estado = veiculo_info.get('estado')
-                        
-                        if not all([placa, cidade, estado]):
-                            logging.warning(f"Veículo {i+1} com dados incompletos. Pulando: {veiculo_info}")
-                            continue
-                        
-                        self.update_status(f"Processando veículo {i+1}/{total_veiculos}: {placa}")
-                        self.update_progress_value(i)
-                        
-                        logging.info(f"Atualizando veículo {i+1}/{total_veiculos}: "
-                                    f"Placa {placa} - {cidade}/{estado}")
+                    def ao_concluir_veiculo(concluidos, total, veiculo_info, sucesso):
+                        placa = veiculo_info['placa']
+                        self.update_progress_range(0, total)
+                        self.update_status(f"Processados {concluidos}/{total} veículos (último: {placa})")
+                        self.update_progress_value(concluidos)
                         
-                        try:
-                            ssw_updater.atualizar_sistema_para_placa(placa, cidade, estado)
+                        if sucesso:
                             logging.info(f"Veículo {placa} atualizado com sucesso no sistema.")
                             # Log a cada 5 veículos ou em casos específicos
-                            if (i+1) % 5 == 0 or i == 0 or i == total_veiculos-1:
-                                self.log_direto(f"ATUALIZADO: Veículo {placa} ({cidade}/{estado})")
-                        except Exception as e:
-                            logging.error(f"Erro ao atualizar veículo {placa}: {e}")
+                            if concluidos % 5 == 0 or concluidos == 1 or concluidos == total:
+                                self.log_direto(f"ATUALIZADO: Veículo {placa} ({veiculo_info['cidade']}/{veiculo_info['estado']})")
+                        else:
                             self.log_direto(f"ERRO: Falha ao atualizar veículo {placa}")
                         
                         # Atualiza progresso
-                        perc_concluido = int((i+1) / total_veiculos * 100)
-                        if perc_concluido % 25 == 0 and i > 0:  # Log a cada 25% de progresso
-                            logging.info(f"Progresso: {perc_concluido}% concluído ({i+1}/{total_veiculos})")
-                            self.log_direto(f"PROGRESSO: {perc_concluido}% concluído ({i+1}/{total_veiculos} veículos)")
-                        
-                        if i < total_veiculos - 1 and not self.stop_event.is_set():
-                            logging.info("Aguardando intervalo de 5 segundos antes do próximo veículo...")
-                            time.sleep(5)
+                        perc_concluido = int(concluidos / total * 100)
+                        if perc_concluido % 25 == 0 and concluidos > 1:  # Log a cada 25% de progresso
+                            logging.info(f"Progresso: {perc_concluido}% concluído ({concluidos}/{total})")
+                            self.log_direto(f"PROGRESSO: {perc_concluido}% concluído ({concluidos}/{total} veículos)")
+                    
+                    resumo = ssw_updater.executar_pipeline(
+                        stop_event=self.stop_event,
+                        ao_concluir_veiculo=ao_concluir_veiculo,
+                        forcar_todos=forcar_todos,
+                        retomar=retomar,
+                    )
+                    
+                    if not resumo['total']:
+                        logging.warning("Nenhum veículo com localização encontrado. Encerrando processamento.")
+                        self.update_status("Nenhum veículo encontrado", warning=True)
+                        self.log_direto("ALERTA: Nenhum veículo com localização foi encontrado!")
+                        return
+                    
+                    self.log_direto(f"CONSULTA: {resumo['total']} veículos localizados")
+                    self.log_direto(
+                        f"RESUMO: {len(resumo['atualizados'])} atualizados, "
+                        f"{len(resumo['sem_alteracao'])} sem alteração, "
+                        f"{len(resumo['falhas'])} com falha, {len(resumo['ignorados'])} ignorados, "
+                        f"{len(resumo['ja_concluidos'])} já concluídos"
+                    )
+                    for linha in metricas.linhas_resumo():
+                        self.log_direto(f"MÉTRICAS: {linha}")
                     
                     if not self.stop_event.is_set():
                         logging.info("Atualização de todos os veículos concluída com sucesso!")
@@ -378,6 +410,9 @@ class SSWUpdaterApp(QMainWindow):
                 if not self.stop_event.is_set():
                     self.stop_event.set()
                 self.running_completed()
+                self.fim_execucao.set()
+                # Libera um agendamento que ficou aguardando esta execução
+                self.agendador.acordar()
                 logging.info("Processo de atualização finalizado.")
         
         # Iniciar thread
@@ -415,19 +450,19 @@ class SSWUpdaterApp(QMainWindow):
 
     def clear_log_area(self):
         self.log_area.clear()
-        self.log_area.append("Sistema pronto para nova execução.")
+        self.log_handler.adicionar("Sistema pronto para nova execução.")
     
     def close_application(self):
         # Simplified close application method
+        self.agendador.parar()
         if self.running:
             self.stop_event.set()
             logging.info("Forçando encerramento do programa...")
         
         # Force close any remaining browser windows
         try:
-            if hasattr(ssw_updater, 'driver'):
-                ssw_updater.driver.quit()
-                logging.info("Driver do navegador fechado.")
+            ssw_updater.fechar_sessoes_ativas()
+            logging.info("Drivers do navegador fechados.")
         except Exception as e:
             logging.warning(f"Não foi possível fechar o driver: {e}")
         
@@ -439,6 +474,7 @@ class SSWUpdaterApp(QMainWindow):
 
     def closeEvent(self, event):
         # Simplified close event handler - always accept
+        self.agendador.parar()
         self.stop_event.set()
         logging.info("Janela do aplicativo fechada.")
         event.accept()
@@ -495,67 +531,60 @@ class SSWUpdaterApp(QMainWindow):
                 self.log_direto("CONFIGURAÇÃO: Todos os horários foram removidos")
                 self.update_status("Sem horários configurados", warning=True)
                 
-            # Restart the timer to ensure immediate check
-            self.setup_schedule_timer()
+            # O agendador recalcula o próximo disparo imediatamente
+            self.agendador.atualizar_expressoes(self.schedules)
+            self.show_next_runs()
 
-    def setup_schedule_timer(self):
-        # Cancel existing timer if it exists
-        if hasattr(self, 'schedule_timer') and self.schedule_timer.isActive():
-            self.schedule_timer.stop()
-        
-        # Create new timer
-        self.schedule_timer = QTimer()
-        self.schedule_timer.timeout.connect(self.check_schedule)
-        self.schedule_timer.start(60000)  # 60000 ms = 1 minuto
-        logging.info("Timer de verificação de agendamentos iniciado")
-        
-        # Carrega horários existentes
+    def setup_scheduler(self):
+        self.schedules = agendador.carregar_agendamentos()
+        if self.schedules:
+            logging.info(f"Horários carregados: {', '.join(self.schedules)}")
+        else:
+            logging.info("Nenhum horário de execução configurado")
+
+        self.agendamento_disparado.connect(self.start_scheduled_update)
+        self.agendador = agendador.Agendador(
+            self.schedules, self.run_scheduled_update, ocupado=lambda: self.running
+        )
+        self.agendador.iniciar()
+        self.show_next_runs()
+
+    def show_next_runs(self):
+        proximas = self.agendador.proximas_execucoes(5)
+        if proximas:
+            linha_do_tempo = ', '.join(f"{momento:%d/%m %H:%M}" for momento, _ in proximas)
+            self.log_direto(f"AGENDAMENTO: Próximas execuções: {linha_do_tempo}")
+
+    def run_scheduled_update(self, horario):
+        # Roda na thread do agendador: pede o início à interface e espera a execução terminar
+        self.fim_execucao.clear()
+        self.agendamento_disparado.emit(horario)
+        self.fim_execucao.wait()
+
+    @pyqtSlot(str)
+    def start_scheduled_update(self, horario):
+        # Em todo caminho em que a execução não começa, o agendador precisa ser
+        # liberado aqui; senão run_scheduled_update espera para sempre
+        if self.running:
+            logging.warning(f"Agendamento {horario} encontrou uma atualização em andamento. Ignorado.")
+            self.fim_execucao.set()
+            return
+        msg = f"Iniciando atualização agendada para: {horario}"
+        logging.info(msg)
+        self.log_direto(f"AGENDAMENTO: Iniciando atualização automática programada para {horario}")
+        self.update_status(msg, success=True)
         try:
-            with open('schedules.json', 'r') as f:
-                self.schedules = json.load(f)
-                if self.schedules:
-                    logging.info(f"Horários carregados: {', '.join(self.schedules)}")
-                else:
-                    logging.info("Nenhum horário de execução configurado")
-        except FileNotFoundError:
-            logging.info("Arquivo de horários não encontrado. Nenhum agendamento ativo.")
-            self.schedules = []
-
-    def check_schedule(self):
-        current_time = datetime.now().strftime("%H:%M")
-        
-        # A cada 15 minutos, exibe mensagem de verificação
-        current_minute = int(datetime.now().strftime("%M"))
-        if current_minute % 15 == 0:
-            logging.info(f"Verificando agendamentos - Hora atual: {current_time}")
-            
-            if hasattr(self, 'schedules') and self.schedules:
-                horarios = ', '.join(self.schedules)
-                logging.info(f"Próximos horários: {horarios}")
-                
-                # A cada hora exata, exibe os horários na interface
-                if current_minute == 0:
-                    self.log_direto(f"AGENDAMENTO: Próximos horários de execução: {horarios}")
-        
-        # Verifica se há um horário agendado para agora
-        if hasattr(self, 'schedules') and current_time in self.schedules:
-            if not self.running:
-                msg = f"Iniciando atualização agendada para: {current_time}"
-                logging.info(msg)
-                self.log_direto(f"AGENDAMENTO: Iniciando atualização automática programada para {current_time}")
-                self.update_status(msg, success=True)
-                self.start_update()
-            else:
-                msg = "Horário agendado encontrado, mas uma atualização já está em andamento"
-                logging.warning(msg)
-                self.log_direto(f"ALERTA: Horário agendado {current_time} ignorado - atualização já em andamento")
-                self.update_status(msg, warning=True)
+            self.start_update()
+        except Exception as e:
+            logging.error(f"Não foi possível iniciar a atualização agendada para {horario}: {e}", exc_info=True)
+            self.running = False
+            self.fim_execucao.set()
 
 class ScheduleConfigDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle('Configurar Horários')
-        self.setMinimumWidth(300)
+        self.setMinimumWidth(420)
         self.setup_ui()
         self.load_schedules()
 
@@ -575,6 +604,11 @@ class ScheduleConfigDialog(QDialog):
         self.time_edit.setDisplayFormat("HH:mm")
         time_layout.addWidget(self.time_edit)
         
+        # Expressão opcional: intervalo ou cron, no lugar do horário fixo
+        self.expression_edit = QLineEdit()
+        self.expression_edit.setPlaceholderText("ou: a cada 30min / */15 6-18 * * 1-5")
+        time_layout.addWidget(self.expression_edit)
+        
         # Botão adicionar
         add_button = QPushButton("Adicionar")
         add_button.clicked.connect(self.add_time)
@@ -620,7 +654,13 @@ class ScheduleConfigDialog(QDialog):
             logging.info(f"Horário removido: {horario}")
 
     def add_time(self):
-        time_text = self.time_edit.time().toString("HH:mm")
+        time_text = self.expression_edit.text().strip() or self.time_edit.time().toString("HH:mm")
+        try:
+            agendador.Agenda(time_text)
+        except agendador.ExpressaoInvalida as e:
+            QMessageBox.warning(self, "Agendamento inválido", str(e))
+            return
+        self.expression_edit.clear()
         # Verifica se o horário já existe
         existing_items = [self.schedule_list.item(i).text() 
                          for i in range(self.schedule_list.count())]
@@ -633,20 +673,15 @@ class ScheduleConfigDialog(QDialog):
             logging.warning(f"O horário {time_text} já está configurado")
 
     def load_schedules(self):
-        try:
-            with open('schedules.json', 'r') as f:
-                schedules = json.load(f)
-                for time_str in schedules:
-                    self.schedule_list.addItem(QListWidgetItem(time_str))
-            logging.info(f"Carregados {len(schedules)} horários configurados")
-        except FileNotFoundError:
-            logging.info("Nenhum arquivo de configuração de horários encontrado")
+        schedules = agendador.carregar_agendamentos()
+        for time_str in schedules:
+            self.schedule_list.addItem(QListWidgetItem(time_str))
+        logging.info(f"Carregados {len(schedules)} horários configurados")
 
     def save_schedules(self):
         schedules = [self.schedule_list.item(i).text() 
                     for i in range(self.schedule_list.count())]
-        with open('schedules.json', 'w') as f:
-            json.dump(schedules, f)
+        agendador.salvar_agendamentos(schedules)
         logging.info(f"Configurações de horários salvas: {len(schedules)} horários")
 
     def get_schedules(self):
@@ -0,0 +1,153 @@
+import json
+import math
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import eventos_execucao
+from config import METRICAS_DIR
+
+# Amostras da execução atual: (etapa, placa ou None, duração em segundos).
+# Só etapas que não se sobrepõem devem levar a placa, pois o tempo por placa é a soma delas.
+_amostras = []
+_amostras_lock = threading.Lock()
+
+
+def registrar(etapa, duracao, placa=None, resultado=eventos_execucao.OK):
+    """Guarda a amostra e a grava como evento da execução em andamento (eventos_execucao)."""
+    with _amostras_lock:
+        _amostras.append((etapa, placa, duracao))
+    eventos_execucao.registrar(etapa, duracao, placa, resultado)
+
+
+class Medicao:
+    """Devolvida pelo cronometro; o bloco pode marcar resultado = eventos_execucao.FALHA."""
+
+    def __init__(self):
+        self.resultado = eventos_execucao.OK
+
+
+@contextmanager
+def cronometro(etapa, placa=None):
+    """
+    Mede o tempo do bloco e o registra na etapa (e na placa, se informada),
+    inclusive quando o bloco termina com exceção (resultado "erro").
+
+        with metricas.cronometro("ssw: login"):
+            ...
+    """
+    medicao = Medicao()
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    except BaseException:
+        medicao.resultado = eventos_execucao.ERRO
+        raise
+    finally:
+        registrar(etapa, time.perf_counter() - inicio, placa, medicao.resultado)
+
+
+def cronometrado(etapa):
+    """Decorador equivalente ao cronometro para uma função inteira."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with cronometro(etapa):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def limpar():
+    with _amostras_lock:
+        _amostras.clear()
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return 0.0
+    posicao = max(1, math.ceil(p / 100 * len(valores)))
+    return valores[posicao - 1]
+
+
+def _estatisticas(valores):
+    valores = sorted(valores)
+    return {
+        "quantidade": len(valores),
+        "total_s": round(sum(valores), 3),
+        "p50_s": round(percentil(valores, 50), 3),
+        "p95_s": round(percentil(valores, 95), 3),
+        "max_s": round(valores[-1], 3),
+    }
+
+
+def relatorio():
+    """
+    Estatísticas da execução atual:
+    {'etapas': {etapa: {quantidade, total_s, p50_s, p95_s, max_s}},
+     'placas': {placa: {'total_s', 'etapas': {etapa: total_s}}},
+     'tempo_por_placa': {quantidade, total_s, p50_s, p95_s, max_s}}
+    """
+    with _amostras_lock:
+        amostras = list(_amostras)
+
+    por_etapa = {}
+    placas = {}
+    for etapa, placa, duracao in amostras:
+        por_etapa.setdefault(etapa, []).append(duracao)
+        if placa:
+            etapas_placa = placas.setdefault(placa, {})
+            etapas_placa[etapa] = etapas_placa.get(etapa, 0.0) + duracao
+
+    placas = {
+        placa: {"total_s": round(sum(etapas.values()), 3),
+                "etapas": {etapa: round(duracao, 3) for etapa, duracao in etapas.items()}}
+        for placa, etapas in placas.items()
+    }
+    return {
+        "etapas": {etapa: _estatisticas(valores) for etapa, valores in por_etapa.items()},
+        "placas": placas,
+        "tempo_por_placa": _estatisticas([p["total_s"] for p in placas.values()]) if placas else None,
+    }
+
+
+def salvar_relatorio(diretorio=METRICAS_DIR):
+    """Grava o relatório da execução em diretorio/metricas_AAAAMMDD_HHMMSS.json e retorna o caminho."""
+    caminho = Path(diretorio) / f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(relatorio(), f, ensure_ascii=False, indent=2)
+        logging.info(f"Métricas da execução salvas em: {caminho}")
+        return caminho
+    except Exception as e:
+        logging.warning(f"Não foi possível salvar as métricas da execução: {e}")
+        return None
+
+
+def linhas_resumo(max_placas=5):
+    """Resumo legível do relatório: uma linha por etapa e as placas mais lentas."""
+    dados = relatorio()
+    linhas = []
+    for etapa, est in sorted(dados["etapas"].items(), key=lambda item: -item[1]["total_s"]):
+        linhas.append(f"{etapa}: {est['quantidade']}x, total {est['total_s']:.1f}s, "
+                      f"p50 {est['p50_s']:.2f}s, p95 {est['p95_s']:.2f}s, máx {est['max_s']:.2f}s")
+    if dados["tempo_por_placa"]:
+        est = dados["tempo_por_placa"]
+        linhas.append(f"Por placa: p50 {est['p50_s']:.2f}s, p95 {est['p95_s']:.2f}s, máx {est['max_s']:.2f}s")
+        mais_lentas = sorted(dados["placas"].items(), key=lambda item: -item[1]["total_s"])[:max_placas]
+        linhas.append("Placas mais lentas: " + ", ".join(
+            f"{placa} ({info['total_s']:.1f}s)" for placa, info in mais_lentas
+        ))
+    return linhas
+
+
+def registrar_resumo():
+    """Escreve o resumo das métricas no log."""
+    for linha in linhas_resumo():
+        logging.info(f"Métricas - {linha}")
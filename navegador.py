@@ -0,0 +1,122 @@
+import logging
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.edge.options import Options
+
+from config import (
+    NAVEGADOR_BLOQUEAR_RECURSOS, NAVEGADOR_URLS_BLOQUEADAS, NAVEGADOR_CARREGAMENTO, NAVEGADOR_PERFIL_DIR,
+)
+
+# Esconde o navigator.webdriver das páginas abertas pela automação
+_SCRIPT_MASCARAR_AUTOMACAO = """
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => undefined
+})
+"""
+
+
+def criar_opcoes_edge(headless=True, bloquear_recursos=None, perfil=None):
+    """
+    Opções do Edge usadas por todos os robôs: sem logs e avisos de automação,
+    estratégia de carregamento configurável (eager por padrão: não espera
+    imagens e folhas de estilo) e, com bloquear_recursos, sem imagens e fontes.
+
+    Com NAVEGADOR_PERFIL_DIR definido e um nome de perfil, o navegador usa um
+    diretório de dados persistente (cache e cookies aquecidos entre execuções).
+    Cada navegador aberto ao mesmo tempo precisa de um perfil próprio.
+    """
+    bloquear_recursos = NAVEGADOR_BLOQUEAR_RECURSOS if bloquear_recursos is None else bloquear_recursos
+    edge_options = Options()
+    edge_options.page_load_strategy = NAVEGADOR_CARREGAMENTO
+    if headless:
+        edge_options.add_argument("--headless=new")
+        edge_options.add_argument("--window-size=1366,768")
+    edge_options.add_argument("--log-level=OFF")
+    edge_options.add_argument("--silent")
+    edge_options.add_argument("--disable-logging")
+    edge_options.add_argument("--disable-extensions")
+    edge_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
+    edge_options.add_experimental_option('useAutomationExtension', False)
+    prefs = {
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False,
+        "logging": {
+            "browser": "OFF",
+            "performance": "OFF"
+        }
+    }
+    if bloquear_recursos:
+        edge_options.add_argument("--blink-settings=imagesEnabled=false")
+        prefs["profile.managed_default_content_settings.images"] = 2
+        prefs["webkit.webprefs.remote_fonts_enabled"] = False
+    edge_options.add_experimental_option('prefs', prefs)
+    if NAVEGADOR_PERFIL_DIR and perfil:
+        diretorio = Path(NAVEGADOR_PERFIL_DIR).resolve() / perfil
+        diretorio.mkdir(parents=True, exist_ok=True)
+        edge_options.add_argument(f"--user-data-dir={diretorio}")
+    return edge_options
+
+
+def criar_navegador(headless=True, bloquear_recursos=None, perfil=None):
+    """
+    Abre o Edge com as opções de criar_opcoes_edge, mascara a automação e, com
+    bloquear_recursos, bloqueia por CDP as URLs de NAVEGADOR_URLS_BLOQUEADAS
+    (imagens, fontes, CSS). O bloqueio por CDP vale para a aba inicial; as
+    janelas abertas pelo site continuam sem imagens e fontes pelas preferências.
+    """
+    bloquear_recursos = NAVEGADOR_BLOQUEAR_RECURSOS if bloquear_recursos is None else bloquear_recursos
+    driver = webdriver.Edge(options=criar_opcoes_edge(headless, bloquear_recursos, perfil))
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _SCRIPT_MASCARAR_AUTOMACAO})
+        if bloquear_recursos and NAVEGADOR_URLS_BLOQUEADAS:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": NAVEGADOR_URLS_BLOQUEADAS})
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+# Lê a tabela inteira no navegador e devolve uma estrutura simples, evitando
+# uma requisição ao WebDriver para cada célula.
+_SCRIPT_SNAPSHOT_TABELA = """
+const tabela = document.getElementById(arguments[0]);
+if (!tabela) { return null; }
+const atributos = (el) => {
+    const resultado = {};
+    for (const attr of el.attributes) { resultado[attr.name] = attr.value; }
+    return resultado;
+};
+return Array.from(tabela.rows).map((tr) => ({
+    atributos: atributos(tr),
+    celulas: Array.from(tr.cells).map((td) => ({
+        texto: (td.innerText || td.textContent || "").trim(),
+        atributos: atributos(td),
+        cor: window.getComputedStyle(td).color,
+        fontes: Array.from(td.querySelectorAll("font")).map((f) => ({
+            cor: (f.getAttribute("color") || "").toLowerCase(),
+            texto: (f.textContent || "").trim()
+        }))
+    }))
+}));
+"""
+
+
+def snapshot_tabela(driver, tabela_id):
+    """
+    Captura todas as linhas da tabela com uma única chamada execute_script.
+
+    Retorna uma lista de linhas no formato
+    {'atributos': {...}, 'celulas': [{'texto', 'atributos', 'cor', 'fontes': [{'cor', 'texto'}]}]}
+    ou None se a tabela não existir na página.
+    """
+    linhas = driver.execute_script(_SCRIPT_SNAPSHOT_TABELA, tabela_id)
+    if linhas is None:
+        logging.debug(f"Tabela '{tabela_id}' não encontrada para snapshot")
+    return linhas
+
+
+def textos_das_linhas(linhas):
+    """Converte o snapshot em listas com o texto de cada célula."""
+    return [[celula["texto"] for celula in linha["celulas"]] for linha in linhas or []]
@@ -1,38 +1,145 @@
 import json
 import logging
-import time
+from concurrent.futures import ThreadPoolExecutor
 import api_client
+import metricas
+import eventos_execucao
+import configuracao_log
 import selenium_bot
+from config import API_MAX_CONCORRENCIA, API_TIMEOUT, API_MODO_FROTA
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(module)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# ==== CONSULTA DE POSIÇÕES ====
+
+def buscar_posicoes_em_lote(token, placas, max_em_voo=None, timeout=None):
+    """
+    Consulta a última posição de todas as placas em paralelo, com no máximo
+    max_em_voo requisições simultâneas.
+    Retorna uma lista de (placa, resposta_da_api ou exceção) na mesma ordem de placas.
+    """
+    max_em_voo = max(1, max_em_voo or API_MAX_CONCORRENCIA)
+    timeout = timeout or API_TIMEOUT
+
+    def consultar(placa):
+        try:
+            return api_client.get_ultima_posicao_por_placa(token, placa, timeout=timeout)
+        except Exception as e:
+            return e
+
+    logging.info(f"Consultando posições de {len(placas)} placas ({max_em_voo} requisições simultâneas)...")
+    with ThreadPoolExecutor(max_workers=max_em_voo, thread_name_prefix="api-posicao") as executor:
+        respostas = list(executor.map(consultar, placas))
+    return list(zip(placas, respostas))
+
+def buscar_posicoes(token, placas):
+    """
+    Obtém as posições de todas as placas. No modo frota faz uma consulta
+    paginada da frota inteira e só consulta individualmente as placas que não
+    vieram nela; se a consulta da frota falhar, usa apenas a consulta por placa.
+    Retorna (placa, resposta ou exceção) na mesma ordem de placas.
+    """
+    if not API_MODO_FROTA:
+        return buscar_posicoes_em_lote(token, placas)
+
+    try:
+        posicoes_frota = api_client.get_ultimas_posicoes_frota(token)
+    except Exception as e:
+        logging.warning(f"Consulta da frota falhou ({e}). Consultando placa a placa...")
+        return buscar_posicoes_em_lote(token, placas)
+
+    # Mesmo formato da resposta de ListaUltimaPosicaoPorPlaca
+    respostas = {}
+    for placa in placas:
+        posicao = posicoes_frota.get(api_client.normalizar_placa(placa))
+        if posicao is not None:
+            respostas[placa] = {'Posicoes': [posicao]}
+
+    faltantes = [placa for placa in placas if placa not in respostas]
+    logging.info(f"Consulta da frota: {len(respostas)} placas encontradas, {len(faltantes)} consultadas individualmente.")
+    if faltantes:
+        respostas.update(buscar_posicoes_em_lote(token, faltantes))
+    return [(placa, respostas[placa]) for placa in placas]
+
+def _montar_resultado(placa, dados_api):
+    """Converte a resposta da API de posição no item gravado em localizacao_veiculos.json."""
+    if isinstance(dados_api, dict) and 'Posicoes' in dados_api and isinstance(dados_api['Posicoes'], list) and len(dados_api['Posicoes']) > 0:
+        primeira_posicao = dados_api['Posicoes'][0]
+        if isinstance(primeira_posicao, dict):
+            # Prioritizando Latitude e Longitude em vez do campo Local
+            latitude = primeira_posicao.get('Latitude')
+            longitude = primeira_posicao.get('Longitude')
+            
+            if latitude is not None and longitude is not None:
+                # Tenta obter cidade e estado das coordenadas
+                with metricas.cronometro("geocodificação", placa) as medicao:
+                    localizacao = api_client.get_cidade_estado_por_coordenadas(latitude, longitude)
+                    if not localizacao:
+                        medicao.resultado = eventos_execucao.FALHA
+                if localizacao:
+                    logging.info(f"Localização para {placa}: {localizacao['cidade']}, {localizacao['estado']}")
+                    return {
+                        'placa': placa,
+                        'cidade': localizacao['cidade'],
+                        'estado': localizacao['estado']
+                    }
+                # Mantém as coordenadas se não conseguir converter
+                logging.info(f"Mantendo coordenadas para {placa}: Lat={latitude}, Long={longitude}")
+                return {
+                    'placa': placa,
+                    'Latitude': latitude,
+                    'Longitude': longitude
+                }
+            logging.warning(f"Campos 'Latitude' ou 'Longitude' não encontrados para a placa {placa}")
+            return {
+                'placa': placa,
+                'cidade': None,
+                'estado': None,
+                'Erro': 'Coordenadas não encontradas'
+            }
+        logging.warning(f"Primeira posição não é um dicionário para a placa {placa}. Resposta: {primeira_posicao}")
+        return {'placa': placa, 'Latitude': None, 'Longitude': None, 'Erro': 'Formato de resposta inválido'}
+    logging.warning(f"Estrutura de resposta da API inesperada para a placa {placa} (esperado 'Posicoes' como lista com itens). Resposta: {dados_api}")
+    return {'placa': placa, 'Latitude': None, 'Longitude': None, 'Erro': 'Estrutura de resposta inesperada'}
 
 # ==== FUNÇÃO PRINCIPAL ====
 
-def processar_localizacao_veiculos():
+ARQUIVO_SAIDA = "localizacao_veiculos.json"
+
+def _salvar_resultados(resultados_finais):
+    # Salva o arquivo no diretório atual
+    try:
+        with open(ARQUIVO_SAIDA, "w", encoding="utf-8") as f:
+            json.dump(resultados_finais, f, ensure_ascii=False, indent=4)
+        logging.info(f"Resultados salvos em: {ARQUIVO_SAIDA}")
+    except Exception as e:
+        logging.error(f"Erro ao salvar o arquivo JSON: {e}")
+
+def iterar_localizacao_veiculos(stop_event=None):
+    """
+    Gera o resultado de cada veículo assim que a sua localização é resolvida,
+    para que o consumidor (ex.: atualização do SSW) comece sem esperar o fim
+    da consulta. Ao terminar, ou se for interrompido, grava localizacao_veiculos.json
+    com o que foi processado.
+    """
     resultados_finais = []
     
     logging.info("Iniciando o processo de localização de veículos...")
 
     try:
-        placas = selenium_bot.consultar_placas()
+        try:
+            placas = selenium_bot.consultar_placas()
+            if not placas:
+                logging.warning("Nenhuma placa foi retornada pela função consultar_placas(). O JSON final estará vazio.")
+            else:
+                logging.info(f"Placas recebidas para processamento: {placas}")
+        except Exception as e:
+            logging.error(f"Falha crítica ao tentar executar consultar_placas() do Selenium: {e}")
+            logging.warning("Continuando com uma lista de placas vazia devido ao erro na extração.")
+            placas = []
+
         if not placas:
-            logging.warning("Nenhuma placa foi retornada pela função consultar_placas(). O JSON final estará vazio.")
-        else:
-            logging.info(f"Placas recebidas para processamento: {placas}")
-    except Exception as e:
-        logging.error(f"Falha crítica ao tentar executar consultar_placas() do Selenium: {e}")
-        logging.warning("Continuando com uma lista de placas vazia devido ao erro na extração.")
-        placas = []
+            logging.info("Nenhuma placa para processar. Encerrando a consulta à API.")
+            return
 
-    if not placas:
-        logging.info("Nenhuma placa para processar. Encerrando a consulta à API.")
-    else:
         token = None
         try:
             logging.info("Obtendo token da API...")
@@ -40,72 +147,39 @@ def processar_localizacao_veiculos():
             logging.info("Token da API obtido com sucesso.")
         except Exception as e:
             logging.error(f"Falha ao obter o token da API: {e}. Não será possível consultar as localizações.")
-            placas = [] 
+            return
 
-        if token:
-            for placa in placas:
-                logging.info(f"Processando placa: {placa}")
+        for placa, dados_api in buscar_posicoes(token, placas):
+            if stop_event is not None and stop_event.is_set():
+                logging.info("Consulta de localizações interrompida.")
+                return
+            logging.info(f"Processando placa: {placa}")
+            if isinstance(dados_api, Exception):
+                logging.error(f"Erro ao consultar a API para a placa {placa}: {dados_api}")
+                resultado = {"placa": placa, "Latitude": None, "Longitude": None, "Erro": "Erro na consulta"}
+            else:
                 try:
-                    dados_api = api_client.get_ultima_posicao_por_placa(token, placa)
-                    if isinstance(dados_api, dict) and 'Posicoes' in dados_api and isinstance(dados_api['Posicoes'], list) and len(dados_api['Posicoes']) > 0:
-                        primeira_posicao = dados_api['Posicoes'][0]
-                        if isinstance(primeira_posicao, dict):
-                            # Prioritizando Latitude e Longitude em vez do campo Local
-                            latitude = primeira_posicao.get('Latitude')
-                            longitude = primeira_posicao.get('Longitude')
-                            
-                            if latitude is not None and longitude is not None:
-                                # Tenta obter cidade e estado das coordenadas
-                                localizacao = api_client.get_cidade_estado_por_coordenadas(latitude, longitude)
-                                if localizacao:
-                                    resultados_finais.append({
-                                        'placa': placa,
-                                        'cidade': localizacao['cidade'],
-                                        'estado': localizacao['estado']
-                                    })
-                                    time.sleep(1)  # Atraso para evitar sobrecarga na API
-                                    logging.info(f"Localização para {placa}: {localizacao['cidade']}, {localizacao['estado']}")
-                                else:
-                                    # Mantém as coordenadas se não conseguir converter
-                                    resultados_finais.append({
-                                        'placa': placa,
-                                        'Latitude': latitude,
-                                        'Longitude': longitude
-                                    })
-                                    logging.info(f"Mantendo coordenadas para {placa}: Lat={latitude}, Long={longitude}")
-                            else:
-                                logging.warning(f"Campos 'Latitude' ou 'Longitude' não encontrados para a placa {placa}")
-                                resultados_finais.append({
-                                    'placa': placa,
-                                    'cidade': None,
-                                    'estado': None,
-                                    'Erro': 'Coordenadas não encontradas'
-                                })
-                        else:
-                            logging.warning(f"Primeira posição não é um dicionário para a placa {placa}. Resposta: {primeira_posicao}")
-                            resultados_finais.append({'placa': placa, 'Latitude': None, 'Longitude': None, 'Erro': 'Formato de resposta inválido'})
-                    else:
-                        logging.warning(f"Estrutura de resposta da API inesperada para a placa {placa} (esperado 'Posicoes' como lista com itens). Resposta: {dados_api}")
-                        resultados_finais.append({'placa': placa, 'Latitude': None, 'Longitude': None, 'Erro': 'Estrutura de resposta inesperada'})
-                
+                    resultado = _montar_resultado(placa, dados_api)
                 except Exception as e:
-                    logging.error(f"Erro ao consultar a API para a placa {placa}: {e}")
-                    resultados_finais.append({"placa": placa, "Latitude": None, "Longitude": None, "Erro": "Erro na consulta"})
-
-    # Salva o arquivo no diretório atual
-    output_file_name = "localizacao_veiculos.json"
-    try:
-        with open(output_file_name, "w", encoding="utf-8") as f:
-            json.dump(resultados_finais, f, ensure_ascii=False, indent=4)
-        logging.info(f"Resultados salvos em: {output_file_name}")
-    except Exception as e:
-        logging.error(f"Erro ao salvar o arquivo JSON: {e}")
+                    logging.error(f"Erro ao processar a resposta da API para a placa {placa}: {e}")
+                    resultado = {"placa": placa, "Latitude": None, "Longitude": None, "Erro": "Erro na consulta"}
+            resultados_finais.append(resultado)
+            yield resultado
+    finally:
+        if resultados_finais:
+            estatisticas = api_client.estatisticas_cache_geocodificacao()
+            logging.info(f"Cache de geocodificação: {estatisticas['acertos']} acertos, "
+                         f"{estatisticas['falhas']} falhas, {estatisticas['entradas']} células armazenadas")
+        _salvar_resultados(resultados_finais)
 
-    return output_file_name, resultados_finais
+def processar_localizacao_veiculos():
+    resultados_finais = list(iterar_localizacao_veiculos())
+    return ARQUIVO_SAIDA, resultados_finais
 
 # ==== EXECUÇÃO DO SCRIPT ====
 
 if __name__ == "__main__":
+    configuracao_log.configurar_log()
     logging.info("Iniciando script processador_placas.py diretamente.")
     caminho_arquivo, dados = processar_localizacao_veiculos()
     if dados:
@@ -1,34 +1,29 @@
 import time
-from selenium import webdriver
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from selenium.webdriver.support import expected_conditions as EC
-from datetime import datetime
 import os
-import sys
 import logging
-from pathlib import Path
+import re
+import html
+from html.parser import HTMLParser
+from urllib.parse import urljoin
 import requests
 from dotenv import load_dotenv
+from selenium.webdriver.support.ui import Select
+from config import (
+    VSTRACK_URL, VSTRACK_URL_DADOS, VSTRACK_MODO_HTTP, VSTRACK_TAMANHO_PAGINA, API_TIMEOUT, NAVEGADOR_HEADLESS,
+)
+from cliente_http import criar_sessao
+from navegador import criar_navegador, snapshot_tabela, textos_das_linhas
+import esperas
+import metricas
+import configuracao_log
 
 # Carrega as variáveis de ambiente
 load_dotenv("credenciais.env")
 
-BASE_DIR = Path(__file__).resolve().parent
-LOGS_DIR = BASE_DIR / "logs"
-LOGS_DIR.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOGS_DIR / f"extrator_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
 def verificar_conexao(url="https://www.google.com/"):
     try:
         response = requests.get(url, timeout=5)
@@ -41,26 +36,246 @@ def verificar_conexao(url="https://www.google.com/"):
         logging.error(f"Erro ao verificar conexão: {e}")
         return False
 
-def setup_edge_options():
-    edge_options = Options()
-    # edge_options.add_argument("--headless")  # Optional: run in headless mode
-    edge_options.add_argument("--log-level=OFF")
-    edge_options.add_argument("--silent")
-    edge_options.add_argument("--disable-logging")
-    edge_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
-    edge_options.add_experimental_option('useAutomationExtension', False)
-    edge_options.add_experimental_option('prefs', {
-        "credentials_enable_service": False,
-        "profile.password_manager_enabled": False,
-        "logging": {
-            "browser": "OFF",
-            "performance": "OFF"
-        }
-    })
-    return edge_options
+class _LeitorFormularioLogin(HTMLParser):
+    """Localiza o formulário com o campo Email e coleta action e campos ocultos."""
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.campos = {}
+        self._form_atual = None
+        self._campos_atual = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._form_atual = attrs.get("action") or ""
+            self._campos_atual = {}
+        elif tag == "input" and self._form_atual is not None:
+            nome = attrs.get("name")
+            if nome:
+                self._campos_atual[nome] = attrs.get("value") or ""
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._form_atual is not None:
+            if "Email" in self._campos_atual and self.action is None:
+                self.action = self._form_atual
+                self.campos = self._campos_atual
+            self._form_atual = None
+
+class _LeitorTabela(HTMLParser):
+    """Extrai o texto das células de cada linha de uma tabela HTML pelo id."""
+
+    def __init__(self, tabela_id):
+        super().__init__()
+        self.tabela_id = tabela_id
+        self.linhas = []
+        self._profundidade = 0
+        self._linha = None
+        self._celula = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            if self._profundidade or dict(attrs).get("id") == self.tabela_id:
+                self._profundidade += 1
+        elif self._profundidade == 1:
+            # Tabelas aninhadas dentro das células não geram linhas próprias
+            if tag == "tr":
+                self._linha = []
+            elif tag == "td" and self._linha is not None:
+                self._celula = []
+
+    def handle_endtag(self, tag):
+        if not self._profundidade:
+            return
+        if tag == "table":
+            self._profundidade -= 1
+        elif self._profundidade > 1:
+            return
+        elif tag == "td" and self._celula is not None:
+            self._linha.append("".join(self._celula).strip())
+            self._celula = None
+        elif tag == "tr" and self._linha is not None:
+            self.linhas.append(self._linha)
+            self._linha = None
+
+    def handle_data(self, data):
+        if self._celula is not None:
+            self._celula.append(data)
+
+def _texto_celula(valor):
+    """Remove as tags HTML que o DataTables às vezes devolve dentro das células."""
+    return html.unescape(re.sub(r"<[^>]+>", "", str(valor or ""))).strip()
+
+def _sem_duplicadas(placas):
+    """Remove placas repetidas (ex.: entre páginas) mantendo a ordem."""
+    vistas = set()
+    unicas = [p for p in placas if not (p in vistas or vistas.add(p))]
+    if len(unicas) != len(placas):
+        logging.info(f"{len(placas) - len(unicas)} placas duplicadas descartadas")
+    return unicas
+
+def _placas_das_linhas(linhas):
+    """Aplica a mesma regra da extração via Selenium: linhas com mais de 7 células, placa na 2ª."""
+    placas = []
+    for linha in linhas:
+        if len(linha) > 7:
+            placa = _texto_celula(linha[1]).replace('-', '')
+            if placa:
+                placas.append(placa)
+    return _sem_duplicadas(placas)
+
+# Com DataTables em modo cliente todas as linhas já estão no navegador:
+# uma única chamada devolve todas as páginas.
+_SCRIPT_LINHAS_DATATABLES = """
+const seletor = '#' + arguments[0];
+if (!window.jQuery || !jQuery.fn.dataTable || !jQuery.fn.dataTable.isDataTable(seletor)) { return null; }
+const api = jQuery(seletor).DataTable();
+if (api.page.info().serverSide) { return null; }
+return api.rows().data().toArray();
+"""
+
+@metricas.cronometrado("vstrack: leitura da tabela")
+def _ler_todas_as_paginas(driver, tabela_id="datatablesRastreamentosAtivos", max_paginas=100):
+    """
+    Retorna o texto das células de todas as linhas da tabela, em todas as páginas.
+    Usa a API do DataTables quando possível (1 chamada); senão seleciona o maior
+    tamanho de página disponível e percorre as páginas pelo botão "próximo".
+    """
+    inicio = time.perf_counter()
+    dados = None
+    try:
+        dados = driver.execute_script(_SCRIPT_LINHAS_DATATABLES, tabela_id)
+    except WebDriverException as e:
+        logging.debug(f"API do DataTables indisponível: {e}")
+    if dados is not None:
+        linhas = [
+            [_texto_celula(c) for c in (linha.values() if isinstance(linha, dict) else linha)]
+            for linha in dados
+        ]
+        logging.info(f"Todas as {len(linhas)} linhas lidas pela API do DataTables em {time.perf_counter() - inicio:.2f}s")
+        return linhas
+
+    try:
+        select_element = WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.NAME, f"{tabela_id}_length"))
+        )
+        # Rola até o final da tabela
+        driver.execute_script("arguments[0].scrollIntoView(true);", select_element)
+        select = Select(select_element)
+        # "-1" é a opção "Todos" do DataTables; senão o maior número disponível
+        valores = [int(o.get_attribute("value")) for o in select.options
+                   if (o.get_attribute("value") or "").lstrip("-").isdigit()]
+        maior = -1 if -1 in valores else max(valores)
+        primeira_linha = driver.find_elements(By.CSS_SELECTOR, f"#{tabela_id} tbody tr")
+        select.select_by_value(str(maior))
+        logging.info(f"Opção de {'todos os' if maior == -1 else maior} registros por página selecionada")
+        if primeira_linha:
+            esperas.aguardar_obsoleto(driver, primeira_linha[0], 10, "vstrack: redesenho da tabela")
+    except Exception as e:
+        logging.error(f"Erro ao configurar número de registros na tabela: {e}")
+
+    linhas = []
+    for pagina in range(1, max_paginas + 1):
+        inicio_pagina = time.perf_counter()
+        snapshot = snapshot_tabela(driver, tabela_id)
+        if snapshot is None:
+            raise NoSuchElementException(f"Tabela {tabela_id} não encontrada")
+        pagina_linhas = textos_das_linhas(snapshot)
+        linhas.extend(pagina_linhas)
+
+        proximo = driver.find_elements(By.ID, f"{tabela_id}_next")
+        ultima = not proximo or "disabled" in (proximo[0].get_attribute("class") or "")
+        if not ultima:
+            primeira_linha = driver.find_elements(By.CSS_SELECTOR, f"#{tabela_id} tbody tr")
+            driver.execute_script("arguments[0].click();", proximo[0])
+            if primeira_linha:
+                esperas.aguardar_obsoleto(driver, primeira_linha[0], 10, "vstrack: troca de página")
+        logging.info(f"Página {pagina} lida em {time.perf_counter() - inicio_pagina:.2f}s ({len(pagina_linhas)} linhas)")
+        if ultima:
+            break
+    return linhas
+
+@metricas.cronometrado("vstrack: extração http")
+def consultar_placas_http():
+    """
+    Extrai as placas sem abrir navegador: faz o login no vstrack com uma
+    sessão HTTP e lê a tabela de rastreamentos ativos (endpoint AJAX do
+    DataTables, se configurado, ou o HTML da página).
+    """
+    sessao = criar_sessao()
+    resposta = sessao.get(VSTRACK_URL, timeout=API_TIMEOUT)
+    resposta.raise_for_status()
+
+    leitor_login = _LeitorFormularioLogin()
+    leitor_login.feed(resposta.text)
+    if leitor_login.action is not None:
+        dados_login = dict(leitor_login.campos)
+        dados_login["Email"] = os.getenv("KOMANDO_EMAIL", "")
+        dados_login["Password"] = os.getenv("KOMANDO_PASSWORD", "")
+        resposta = sessao.post(urljoin(resposta.url, leitor_login.action), data=dados_login, timeout=API_TIMEOUT)
+        resposta.raise_for_status()
+        if 'name="Password"' in resposta.text:
+            raise RuntimeError("Login no vstrack recusado (formulário de login retornado novamente)")
+        logging.info("Login HTTP no vstrack realizado.")
+
+    if VSTRACK_URL_DADOS:
+        linhas = []
+        inicio = 0
+        pagina = 1
+        while True:
+            inicio_pagina = time.perf_counter()
+            resposta = sessao.post(
+                urljoin(VSTRACK_URL, VSTRACK_URL_DADOS),
+                data={"draw": pagina, "start": inicio, "length": VSTRACK_TAMANHO_PAGINA},
+                headers={"X-Requested-With": "XMLHttpRequest"},
+                timeout=API_TIMEOUT,
+            )
+            resposta.raise_for_status()
+            dados = resposta.json()
+            pagina_linhas = dados.get("data", [])
+            for linha in pagina_linhas:
+                # O DataTables pode devolver as linhas como listas ou como objetos
+                linhas.append(list(linha.values()) if isinstance(linha, dict) else linha)
+            total = int(dados.get("recordsFiltered") or dados.get("recordsTotal") or 0)
+            logging.info(f"Página {pagina} lida em {time.perf_counter() - inicio_pagina:.2f}s "
+                         f"({len(pagina_linhas)} linhas, {len(linhas)}/{total or '?'})")
+            inicio += len(pagina_linhas)
+            # Sem recordsTotal, ou servidor que ignora length, a página incompleta/vazia indica o fim
+            if not pagina_linhas or inicio >= total or len(pagina_linhas) < VSTRACK_TAMANHO_PAGINA:
+                break
+            pagina += 1
+    else:
+        if resposta.url.rstrip("/") != VSTRACK_URL.rstrip("/"):
+            resposta = sessao.get(VSTRACK_URL, timeout=API_TIMEOUT)
+            resposta.raise_for_status()
+        leitor_tabela = _LeitorTabela("datatablesRastreamentosAtivos")
+        leitor_tabela.feed(resposta.text)
+        linhas = leitor_tabela.linhas
+
+    placas = _placas_das_linhas(linhas)
+    logging.info(f"Extração HTTP concluída: {len(placas)} placas encontradas.")
+    return placas
 
 def consultar_placas():
-    """Executa a extração de dados e retorna uma lista de placas."""
+    """
+    Executa a extração de dados e retorna uma lista de placas.
+    Tenta primeiro a extração HTTP, sem navegador; o Selenium só é usado se
+    ela falhar ou não encontrar placas.
+    """
+    if VSTRACK_MODO_HTTP:
+        try:
+            placas = consultar_placas_http()
+            if placas:
+                return placas
+            logging.warning("Extração HTTP não encontrou placas. Usando o Selenium...")
+        except Exception as e:
+            logging.warning(f"Extração HTTP falhou ({e}). Usando o Selenium...")
+    return consultar_placas_selenium()
+
+@metricas.cronometrado("vstrack: extração selenium")
+def consultar_placas_selenium():
+    """Executa a extração de dados pelo navegador e retorna uma lista de placas."""
     placas = []
     
     logging.info("Sistema iniciado e pronto para extração.")
@@ -76,20 +291,10 @@ def consultar_placas():
     if not verificar_conexao("http://vstrack.ddns.net/"):
         logging.warning("Possível problema de conexão com o site de destino")
     
-    edge_options = setup_edge_options()
-    
     logging.info("Iniciando processo de extração de dados...")
     
     try:
-        driver = webdriver.Edge(options=edge_options)
-        # Adiciona script para mascarar a automação
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                })
-            """
-        })
+        driver = criar_navegador(headless=NAVEGADOR_HEADLESS, perfil="vstrack")
         
         with driver:
             max_tentativas = 3
@@ -97,7 +302,7 @@ def consultar_placas():
             
             while tentativa < max_tentativas:
                 try:
-                    url = "http://vstrack.ddns.net/komando/PosicaoVeiculoRastreamento/Index"
+                    url = VSTRACK_URL
                     logging.info(f"Acessando URL: {url}")
                     driver.get(url)
                     
@@ -135,67 +340,34 @@ def consultar_placas():
                     logging.info("Iniciando extração de dados...")
                     logging.info("Aguardando carregamento da tabela de dados...")
                     try:
-                        from selenium.webdriver.support.ui import Select
-                        select_element = WebDriverWait(driver, 15).until(
-                            EC.presence_of_element_located((By.NAME, "datatablesRastreamentosAtivos_length"))
-                        )
-                        # Rola até o final da tabela
-                        driver.execute_script("arguments[0].scrollIntoView(true);", select_element)
-                        select = Select(select_element)
-                        select.select_by_value("50")
-                        logging.info("Opção de 50 registros por página selecionada")
-                        time.sleep(2)
-                    except Exception as e:
-                        logging.error(f"Erro ao configurar número de registros na tabela: {e}")
-
-                    try:
-                        tabela = driver.find_element(By.ID, "datatablesRastreamentosAtivos")
-                        linhas = tabela.find_elements(By.TAG_NAME, "tr")
+                        linhas_texto = _ler_todas_as_paginas(driver)
 
                         placas = []
                         placas_problematicas = []
 
-                        for i, linha in enumerate(linhas):
-                            celulas = linha.find_elements(By.TAG_NAME, "td")
+                        for i, celulas in enumerate(linhas_texto):
                             if len(celulas) > 7:
-                                placa_com_traco = celulas[1].text.strip()
+                                placa_com_traco = celulas[1]
                                 
                                 # Verificar se a placa não está vazia
-                                if placa_com_traco:
-                                    # Verificar se a placa tem um formato válido antes de processar
-                                    if '-' in placa_com_traco:
-                                        placa_sem_traco = placa_com_traco.replace('-', '')
-                                        if placa_sem_traco:  # Verificar se não ficou vazia após substituição
-                                            placas.append(placa_sem_traco)
-                                            logging.info(f"Placa processada com sucesso: {placa_com_traco} -> {placa_sem_traco}")
-                                        else:
-                                            logging.warning(f"Placa ficou vazia após substituir traço: {placa_com_traco}")
-                                            placas_problematicas.append(placa_com_traco)
+                                if not placa_com_traco:
+                                    logging.warning(f"Célula da placa vazia na linha {i+1}")
+                                    continue
+                                
+                                if '-' in placa_com_traco:
+                                    placa_sem_traco = placa_com_traco.replace('-', '')
+                                    if placa_sem_traco:  # Verificar se não ficou vazia após substituição
+                                        placas.append(placa_sem_traco)
+                                        logging.info(f"Placa processada com sucesso: {placa_com_traco} -> {placa_sem_traco}")
                                     else:
-                                        # Se não tem traço, adicionar como está
-                                        placas.append(placa_com_traco)
-                                        logging.info(f"Placa sem traço adicionada: {placa_com_traco}")
+                                        logging.warning(f"Placa ficou vazia após substituir traço: {placa_com_traco}")
+                                        placas_problematicas.append(placa_com_traco)
                                 else:
-                                    logging.warning(f"Célula da placa vazia na linha {i+1}")
-                                    
-                                    # Tentar obter usando JavaScript como alternativa
-                                    try:
-                                        placa_js = driver.execute_script("return arguments[0].textContent", celulas[1]).strip()
-                                        if placa_js:
-                                            if '-' in placa_js:
-                                                placa_sem_traco = placa_js.replace('-', '')
-                                                if placa_sem_traco:
-                                                    placas.append(placa_sem_traco)
-                                                    logging.info(f"Placa recuperada via JS: {placa_js} -> {placa_sem_traco}")
-                                                else:
-                                                    logging.warning(f"Placa via JS ficou vazia após substituir traço: {placa_js}")
-                                                    placas_problematicas.append(placa_js)
-                                            else:
-                                                placas.append(placa_js)
-                                                logging.info(f"Placa sem traço via JS adicionada: {placa_js}")
-                                    except Exception as e:
-                                        logging.error(f"Erro ao tentar recuperar placa via JS: {e}")
+                                    # Se não tem traço, adicionar como está
+                                    placas.append(placa_com_traco)
+                                    logging.info(f"Placa sem traço adicionada: {placa_com_traco}")
 
+                        placas = _sem_duplicadas(placas)
                         logging.info(f"Total de placas encontradas: {len(placas)}")
                         for i, placa_item in enumerate(placas, 1):
                             logging.info(f"Placa {i}: {placa_item}")
@@ -245,5 +417,6 @@ def main():
 
 
 if __name__ == "__main__":
+    configuracao_log.configurar_log()
     main()
     pass
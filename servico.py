@@ -0,0 +1,172 @@
+"""
+Execução sem interface gráfica (servidor, agendador do sistema, serviço).
+Não importa o PyQt5: roda a mesma atualização do main.py e escreve o
+andamento em stdout como eventos JSON, um por linha. O log vai para stderr e
+para logs/servico.log.
+
+    python servico.py                  executa uma vez e sai
+    python servico.py --agendado       fica em execução seguindo o schedules.json
+    python servico.py --forcar --retomar --workers 2
+
+Eventos: inicio, veiculo, resumo, erro, agendamento, execucao (fim de uma
+execução agendada) e fim. Códigos de saída
+em CODIGOS_SAIDA; SIGINT/SIGTERM interrompem a execução como o botão Parar.
+"""
+import sys
+import json
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+SAIDA_OK = 0
+SAIDA_FALHAS_PARCIAIS = 1
+SAIDA_USO_INVALIDO = 2  # argparse
+SAIDA_SEM_CONEXAO = 3
+SAIDA_SEM_VEICULOS = 4
+SAIDA_INTERROMPIDO = 5
+SAIDA_ERRO = 6
+
+CODIGOS_SAIDA = {
+    SAIDA_OK: "todos os veículos atualizados (ou nada a atualizar)",
+    SAIDA_FALHAS_PARCIAIS: "execução concluída com falhas em alguns veículos",
+    SAIDA_USO_INVALIDO: "argumentos inválidos",
+    SAIDA_SEM_CONEXAO: "sem conexão com a internet",
+    SAIDA_SEM_VEICULOS: "nenhum veículo com localização encontrado",
+    SAIDA_INTERROMPIDO: "interrompido por sinal",
+    SAIDA_ERRO: "erro inesperado",
+}
+
+_saida_lock = threading.Lock()
+
+
+def emitir(evento, **dados):
+    """Escreve um evento JSON em uma linha do stdout."""
+    linha = json.dumps({"evento": evento, "ts": datetime.now().isoformat(timespec="seconds"), **dados},
+                       ensure_ascii=False, default=str)
+    with _saida_lock:
+        sys.stdout.write(linha + "\n")
+        sys.stdout.flush()
+
+
+def _configurar_log(verbose):
+    # O stdout fica reservado aos eventos JSON
+    import configuracao_log
+    configuracao_log.configurar_log(arquivo="servico.log", console=sys.stderr,
+                                    nivel=logging.DEBUG if verbose else configuracao_log.LOG_NIVEL)
+
+
+def executar_uma_vez(stop_event, forcar_todos=False, retomar=False, max_workers=None):
+    """Executa a atualização completa e retorna o código de saída."""
+    import atualizacao_ssw
+
+    emitir("inicio", forcar_todos=forcar_todos, retomar=retomar)
+    if not atualizacao_ssw.verificar_conexao():
+        emitir("erro", mensagem="Falha na conexão com a internet")
+        return SAIDA_SEM_CONEXAO
+
+    def ao_concluir_veiculo(concluidos, total, veiculo_info, sucesso):
+        emitir("veiculo", placa=veiculo_info['placa'], cidade=veiculo_info['cidade'],
+               estado=veiculo_info['estado'], sucesso=sucesso, concluidos=concluidos, total=total)
+
+    try:
+        resumo = atualizacao_ssw.executar_pipeline(
+            stop_event=stop_event, ao_concluir_veiculo=ao_concluir_veiculo,
+            forcar_todos=forcar_todos, max_workers=max_workers, retomar=retomar,
+        )
+    except Exception as e:
+        logging.error(f"Erro não tratado na atualização: {e}", exc_info=True)
+        emitir("erro", mensagem=str(e))
+        return SAIDA_ERRO
+
+    emitir("resumo", **{chave: valor if not isinstance(valor, list) else len(valor)
+                        for chave, valor in resumo.items()},
+           falhas_placas=resumo['falhas'])
+    if stop_event.is_set():
+        return SAIDA_INTERROMPIDO
+    if not resumo['total']:
+        return SAIDA_SEM_VEICULOS
+    if resumo['falhas'] or resumo['nao_processados']:
+        return SAIDA_FALHAS_PARCIAIS
+    return SAIDA_OK
+
+
+def executar_agendado(parar_servico, forcar_todos=False, max_workers=None):
+    """
+    Segue os agendamentos até parar_servico ser acionado. Cada execução
+    agendada tem o próprio stop_event, acionado também no encerramento.
+    """
+    import agendador
+
+    execucao_atual = {"stop_event": None}
+
+    def tarefa(horario):
+        stop_event = threading.Event()
+        execucao_atual["stop_event"] = stop_event
+        emitir("agendamento", horario=horario)
+        codigo = executar_uma_vez(stop_event, forcar_todos=forcar_todos, max_workers=max_workers)
+        emitir("execucao", codigo=codigo, descricao=CODIGOS_SAIDA[codigo], horario=horario)
+        proximas = servico.proximas_execucoes(3)
+        emitir("agendamento", proximas=[momento.isoformat(timespec="minutes") for momento, _ in proximas])
+
+    servico = agendador.Agendador(agendador.carregar_agendamentos(), tarefa)
+    servico.iniciar()
+    emitir("agendamento", proximas=[momento.isoformat(timespec="minutes")
+                                    for momento, _ in servico.proximas_execucoes(3)])
+
+    parar_servico.wait()
+    servico.parar()
+    if execucao_atual["stop_event"] is not None:
+        execucao_atual["stop_event"].set()
+    servico.aguardar()
+    servico.aguardar_execucao()
+    return SAIDA_OK
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Atualiza o SSW com a localização dos veículos, sem interface gráfica.",
+        epilog="Códigos de saída: " + "; ".join(f"{codigo} = {texto}" for codigo, texto in CODIGOS_SAIDA.items()),
+    )
+    parser.add_argument("--agendado", action="store_true",
+                        help="permanece em execução e roda nos horários do schedules.json")
+    parser.add_argument("--forcar", action="store_true",
+                        help="atualiza todos os veículos, mesmo os que não mudaram de cidade")
+    parser.add_argument("--retomar", action="store_true",
+                        help="continua a última execução interrompida (execução única)")
+    parser.add_argument("--workers", type=int, default=None, help="navegadores do SSW em paralelo")
+    parser.add_argument("--verbose", action="store_true", help="log em nível DEBUG")
+    args = parser.parse_args(argv)
+
+    _configurar_log(args.verbose)
+    stop_event = threading.Event()
+    sinais_recebidos = []
+
+    def ao_receber_sinal(numero, _frame):
+        sinais_recebidos.append(numero)
+        if len(sinais_recebidos) > 1:
+            # Segundo sinal: encerra na hora, fechando os navegadores
+            import atualizacao_ssw
+            atualizacao_ssw.fechar_sessoes_ativas()
+            sys.exit(SAIDA_INTERROMPIDO)
+        logging.info("Sinal de encerramento recebido. Finalizando operações...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, ao_receber_sinal)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, ao_receber_sinal)
+
+    if args.agendado:
+        codigo = executar_agendado(stop_event, forcar_todos=args.forcar, max_workers=args.workers)
+    else:
+        codigo = executar_uma_vez(stop_event, forcar_todos=args.forcar, retomar=args.retomar,
+                                  max_workers=args.workers)
+        if sinais_recebidos:
+            codigo = SAIDA_INTERROMPIDO
+    emitir("fim", codigo=codigo, descricao=CODIGOS_SAIDA[codigo])
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from agendador import Agenda, Agendador, ExpressaoInvalida
+
+
+class TestAgenda(unittest.TestCase):
+
+    def test_horario_fixo(self):
+        agenda = Agenda("08:30")
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 18, 8, 0)), datetime(2026, 10, 18, 8, 30))
+        # Estritamente depois: no próprio horário, vai para o dia seguinte
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 18, 8, 30)), datetime(2026, 10, 19, 8, 30))
+
+    def test_intervalo_recomeca_na_meia_noite(self):
+        agenda = Agenda("a cada 7h")
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 18, 0, 0)), datetime(2026, 10, 18, 7, 0))
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 18, 21, 0)), datetime(2026, 10, 19, 0, 0))
+
+    def test_cron_passo_e_faixa(self):
+        agenda = Agenda("*/15 6-18 * * 1-5")
+        # Sábado 17/10/2026: pula para segunda às 06:00
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 17, 12, 0)), datetime(2026, 10, 19, 6, 0))
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 19, 6, 0)), datetime(2026, 10, 19, 6, 15))
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 19, 18, 45)), datetime(2026, 10, 20, 6, 0))
+
+    def test_cron_dia_ou_dia_da_semana(self):
+        # Dia 1 ou domingo (como no cron, basta um dos dois conferir)
+        agenda = Agenda("0 9 1 * 0")
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 14, 0, 0)), datetime(2026, 10, 18, 9, 0))
+        self.assertEqual(agenda.proximo(datetime(2026, 10, 25, 10, 0)), datetime(2026, 11, 1, 9, 0))
+
+    def test_expressoes_invalidas(self):
+        for expressao in ("25:00", "a cada 0min", "a cada 5 dias", "* * *", "61 * * * *", "5-2 * * * *"):
+            with self.subTest(expressao=expressao):
+                with self.assertRaises(ExpressaoInvalida):
+                    Agenda(expressao)
+
+
+class TestAgendador(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.arquivo_estado = os.path.join(self.diretorio.name, "agendador_estado.json")
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def _salvar_estado(self, verificado_ate):
+        with open(self.arquivo_estado, "w", encoding="utf-8") as f:
+            json.dump({"verificado_ate": verificado_ate.isoformat(timespec="seconds")}, f)
+
+    def _agendador(self, expressoes, tarefa=lambda horario: None, **kwargs):
+        kwargs.setdefault("arquivo_estado", self.arquivo_estado)
+        kwargs.setdefault("tolerancia_min", 30)
+        return Agendador(expressoes, tarefa, **kwargs)
+
+    def test_disparos_perdidos_viram_uma_execucao(self):
+        agora = datetime(2026, 10, 18, 10, 2)
+        agendador = self._agendador(["a cada 5min"])
+        agendador._verificado_ate = agora - timedelta(minutes=20)
+        agendador._tratar_disparos(agora)
+        # 09:45, 09:50, 09:55 e 10:00 perdidos: uma única execução, a mais recente
+        self.assertEqual(agendador._pendentes, ["10:00 (a cada 5min)"])
+
+    def test_disparos_fora_da_tolerancia_sao_descartados(self):
+        agora = datetime(2026, 10, 18, 10, 0)
+        agendador = self._agendador(["08:30"], tolerancia_min=15)
+        agendador._verificado_ate = datetime(2026, 10, 18, 8, 0)
+        agendador._tratar_disparos(agora)
+        self.assertEqual(agendador._pendentes, [])
+        self.assertEqual(agendador._verificado_ate, agora)
+
+    def test_sem_estado_salvo_comeca_de_agora(self):
+        antes = datetime.now()
+        agendador = self._agendador(["a cada 1min"])
+        self.assertGreaterEqual(agendador._verificado_ate, antes)
+
+    def test_politicas_de_sobreposicao(self):
+        esperados = {"fila": 2, "agrupar": 1, "ignorar": 0}
+        for politica, quantidade in esperados.items():
+            with self.subTest(politica=politica):
+                agendador = self._agendador([], ocupado=lambda: True, sobreposicao=politica, arquivo_estado=None)
+                agendador._enfileirar("08:00")
+                agendador._enfileirar("08:05")
+                self.assertEqual(len(agendador._pendentes), quantidade)
+
+    def test_execucao_atrasada_roda_uma_vez(self):
+        chamadas = []
+        executou = threading.Event()
+
+        def tarefa(horario):
+            chamadas.append(horario)
+            executou.set()
+
+        self._salvar_estado(datetime.now() - timedelta(minutes=12))
+        agendador = self._agendador(["a cada 5min"], tarefa)
+        agendador.iniciar()
+        try:
+            self.assertTrue(executou.wait(5))
+        finally:
+            agendador.parar()
+            agendador.aguardar()
+            agendador.aguardar_execucao(5)
+        self.assertEqual(len(chamadas), 1)
+        with open(self.arquivo_estado, "r", encoding="utf-8") as f:
+            self.assertIn("verificado_ate", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
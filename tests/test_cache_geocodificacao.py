@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cache_geocodificacao
+from cache_geocodificacao import CacheGeocodificacao, geohash
+
+SAO_PAULO = {"cidade": "São Paulo", "estado": "São Paulo"}
+
+
+class TestGeohash(unittest.TestCase):
+
+    def test_valores_conhecidos(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash(-23.5505, -46.6333, 6), "6gyf4b")
+
+    def test_pontos_proximos_compartilham_a_celula(self):
+        self.assertEqual(geohash(-23.5505, -46.6333), geohash(-23.5510, -46.6330))
+        self.assertNotEqual(geohash(-23.5505, -46.6333), geohash(-23.5605, -46.6333))
+
+
+class TestCacheGeocodificacao(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.diretorio.name, "cache.json")
+        self.relogio = 1_000_000.0
+        patcher = mock.patch.object(cache_geocodificacao.time, "time", lambda: self.relogio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def test_acerto_na_mesma_celula_e_persistencia(self):
+        cache = CacheGeocodificacao(self.caminho)
+        self.assertIsNone(cache.obter(-23.5505, -46.6333))
+        cache.guardar(-23.5505, -46.6333, SAO_PAULO)
+        self.assertEqual(cache.obter("-23.5510", "-46.6330"), SAO_PAULO)
+        self.assertEqual(CacheGeocodificacao(self.caminho).obter(-23.5505, -46.6333), SAO_PAULO)
+        self.assertEqual(cache.estatisticas(), {"acertos": 1, "falhas": 1, "entradas": 1})
+
+    def test_entrada_expirada_e_removida(self):
+        cache = CacheGeocodificacao(self.caminho, ttl_dias=1)
+        cache.guardar(-23.5505, -46.6333, SAO_PAULO)
+        self.relogio += 86400 + 1
+        self.assertIsNone(cache.obter(-23.5505, -46.6333))
+        self.assertEqual(cache.estatisticas()["entradas"], 0)
+
+    def test_descarta_as_menos_usadas(self):
+        cache = CacheGeocodificacao(self.caminho, max_entradas=2)
+        cache.guardar(-10.0, -40.0, {"cidade": "A", "estado": "Bahia"})
+        self.relogio += 1
+        cache.guardar(-20.0, -40.0, {"cidade": "B", "estado": "Espírito Santo"})
+        self.relogio += 1
+        self.assertIsNotNone(cache.obter(-10.0, -40.0))  # A passa a ser a mais recente
+        self.relogio += 1
+        cache.guardar(-30.0, -50.0, {"cidade": "C", "estado": "Rio Grande do Sul"})
+        self.assertIsNotNone(cache.obter(-10.0, -40.0))
+        self.assertIsNone(cache.obter(-20.0, -40.0))
+        self.assertIsNotNone(cache.obter(-30.0, -50.0))
+
+    def test_arquivo_invalido_comeca_vazio(self):
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write("{corrompido")
+        cache = CacheGeocodificacao(self.caminho)
+        self.assertEqual(cache.estatisticas()["entradas"], 0)
+        cache.guardar(-23.5505, -46.6333, SAO_PAULO)
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
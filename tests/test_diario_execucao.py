@@ -0,0 +1,73 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from diario_execucao import DiarioExecucao, CONCLUIDO, FALHA
+
+
+class TestDiarioExecucao(unittest.TestCase):
+
+    def setUp(self):
+        self.temporario = tempfile.TemporaryDirectory()
+        self.diretorio = Path(self.temporario.name)
+
+    def tearDown(self):
+        self.temporario.cleanup()
+
+    def _execucao_interrompida(self):
+        diario = DiarioExecucao.abrir(diretorio=self.diretorio)
+        diario.registrar_placa("ABC1D23", CONCLUIDO)
+        diario.registrar_manifesto("ABC1D23", "CTA123", CONCLUIDO)
+        diario.registrar_manifesto("EFG4H56", "CTA456", CONCLUIDO)
+        diario.registrar_manifesto("EFG4H56", "CTA789", FALHA)
+        diario.registrar_placa("EFG4H56", FALHA)
+        diario.finalizar(interrompida=True)
+        return diario
+
+    def test_retomada_pula_o_que_ja_foi_concluido(self):
+        interrompido = self._execucao_interrompida()
+        diario = DiarioExecucao.abrir(retomar=True, diretorio=self.diretorio)
+        try:
+            self.assertTrue(diario.retomada)
+            self.assertEqual(diario.execucao_id, interrompido.execucao_id)
+            self.assertTrue(diario.placa_concluida("ABC1D23"))
+            self.assertFalse(diario.placa_concluida("EFG4H56"))
+            self.assertTrue(diario.manifesto_concluido("EFG4H56", "CTA456"))
+            self.assertFalse(diario.manifesto_concluido("EFG4H56", "CTA789"))
+        finally:
+            diario.finalizar()
+        self.assertEqual(len(list(self.diretorio.glob("diario_*.jsonl"))), 1)
+
+    def test_execucao_finalizada_nao_e_retomada(self):
+        diario = DiarioExecucao.abrir(diretorio=self.diretorio)
+        diario.registrar_placa("ABC1D23", CONCLUIDO)
+        diario.finalizar({"sucessos": ["ABC1D23"], "falhas": []})
+
+        novo = DiarioExecucao.abrir(retomar=True, diretorio=self.diretorio)
+        try:
+            self.assertFalse(novo.retomada)
+            self.assertNotEqual(novo.execucao_id, diario.execucao_id)
+            self.assertFalse(novo.placa_concluida("ABC1D23"))
+        finally:
+            novo.finalizar()
+
+        with open(diario.caminho, "r", encoding="utf-8") as f:
+            fim = json.loads(f.readlines()[-1])
+        self.assertEqual(fim["tipo"], "fim")
+        self.assertEqual(fim["resumo"], {"sucessos": 1, "falhas": 0})
+
+    def test_linha_cortada_por_queda_e_ignorada(self):
+        interrompido = self._execucao_interrompida()
+        with open(interrompido.caminho, "a", encoding="utf-8") as f:
+            f.write('{"tipo": "placa", "placa": "IJK7L')
+        diario = DiarioExecucao.abrir(retomar=True, diretorio=self.diretorio)
+        try:
+            self.assertTrue(diario.placa_concluida("ABC1D23"))
+            self.assertFalse(diario.placa_concluida("IJK7L89"))
+        finally:
+            diario.finalizar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import csv
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from geocodificador_offline import GeocodificadorOffline, RAIO_TERRA_KM
+
+CODIGOS_UF = (11, 23, 29, 31, 33, 35, 41, 43, 51, 53)
+
+
+def _distancia_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+class TestGeocodificadorOffline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        aleatorio = random.Random(42)
+        cls.diretorio = tempfile.TemporaryDirectory()
+        cls.caminho = os.path.join(cls.diretorio.name, "municipios.csv")
+        cls.pontos = [(f"Município {i}", aleatorio.uniform(-33.7, 5.2), aleatorio.uniform(-73.9, -34.8),
+                       aleatorio.choice(CODIGOS_UF)) for i in range(3000)]
+        with open(cls.caminho, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(("nome", "latitude", "longitude", "codigo_uf"))
+            escritor.writerows(cls.pontos)
+            escritor.writerow(("Fora do Brasil", -23.0, -46.0, 99))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.diretorio.cleanup()
+
+    def test_igual_a_forca_bruta(self):
+        geocodificador = GeocodificadorOffline(self.caminho, distancia_max_km=20000)
+        aleatorio = random.Random(7)
+        for _ in range(300):
+            latitude, longitude = aleatorio.uniform(-34, 6), aleatorio.uniform(-74, -34)
+            esperado = min(self.pontos, key=lambda p: _distancia_km(latitude, longitude, p[1], p[2]))
+            self.assertEqual(geocodificador.localizar(latitude, longitude)["cidade"], esperado[0])
+
+    def test_distancia_maxima(self):
+        geocodificador = GeocodificadorOffline(self.caminho, distancia_max_km=30)
+        nome, latitude, longitude, _ = self.pontos[0]
+        self.assertEqual(geocodificador.localizar(latitude + 0.1, longitude)["cidade"], nome)
+        # Meio do Atlântico: nenhum município a menos de 30 km
+        self.assertIsNone(geocodificador.localizar(-20.0, -20.0))
+
+    def test_ignora_uf_desconhecida(self):
+        geocodificador = GeocodificadorOffline(self.caminho)
+        self.assertEqual(len(geocodificador.municipios), len(self.pontos))
+        self.assertNotIn("Fora do Brasil", {m[0] for m in geocodificador.municipios})
+
+    def test_base_vazia(self):
+        caminho = os.path.join(self.diretorio.name, "vazio.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("nome,latitude,longitude,codigo_uf\n")
+        self.assertIsNone(GeocodificadorOffline(caminho).localizar(-23.5, -46.6))
+
+
+if __name__ == "__main__":
+    unittest.main()